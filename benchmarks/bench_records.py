@@ -0,0 +1,57 @@
+"""Compare memory use of per-row dicts with slot-based records.
+
+Usage: python -m benchmarks.bench_records [rows]
+"""
+import sys
+import time
+import tracemalloc
+
+from src.core.records import record_type
+
+FIELDS = ("text", "author", "link", "tags")
+
+
+def _value(field, index):
+    # Distinct values per row, as a scrape would produce; strings are shared between
+    # both representations so only the container overhead differs.
+    return f"{field}-{index}"
+
+
+def measure(build, rows):
+    values = [[_value(field, index) for field in FIELDS] for index in range(rows)]
+    tracemalloc.start()
+    started = time.perf_counter()
+    items = build(values)
+    elapsed = time.perf_counter() - started
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return current, elapsed
+
+
+def build_dicts(values):
+    return [dict(zip(FIELDS, row, strict=True)) for row in values]
+
+
+def build_records(values):
+    record_cls = record_type(FIELDS)
+    items = []
+    for row in values:
+        record = record_cls()
+        for field, value in zip(FIELDS, row, strict=True):
+            record[field] = value
+        items.append(record)
+    return items
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    rows = int(argv[0]) if argv else 1_000_000
+    for label, build in (("dict", build_dicts), ("record", build_records)):
+        size, elapsed = measure(build, rows)
+        print(f"{label:>6}: {size / 1024 / 1024:8.1f} MiB for {rows} rows "
+              f"({size / rows:.0f} B/row), built in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
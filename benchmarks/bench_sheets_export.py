@@ -0,0 +1,84 @@
+"""Measure Sheets export throughput against the in-process fake backend.
+
+Simulated time is used for latency and quota, so the numbers reflect what a run
+would take against the real API without waiting for it.
+
+Usage: python -m benchmarks.bench_sheets_export [rows] [latency_ms] [quota_per_minute]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.ratelimit import TokenBucket
+from src.core.sheet_index import SheetIndex
+from src.core.sheets import SheetsExporter
+from src.core.sheets_fake import FakeSheetsClient
+
+CHUNK_SIZES = (100, 500, 2000)
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class QuietLogger:
+    def info(self, _message):
+        pass
+
+    def error(self, message):
+        print(message, file=sys.stderr)
+
+
+def run(rows, chunk_rows, latency, quota, workdir):
+    clock = SimulatedClock()
+    client = FakeSheetsClient(latency=latency, quota_per_minute=quota, clock=clock, sleep=clock.sleep)
+    config = {
+        'dedupe_keys': ['id'],
+        'output': {
+            'sheet_tab': 'Data',
+            'columns': ['id', 'title', 'price'],
+            'sheets': {'chunk_rows': chunk_rows, 'requests_per_minute': quota},
+        },
+    }
+    exporter = SheetsExporter(
+        config,
+        QuietLogger(),
+        client=client,
+        sheet_id=f'bench-{chunk_rows}',
+        index=SheetIndex(Path(workdir) / 'dedupe.db'),
+    )
+    exporter._sleep = clock.sleep
+    # Pace against the simulated clock too, so the budget and the fake quota agree.
+    exporter._budget = TokenBucket(quota / 60, clock=clock, sleep=clock.sleep)
+
+    data = [{'id': str(index), 'title': f'item {index}', 'price': str(index % 97)} for index in range(rows)]
+    started = time.perf_counter()
+    written = exporter.export(data)
+    cpu = time.perf_counter() - started
+    throttled = sum(1 for method in client.requests if method == 'append_rows') - exporter.chunks_written
+    return written, clock.now, cpu, client.request_count(), throttled
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    rows = int(argv[0]) if argv else 100_000
+    latency = (float(argv[1]) if len(argv) > 1 else 300.0) / 1000
+    quota = int(argv[2]) if len(argv) > 2 else 60
+    with tempfile.TemporaryDirectory() as workdir:
+        for chunk_rows in CHUNK_SIZES:
+            written, simulated, cpu, requests, throttled = run(rows, chunk_rows, latency, quota, workdir)
+            print(f"chunk_rows={chunk_rows:>5}: {written} rows, {requests} requests "
+                  f"({throttled} throttled), {simulated:8.1f}s simulated "
+                  f"({written / simulated if simulated else 0:,.0f} rows/s), {cpu:.2f}s CPU")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,24 +5,25 @@ import argparse
 import os
 import sys
 import uuid
+from datetime import datetime
 from pathlib import Path
-from typing import Sequence
-
-import requests
+from typing import TYPE_CHECKING, Sequence
 
 from . import __version__
-from .core.config import ConfigLoader
-from .core.logger import Logger
-from .core.processor import DataProcessor
-from .core.scraper import Scraper
-from .core.sheets import SheetsExporter
-from .qa.validator import SchemaValidator
+
+# Subcommands import what they need when they run: requests, bs4, gspread and
+# google-auth are slow to import, and `ws version` or `ws list-sites` should not
+# pay for them. tests/test_cli.py enforces the cold-start budget.
+if TYPE_CHECKING:
+    from .core.logger import Logger
+    from .core.service import WarmState
 
 EXIT_OK = 0
 EXIT_GENERAL = 1
 EXIT_INSUFFICIENT_DATA = 2
 EXIT_CONFIG = 3
 EXIT_RUNTIME = 4
+EXIT_LOCKED = 5
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 SITES_DIR = PROJECT_ROOT / "sites"
@@ -56,11 +57,51 @@ def main(argv: Sequence[str] | None = None) -> int:
         return validate_site(site_name, config_path)
 
     if args.command == "validate-all":
-        return validate_all_sites(SITES_DIR)
+        return validate_all_sites(
+            SITES_DIR,
+            report_format=args.format,
+            check_fixtures=args.check_fixtures,
+            jobs=args.jobs,
+            use_cache=not args.no_cache,
+        )
 
     if args.command == "run":
         site_name, _ = resolve_site_config(args.site)
-        return run_site(site_name, demo_mode=args.demo, sites_dir=SITES_DIR)
+        return run_site(site_name, demo_mode=args.demo, sites_dir=SITES_DIR, resume=args.resume)
+
+    if args.command == "serve":
+        return serve(
+            SITES_DIR,
+            workers=args.workers,
+            status_file=args.status_file,
+            port=args.port,
+            demo_mode=args.demo,
+        )
+
+    if args.command == "loadtest":
+        site_name, _ = resolve_site_config(args.site)
+        return loadtest(
+            site_name,
+            sites_dir=SITES_DIR,
+            pages=args.pages,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            rps=args.rps,
+            seed=args.seed,
+            report_format=args.format,
+        )
+
+    if args.command == "export":
+        if args.replay:
+            return export_replay(SITES_DIR, site=args.site)
+
+    if args.command == "dedupe":
+        if args.dedupe_command == "stats":
+            return dedupe_stats(SITES_DIR, site=args.site)
+        if args.dedupe_command == "compact":
+            return dedupe_compact(SITES_DIR, site=args.site)
 
     parser.print_help()
     return EXIT_GENERAL
@@ -76,11 +117,66 @@ def _build_parser() -> argparse.ArgumentParser:
     run_parser = subparsers.add_parser("run", help="Run scraper for site")
     run_parser.add_argument("site", help="Site name (with or without .yaml)")
     run_parser.add_argument("--demo", action="store_true", help="Run in offline demo mode")
+    run_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted crawl from its last checkpointed page",
+    )
 
     validate_parser = subparsers.add_parser("validate", help="Validate one site config")
     validate_parser.add_argument("site", help="Site name (with or without .yaml)")
 
-    subparsers.add_parser("validate-all", help="Validate every site config in sites/")
+    validate_all_parser = subparsers.add_parser("validate-all", help="Validate every site config in sites/")
+    validate_all_parser.add_argument(
+        "--format", choices=("text", "json", "junit"), default="text", help="Report format (default: text)"
+    )
+    validate_all_parser.add_argument(
+        "--check-fixtures", action="store_true", help="Also run selectors against each demo_fixture"
+    )
+    validate_all_parser.add_argument("--jobs", type=int, help="Worker processes (default: CPU count)")
+    validate_all_parser.add_argument(
+        "--no-cache", action="store_true", help="Re-validate configs that passed unchanged before"
+    )
+
+    serve_parser = subparsers.add_parser("serve", help="Run scheduled sites until stopped (SIGTERM)")
+    serve_parser.add_argument("--workers", type=int, default=4, help="Sites run at once (default: 4)")
+    serve_parser.add_argument(
+        "--status-file", default="logs/serve-status.json", help="JSON health file (default: logs/serve-status.json)"
+    )
+    serve_parser.add_argument("--port", type=int, help="Serve /health and /metrics on 127.0.0.1:PORT")
+    serve_parser.add_argument("--demo", action="store_true", help="Run every site in offline demo mode")
+
+    loadtest_parser = subparsers.add_parser(
+        "loadtest", help="Crawl synthetic pages from a local fixture server through the full pipeline"
+    )
+    loadtest_parser.add_argument("site", help="Site name (with or without .yaml)")
+    loadtest_parser.add_argument("--pages", type=int, default=50, help="Listing pages to serve (default: 50)")
+    loadtest_parser.add_argument("--latency-ms", type=float, default=50, help="Server latency per page (default: 50)")
+    loadtest_parser.add_argument("--jitter-ms", type=float, default=0, help="Extra random latency up to this much")
+    loadtest_parser.add_argument("--error-rate", type=float, default=0, help="Fraction of pages answered with 503")
+    loadtest_parser.add_argument(
+        "--throttle-rate", type=float, default=0, help="Fraction of pages answered with 429"
+    )
+    loadtest_parser.add_argument("--rps", type=float, help="Override the site's rate_limit.rps")
+    loadtest_parser.add_argument("--seed", type=int, help="Seed for latency and failure injection")
+    loadtest_parser.add_argument(
+        "--format", choices=("text", "json"), default="text", help="Report format (default: text)"
+    )
+
+    export_parser = subparsers.add_parser("export", help="Manage journaled Sheets exports")
+    export_parser.add_argument(
+        "--replay", action="store_true", help="Push pending journaled batches to Google Sheets"
+    )
+    export_parser.add_argument("--site", help="Only replay batches for one site")
+
+    dedupe_parser = subparsers.add_parser("dedupe", help="Inspect or compact the dedupe store")
+    dedupe_subparsers = dedupe_parser.add_subparsers(dest="dedupe_command")
+    stats_parser = dedupe_subparsers.add_parser("stats", help="Report dedupe key counts and size")
+    stats_parser.add_argument("--site", help="Limit the report to one site")
+    compact_parser = dedupe_subparsers.add_parser(
+        "compact", help="Delete expired dedupe keys and VACUUM the database"
+    )
+    compact_parser.add_argument("--site", help="Only expire keys for one site")
     return parser
 
 
@@ -96,6 +192,8 @@ def resolve_site_config(site_name: str, sites_dir: Path = SITES_DIR) -> tuple[st
 
 
 def validate_site(site_name: str, config_path: Path) -> int:
+    from .qa.validator import SchemaValidator
+
     validator = SchemaValidator()
     errors = validator.validate(str(config_path))
     if errors:
@@ -107,52 +205,435 @@ def validate_site(site_name: str, config_path: Path) -> int:
     return EXIT_OK
 
 
-def validate_all_sites(sites_dir: Path) -> int:
+def validate_all_sites(
+    sites_dir: Path,
+    report_format: str = "text",
+    check_fixtures: bool = False,
+    jobs: int | None = None,
+    use_cache: bool = True,
+) -> int:
     sites = discover_sites(sites_dir)
     if not sites:
         print(f"No site configs found in {sites_dir}")
         return EXIT_GENERAL
 
-    invalid_count = 0
-    for site in sites:
-        config_path = sites_dir / f"{site}.yaml"
-        if validate_site(site, config_path) != EXIT_OK:
-            invalid_count += 1
+    from .core.config import resolve_cache_dir
+    from .qa.fleet import VALIDATION_CACHE_FILE, ValidationCache, render_report, validate_configs
+
+    cache_dir = resolve_cache_dir() if use_cache else None
+    cache = ValidationCache(cache_dir / VALIDATION_CACHE_FILE) if cache_dir is not None else None
+    results = validate_configs(
+        [sites_dir / f"{site}.yaml" for site in sites],
+        check_fixtures=check_fixtures,
+        base_dir=PROJECT_ROOT,
+        jobs=jobs,
+        cache=cache,
+    )
+    print(render_report(results, report_format))
+    return EXIT_CONFIG if any(result["errors"] for result in results) else EXIT_OK
+
+
+def _load_dedupe_targets(sites_dir: Path, site: str | None) -> dict[Path, list[dict]]:
+    """Group site configs by the dedupe database they write to."""
+    from .core.config import ConfigLoader
+    from .core.processor import resolve_dedupe_db_path
 
-    return EXIT_CONFIG if invalid_count else EXIT_OK
+    if site:
+        site_names = [resolve_site_config(site, sites_dir=sites_dir)[0]]
+    else:
+        site_names = discover_sites(sites_dir)
 
+    loader = ConfigLoader()
+    targets: dict[Path, list[dict]] = {}
+    for site_name in site_names:
+        config = loader.load(str(sites_dir / f"{site_name}.yaml"))
+        db_path = Path(resolve_dedupe_db_path(config)).expanduser().resolve()
+        targets.setdefault(db_path, []).append(config)
+    return targets
 
-def run_site(site_name: str, demo_mode: bool = False, sites_dir: Path = SITES_DIR) -> int:
+
+def dedupe_stats(sites_dir: Path, site: str | None = None) -> int:
+    from .core.database import DedupeDB
+
+    try:
+        targets = _load_dedupe_targets(sites_dir, site)
+    except ValueError as exc:
+        print(str(exc))
+        return EXIT_CONFIG
+
+    for db_path, configs in targets.items():
+        if not db_path.exists():
+            print(f"{db_path}: not created yet")
+            continue
+
+        db = DedupeDB(db_path=db_path)
+        size = db.size_bytes()
+        table_size = db.dedupe_table_bytes()
+        stats = db.stats()
+        total_keys = sum(entry["keys"] for entry in stats) or 1
+        wanted = {config["name"] for config in configs} if site else None
+        if table_size is None:
+            # Without dbstat only the file size is known, and it also holds journals,
+            # checkpoints and caches; say so rather than pass the share off as key storage.
+            print(f"{db_path}: {_format_bytes(size)} (dedupe key sizes are rough shares of the whole file)")
+            table_size, size_label = size, "of file"
+        else:
+            print(f"{db_path}: {_format_bytes(size)}, dedupe keys {_format_bytes(table_size)}")
+            size_label = "of dedupe keys"
+        for entry in stats:
+            if wanted is not None and entry["site"] not in wanted:
+                continue
+            # SQLite does not track storage per row group, so attribute the table
+            # size to sites in proportion to their key counts.
+            approx_size = table_size * entry["keys"] / total_keys
+            print(
+                f"  {entry['site']}: {entry['keys']} keys, ~{_format_bytes(approx_size)} {size_label}, "
+                f"first seen {_format_timestamp(entry['first_seen'])}, "
+                f"last seen {_format_timestamp(entry['last_seen'])}"
+            )
+    return EXIT_OK
+
+
+def dedupe_compact(sites_dir: Path, site: str | None = None) -> int:
+    from .core.database import DedupeDB
+
+    try:
+        targets = _load_dedupe_targets(sites_dir, site)
+    except ValueError as exc:
+        print(str(exc))
+        return EXIT_CONFIG
+
+    for db_path, configs in targets.items():
+        if not db_path.exists():
+            continue
+
+        db = DedupeDB(db_path=db_path)
+        size_before = db.size_bytes()
+        for config in configs:
+            ttl_days = config.get("dedupe_ttl_days")
+            if not ttl_days:
+                print(f"{config['name']}: no dedupe_ttl_days set; keeping all keys")
+                continue
+            expired = db.expire(config["name"], ttl_days)
+            print(f"{config['name']}: expired {expired} keys older than {ttl_days} days")
+        db.vacuum()
+        print(f"{db_path}: {_format_bytes(size_before)} -> {_format_bytes(db.size_bytes())}")
+    return EXIT_OK
+
+
+def export_replay(sites_dir: Path, site: str | None = None) -> int:
+    """Push journaled batches to Sheets without scraping; returns EXIT_RUNTIME if any remain."""
+    from .core.locking import SiteLockedError, SiteRunLock
+    from .core.logger import Logger
+    from .core.outbox import ExportOutbox
+    from .core.sheets import SheetsExporter
+
+    try:
+        targets = _load_dedupe_targets(sites_dir, site)
+    except ValueError as exc:
+        print(str(exc))
+        return EXIT_CONFIG
+
+    logger = Logger()
+    remaining = 0
+    for db_path, configs in targets.items():
+        if not db_path.exists():
+            continue
+        outbox = ExportOutbox(db_path)
+        for config in configs:
+            name = config["name"]
+            # Read the journal only under the site's lock: a run or another replay
+            # holding it may be delivering (and acknowledging) the same batches.
+            try:
+                with SiteRunLock.for_dedupe_db(db_path, name):
+                    pending = outbox.pending(name)
+                    if not pending:
+                        print(f"{name}: nothing to replay")
+                        continue
+                    exporter = SheetsExporter(config, logger)
+                    if not exporter.gc:
+                        print(f"{name}: Google Sheets is not configured; {len(pending)} batch(es) left pending")
+                        remaining += len(pending)
+                        continue
+                    delivered = 0
+                    for batch in pending:
+                        rows_done = outbox.rows_done(batch["batch_id"])
+                        if rows_done is None:
+                            delivered += 1
+                            continue
+                        rows = batch["rows"][rows_done:]
+                        batches = [(batch["batch_id"], rows_done, len(rows))]
+                        if outbox.deliver(exporter, rows, batches):
+                            delivered += 1
+            except SiteLockedError as exc:
+                print(f"{name}: {exc}; skipping")
+                remaining += outbox.count(name)
+                continue
+            left = len(pending) - delivered
+            remaining += left
+            print(f"{name}: replayed {delivered}/{len(pending)} batch(es)" + (f", {left} still pending" if left else ""))
+    return EXIT_RUNTIME if remaining else EXIT_OK
+
+
+def serve(
+    sites_dir: Path,
+    workers: int = 4,
+    status_file: str | None = None,
+    port: int | None = None,
+    demo_mode: bool = False,
+) -> int:
+    """Run sites on their configured schedules until SIGTERM or SIGINT."""
+    import signal
+
+    from .core.logger import Logger
+    from .core.service import ServeDaemon
+
+    if workers < 1:
+        print("--workers must be at least 1")
+        return EXIT_GENERAL
     logger = Logger()
+
+    def runner(site, config, warm, site_logger):
+        return run_site(
+            site,
+            demo_mode=demo_mode,
+            sites_dir=sites_dir,
+            config=config,
+            logger=site_logger,
+            warm=warm,
+            resume=True,
+        )
+
+    daemon = ServeDaemon(sites_dir, logger, runner, workers=workers, status_path=status_file)
+    if port is not None:
+        bound_port = daemon.start_http(port)
+        logger.info(f"Health on http://127.0.0.1:{bound_port}/health, metrics on /metrics")
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.serve_forever()
+    return EXIT_OK
+
+
+def loadtest(
+    site_name: str,
+    sites_dir: Path = SITES_DIR,
+    pages: int = 50,
+    latency_ms: float = 50,
+    jitter_ms: float = 0,
+    error_rate: float = 0,
+    throttle_rate: float = 0,
+    rps: float | None = None,
+    seed: int | None = None,
+    report_format: str = "text",
+) -> int:
+    """Run a site against synthetic pages served from 127.0.0.1 and print throughput numbers."""
+    import json
+
+    from .core.config import ConfigLoader
+    from .qa.loadtest import format_report, run_loadtest
+
+    _, config_path = resolve_site_config(site_name, sites_dir=sites_dir)
+    try:
+        config = ConfigLoader().load(str(config_path))
+        fixture = Path(config.get("demo_fixture", str(DEFAULT_DEMO_FIXTURE)))
+        if not fixture.is_absolute():
+            fixture = PROJECT_ROOT / fixture
+        fixture_html = fixture.read_text(encoding="utf-8")
+    except (OSError, ValueError) as exc:
+        print(f"Cannot load test {site_name}: {exc}")
+        return EXIT_CONFIG
+
+    def runner(site_config, warm, exporter_options, site_logger):
+        return run_site(
+            site_name,
+            sites_dir=sites_dir,
+            config=site_config,
+            logger=site_logger,
+            warm=warm,
+            exporter_options=exporter_options,
+            alert=False,
+        )
+
+    try:
+        report = run_loadtest(
+            config,
+            fixture_html,
+            runner,
+            pages=pages,
+            latency=latency_ms / 1000,
+            jitter=jitter_ms / 1000,
+            error_rate=error_rate,
+            throttle_rate=throttle_rate,
+            rps=rps,
+            seed=seed,
+        )
+    except ValueError as exc:
+        print(f"Cannot load test {site_name}: {exc}")
+        return EXIT_CONFIG
+    if report_format == "json":
+        print(json.dumps({"site": site_name, **report}, indent=2))
+    else:
+        print(format_report(site_name, report))
+    return report["exit_code"]
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _format_timestamp(timestamp: float | None) -> str:
+    if timestamp is None:
+        return "never"
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+def run_site(
+    site_name: str,
+    demo_mode: bool = False,
+    sites_dir: Path = SITES_DIR,
+    config: dict | None = None,
+    logger: Logger | None = None,
+    warm: WarmState | None = None,
+    resume: bool = False,
+    exporter_options: dict | None = None,
+    alert: bool = True,
+) -> int:
+    """Run one site end to end and return its exit code.
+
+    ``ws serve`` passes an already loaded ``config``, its own ``logger`` and the
+    ``warm`` state it keeps between runs; a one-off ``ws run`` builds all three.
+    Live runs checkpoint every page; with ``resume`` a crawl that was interrupted
+    continues after its last saved page instead of starting over.
+    ``exporter_options`` go to :class:`SheetsExporter` (``ws loadtest`` passes a fake
+    client) and ``alert=False`` suppresses the Slack failure alert.
+    """
+    from itertools import chain
+
+    import requests
+
+    from .core.checkpoint import CrawlCheckpoint, crawl_fingerprint
+    from .core.config import ConfigLoader, ScrapePlan
+    from .core.follow import FollowCache
+    from .core.locking import SiteLockedError, SiteRunLock
+    from .core.logger import Logger
+    from .core.outbox import ExportOutbox
+    from .core.pipeline import ExportPipeline, pipeline_enabled
+    from .core.processor import DataProcessor, resolve_dedupe_db_path
+    from .core.scraper import Scraper
+    from .core.sheets import SheetsExporter
+    from .core.sitemap import SitemapLastmods
+
+    logger = logger or Logger()
     _, config_path = resolve_site_config(site_name, sites_dir=sites_dir)
     run_id = uuid.uuid4().hex
 
-    if not config_path.exists():
+    if config is None and not config_path.exists():
         logger.error(f"Config file not found: {config_path}")
-        _send_failure_alert(logger, site_name=site_name, run_id=run_id, exit_code=EXIT_CONFIG)
+        if alert:
+            _send_failure_alert(logger, site_name=site_name, run_id=run_id, exit_code=EXIT_CONFIG)
         return EXIT_CONFIG
 
+    site_lock = None
     try:
-        loader = ConfigLoader()
-        config = loader.load(str(config_path))
-        logger.info(f"Configuration loaded: site={site_name}")
+        if config is None:
+            config = ConfigLoader().load(str(config_path))
+            logger.info(f"Configuration loaded: site={site_name}")
 
         if demo_mode:
-            apply_demo_mode(config, logger)
+            config = apply_demo_mode(config, logger)
         else:
-            start_urls = ", ".join(config.get("urls", []))
+            start_urls = ScrapePlan.for_config(config).urls.describe()
             logger.info(f"Live mode active; starting URLs={start_urls}")
 
-        scraper = Scraper(config, logger)
-        data = scraper.scrape(demo_mode=demo_mode)
-        processor = DataProcessor(config, logger, demo_mode=demo_mode)
-        processed_data = processor.process(data)
-
-        if not demo_mode and processed_data:
-            exporter = SheetsExporter(config, logger)
-            exporter.export(processed_data)
-
+        exporter = None if demo_mode else SheetsExporter(config, logger, **(exporter_options or {}))
+        db_path = resolve_dedupe_db_path(config)
+        # Journal claimed rows until Sheets confirms them so failures can be replayed.
+        outbox = None
+        if exporter and exporter.gc:
+            outbox = warm.outbox(db_path) if warm is not None else ExportOutbox(db_path)
+        db = warm.dedupe_db(db_path) if warm is not None and not demo_mode else None
+        processor = DataProcessor(config, logger, demo_mode=demo_mode, db=db, run_id=run_id, outbox=outbox)
+        checkpoint = None
+        if not demo_mode:
+            site_lock = SiteRunLock.for_dedupe_db(db_path, config["name"])
+            site_lock.acquire()
+            if outbox is not None and outbox.count(config["name"]):
+                logger.info(
+                    f"{outbox.count(config['name'])} export batch(es) pending from earlier runs; "
+                    f"push them with: ws export --replay --site {site_name}"
+                )
+            checkpoint = warm.checkpoint(db_path) if warm is not None else CrawlCheckpoint(db_path)
+        scraper_options = {}
+        if warm is not None:
+            scraper_options = {"session": warm.session(site_name), "robot_parsers": warm.robot_parsers(site_name)}
+            workers = ScrapePlan.for_config(config).parse_workers
+            if workers > 1:
+                scraper_options["parse_pool"] = warm.parse_pool(site_name, config, workers)
+        if checkpoint is not None:
+            scraper_options["on_page"] = lambda position, items: checkpoint.save_page(config["name"], position, items)
+        if config.get("discovery") and not demo_mode:
+            scraper_options["lastmods"] = (
+                warm.sitemap_lastmods(db_path) if warm is not None else SitemapLastmods(db_path)
+            )
+        if config.get("follow") and not demo_mode:
+            scraper_options["follow_cache"] = warm.follow_cache(db_path) if warm is not None else FollowCache(db_path)
+        scraper = Scraper(config, logger, seen_check=processor.seen_flags, **scraper_options)
+        processor.expect_empty = scraper.discovery_up_to_date
+
+        resume_from, restored = None, []
+        if checkpoint is not None:
+            saved = checkpoint.load(config["name"]) if resume else None
+            fingerprint = crawl_fingerprint(config)
+            if saved is not None and saved["config_hash"] == fingerprint and saved["position"] is not None:
+                resume_from = saved["position"]
+                restored = [scraper.record_type(item) for item in saved["items"]]
+                logger.info(
+                    f"Resuming crawl after {saved['pages_done']} page(s) "
+                    f"with {len(restored)} checkpointed item(s) from run {saved['run_id']}"
+                )
+            else:
+                if saved is not None and saved["config_hash"] != fingerprint:
+                    logger.info("Crawl checkpoint was saved for a different config; starting over")
+                elif resume:
+                    logger.info("No crawl checkpoint to resume; starting from the first page")
+                checkpoint.start(config["name"], run_id, fingerprint)
+
+        if pipeline_enabled(config):
+            pipeline = ExportPipeline(processor, exporter, logger)
+            batches = scraper.iter_batches(demo_mode=demo_mode, resume=resume_from)
+            pipeline.run(chain([restored], batches) if restored else batches)
+            delivered = not pipeline.undelivered
+        else:
+            data = restored + scraper.scrape(demo_mode=demo_mode, resume=resume_from)
+            processed_data = processor.process(data)
+
+            delivered = True
+            if exporter is not None and processed_data:
+                if processor.last_journal_id is not None:
+                    delivered = outbox.deliver(
+                        exporter, processed_data, [(processor.last_journal_id, 0, len(processed_data))]
+                    )
+                else:
+                    exporter.export(processed_data)
+        if not delivered:
+            # The rows are journaled; fail the run (keeping its checkpoint) so it is noticed.
+            raise RuntimeError(
+                f"Sheets export incomplete; {outbox.count(config['name'])} export batch(es) pending, "
+                f"push them with: ws export --replay --site {site_name}"
+            )
+
+        scraper.commit_discovery()
+        if checkpoint is not None:
+            checkpoint.clear(config["name"])
         exit_code = EXIT_OK
+    except SiteLockedError as exc:
+        # An overlapping run is expected with slow schedules; skip without alerting.
+        logger.error(f"{exc}; skipping this run")
+        return EXIT_LOCKED
     except ValueError as exc:
         message = str(exc)
         logger.error(message)
@@ -163,15 +644,20 @@ def run_site(site_name: str, demo_mode: bool = False, sites_dir: Path = SITES_DI
     except Exception as exc:  # pragma: no cover - defensive safety net
         logger.error(f"Runtime error: {exc}")
         exit_code = EXIT_RUNTIME
+    finally:
+        if site_lock is not None:
+            site_lock.release()
 
-    if exit_code != EXIT_OK:
+    if exit_code != EXIT_OK and alert:
         _send_failure_alert(logger, site_name=site_name, run_id=run_id, exit_code=exit_code)
 
     return exit_code
 
 
-def apply_demo_mode(config: dict, logger: Logger):
-    config["demo_mode"] = True
+def apply_demo_mode(config: dict, logger: Logger) -> dict:
+    """Return a copy of ``config`` that scrapes the bundled demo fixture."""
+    from .core.config import CompiledConfig
+
     fixture = Path(config.get("demo_fixture", str(DEFAULT_DEMO_FIXTURE)))
     if not fixture.is_absolute():
         fixture = PROJECT_ROOT / fixture
@@ -180,12 +666,22 @@ def apply_demo_mode(config: dict, logger: Logger):
     if not fixture.exists():
         raise ValueError(f"Demo fixture not found: {fixture}")
 
-    config["urls"] = [fixture.as_uri()]
-    config["pagination"] = {"type": "none"}
-    config["rate_limit"] = {"rps": 1, "burst": 1}
-    config.setdefault("output", {})
-    config["output"].setdefault("csv_dir", "out")
+    output = dict(config.get("output") or {})
+    output.setdefault("csv_dir", "out")
+    changes = {
+        "demo_mode": True,
+        "urls": [fixture.as_uri()],
+        "discovery": None,
+        # Detail links in the fixture point at the live site.
+        "follow": None,
+        "pagination": {"type": "none"},
+        "rate_limit": {"rps": 1, "burst": 1},
+        "output": output,
+    }
     logger.info(f"Demo mode active; using fixture {fixture}")
+    if isinstance(config, CompiledConfig):
+        return config.replace(**changes)
+    return {**config, **changes}
 
 
 def _send_failure_alert(logger: Logger, site_name: str, run_id: str, exit_code: int):
@@ -193,6 +689,8 @@ def _send_failure_alert(logger: Logger, site_name: str, run_id: str, exit_code:
     if not webhook_url:
         return
 
+    import requests
+
     try:
         requests.post(
             webhook_url,
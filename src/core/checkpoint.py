@@ -0,0 +1,121 @@
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from .database import DEFAULT_BUSY_TIMEOUT
+
+# Config keys that decide which pages a crawl visits and what it extracts from them.
+_CRAWL_KEYS = ("urls", "format", "discovery", "pagination", "selectors", "follow", "transforms")
+
+
+def crawl_fingerprint(config):
+    """Hash the parts of ``config`` a checkpoint is only valid for."""
+    crawl = {key: config.get(key) for key in _CRAWL_KEYS}
+    payload = json.dumps(crawl, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CrawlCheckpoint:
+    """Per-site crawl position plus the pages scraped since the last commit.
+
+    Stored in the dedupe database. ``save_page`` records the position after a page
+    and that page's items in one transaction, so ``ws run --resume`` can continue a
+    killed crawl where it stopped and still export the rows it had already
+    scraped. Runs call :meth:`clear` once their rows are committed.
+    """
+
+    def __init__(self, db_path="dedupe.db", busy_timeout=DEFAULT_BUSY_TIMEOUT):
+        self.db_path = Path(db_path).expanduser()
+        self.busy_timeout = busy_timeout
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(str(self.db_path), timeout=self.busy_timeout)
+
+    def init_db(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+                    site TEXT PRIMARY KEY,
+                    run_id TEXT,
+                    config_hash TEXT NOT NULL,
+                    position_json TEXT,
+                    pages_done INTEGER NOT NULL DEFAULT 0,
+                    updated_at INTEGER
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS crawl_checkpoint_pages (
+                    site TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    items_json TEXT NOT NULL,
+                    PRIMARY KEY (site, page)
+                )
+            """)
+
+    def start(self, site, run_id, config_hash):
+        """Discard any previous checkpoint for ``site`` and begin a new one."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM crawl_checkpoint_pages WHERE site = ?", (site,))
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO crawl_checkpoints (site, run_id, config_hash, pages_done, updated_at)
+                VALUES (?, ?, ?, 0, ?)
+                """,
+                (site, run_id, config_hash, int(time.time())),
+            )
+
+    def save_page(self, site, position, items):
+        payload = json.dumps([dict(item) for item in items], ensure_ascii=False, default=str)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE crawl_checkpoints
+                SET position_json = ?, pages_done = pages_done + 1, updated_at = ?
+                WHERE site = ?
+                """,
+                (json.dumps(position), int(time.time()), site),
+            )
+            if cursor.rowcount == 0:
+                raise RuntimeError(f"No crawl checkpoint started for site '{site}'")
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO crawl_checkpoint_pages (site, page, items_json)
+                SELECT site, pages_done, ? FROM crawl_checkpoints WHERE site = ?
+                """,
+                (payload, site),
+            )
+
+    def load(self, site):
+        """Return the saved checkpoint for ``site`` as a dict, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT run_id, config_hash, position_json, pages_done, updated_at
+                FROM crawl_checkpoints WHERE site = ?
+                """,
+                (site,),
+            ).fetchone()
+            if row is None:
+                return None
+            pages = conn.execute(
+                "SELECT items_json FROM crawl_checkpoint_pages WHERE site = ? ORDER BY page", (site,)
+            ).fetchall()
+        run_id, config_hash, position_json, pages_done, updated_at = row
+        return {
+            "run_id": run_id,
+            "config_hash": config_hash,
+            "position": json.loads(position_json) if position_json else None,
+            "pages_done": pages_done,
+            "updated_at": updated_at,
+            "items": [item for (items_json,) in pages for item in json.loads(items_json)],
+        }
+
+    def clear(self, site):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM crawl_checkpoint_pages WHERE site = ?", (site,))
+            conn.execute("DELETE FROM crawl_checkpoints WHERE site = ?", (site,))
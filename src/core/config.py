@@ -1,38 +1,251 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
 import yaml
 
 from ..qa.validator import SchemaValidator
+from .follow import follow_options
+from .jsonpath import JsonPath
+from .urls import UrlSources
+
+# Bump when defaults or the cached layout change so stale compiled configs are ignored.
+COMPILER_VERSION = 1
+DEFAULT_CACHE_DIR = Path("~/.cache/web-to-sheets/configs")
+DEFAULT_USER_AGENT = "web-to-sheets/0.1"
+
+
+def _frozen(*_args, **_kwargs):
+    raise TypeError("Compiled configs are read-only; use CompiledConfig.replace() instead")
+
+
+class _FrozenDict(dict):
+    __setitem__ = __delitem__ = __ior__ = _frozen
+    clear = pop = popitem = setdefault = update = _frozen
+
+    def __reduce__(self):
+        return (type(self), (thaw(self),))
+
+
+class _FrozenList(list):
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _frozen
+    append = clear = extend = insert = pop = remove = reverse = sort = _frozen
+
+    def __reduce__(self):
+        return (type(self), (thaw(self),))
+
+
+def freeze(value):
+    """Return a read-only copy of nested dicts and lists."""
+    if isinstance(value, dict):
+        return _FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return _FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Return a plain, mutable copy of a (possibly frozen) config value."""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+def resolve_cache_dir(cache_dir=None):
+    """Return the compiled-config cache directory, or None when caching is disabled."""
+    if cache_dir is None:
+        cache_dir = os.getenv("WS_CONFIG_CACHE_DIR") or DEFAULT_CACHE_DIR
+    if cache_dir is False or cache_dir in ("off", "0", ""):
+        return None
+    return Path(cache_dir).expanduser()
+
+
+def apply_defaults(config):
+    rate_limit = config.setdefault("rate_limit", {})
+    rate_limit.setdefault("rps", 1)
+    rate_limit.setdefault("burst", 2)
+
+    timeouts = config.setdefault("timeouts", {})
+    timeouts.setdefault("connect", 10)
+    timeouts.setdefault("read", 20)
+
+    headers = config.setdefault("headers", {})
+    headers.setdefault("User-Agent", DEFAULT_USER_AGENT)
+
+    config.setdefault("cookies", {})
+    config.setdefault("auth", {"type": "none"})
+    config.setdefault("respect_robots", True)
+    config.setdefault("output", {})
+    config.setdefault("allowed_domains", [])
+    return config
+
+
+def compile_css(css):
+    # soupsieve comes with bs4; import it here so loading a config stays cheap.
+    import soupsieve
+
+    try:
+        return soupsieve.compile(css)
+    except soupsieve.SelectorSyntaxError as exc:
+        raise ValueError(f"Invalid CSS selector {css!r}: {exc}") from None
+
+
+def compile_selector(selector):
+    """Split ``css::modifier`` into a compiled pattern, an extraction kind and an attribute."""
+    css, _, modifier = selector.partition("::")
+    if modifier.startswith("attr("):
+        return compile_css(css), "attr", modifier[5:-1]
+    if modifier == "textlist":
+        return compile_css(css), "textlist", None
+    return compile_css(css), "text", None
+
+
+class ScrapePlan:
+    """Values the scraper reads on every page or request, computed once per config."""
+
+    def __init__(self, config):
+        # URL sources are compiled here but expanded lazily while crawling.
+        self.urls = UrlSources(config.get("urls"))
+        selectors = config.get("selectors") or {}
+        pagination = config.get("pagination") or {}
+        self.format = config.get("format", "html")
+        if self.format == "json":
+            # JSON sites skip HTML parsing: selectors are paths into the decoded payload.
+            self.item_selector = JsonPath(selectors.get("item", "$"))
+            self.fields = tuple(
+                (field, JsonPath(path), "json", None) for field, path in selectors.items() if field != "item"
+            )
+            next_path = pagination.get("next_selector") if pagination.get("type") == "next_link" else None
+            self.next_path = JsonPath(next_path) if next_path else None
+        else:
+            self.item_selector = compile_css(selectors["item"]) if selectors.get("item") else None
+            self.fields = tuple(
+                (field, *compile_selector(selector)) for field, selector in selectors.items() if field != "item"
+            )
+            self.next_path = None
+        self.cursor_path = JsonPath(pagination["cursor_path"]) if pagination.get("type") == "cursor" else None
+        self.follow = follow_options(config.get("follow"))
+        self.follow_fields = tuple(
+            (field, *compile_selector(selector)) for field, selector in (self.follow or {}).get("selectors", {}).items()
+        )
+        timeouts = config.get("timeouts") or {}
+        self.timeout = (timeouts.get("connect", 10), timeouts.get("read", 20))
+        self.headers = dict(config.get("headers") or {})
+        self.user_agent = self.headers.get("User-Agent", DEFAULT_USER_AGENT)
+        self.allowed_hosts = frozenset(
+            domain.split(":", 1)[0].lower() for domain in config.get("allowed_domains") or []
+        )
+        rate_limit = config.get("rate_limit") or {}
+        self.rps = max(float(rate_limit.get("rps", 1)), 0.0)
+        default_burst = max(1, int(self.rps)) if self.rps else 1
+        self.burst = rate_limit.get("burst", default_burst)
+        self.parse_workers = config.get("parse_workers", 1)
+
+    @classmethod
+    def for_config(cls, config):
+        plan = getattr(config, "plan", None)
+        return plan if plan is not None else cls(config)
+
+
+class CompiledConfig(_FrozenDict):
+    """A validated, defaulted and read-only site config.
+
+    Behaves like the mapping ``yaml.safe_load`` returned, so existing ``config.get``
+    call sites keep working, but nested values cannot be mutated and :attr:`plan`
+    carries the precomputed values the scraper's hot path needs. Use :meth:`replace`
+    to derive a modified copy.
+    """
+
+    def __init__(self, config):
+        super().__init__((key, freeze(value)) for key, value in config.items())
+        self.plan = ScrapePlan(self)
+
+    def replace(self, **changes):
+        config = thaw(self)
+        config.update(thaw(changes))
+        return CompiledConfig(config)
+
+    def to_dict(self):
+        return thaw(self)
 
 
 class ConfigLoader:
-    def __init__(self, validator=None):
+    """Validate, default and freeze site configs in a single parse.
+
+    Compiled configs are cached as JSON under ``cache_dir`` (``WS_CONFIG_CACHE_DIR``,
+    default ``~/.cache/web-to-sheets/configs``), keyed by a hash of the file contents
+    and the validator version, so unchanged configs skip YAML parsing and validation.
+    Pass ``cache_dir=False`` or set ``WS_CONFIG_CACHE_DIR=off`` to disable the cache.
+    """
+
+    def __init__(self, validator=None, cache_dir=None):
         self.validator = validator or SchemaValidator()
+        self.cache_dir = resolve_cache_dir(cache_dir)
 
     def load(self, config_path):
-        if not self.validator.is_valid(config_path):
-            raise ValueError(f"Invalid config: {self.validator.errors}")
+        try:
+            content = Path(config_path).read_bytes()
+        except FileNotFoundError:
+            errors = [f"Config file not found: {config_path}"]
+            raise ValueError(f"Invalid config: {errors}") from None
 
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
+        cache_key = self._cache_key(content)
+        cached = self._read_cache(cache_key)
+        if cached is not None:
+            return CompiledConfig(cached)
 
-        if not isinstance(config, dict):
-            raise ValueError("Invalid config: top-level YAML must be a mapping")
+        try:
+            config = yaml.safe_load(content)
+        except yaml.YAMLError as e:
+            errors = [f"YAML parse error: {e}"]
+            raise ValueError(f"Invalid config: {errors}") from None
 
-        # Apply defaults
-        rate_limit = config.setdefault("rate_limit", {})
-        rate_limit.setdefault("rps", 1)
-        rate_limit.setdefault("burst", 2)
+        errors = self.validator.validate_config(config)
+        if errors:
+            raise ValueError(f"Invalid config: {errors}")
 
-        timeouts = config.setdefault("timeouts", {})
-        timeouts.setdefault("connect", 10)
-        timeouts.setdefault("read", 20)
+        apply_defaults(config)
+        try:
+            compiled = CompiledConfig(config)
+        except ValueError as exc:
+            raise ValueError(f"Invalid config: {[str(exc)]}") from None
+        self._write_cache(cache_key, config)
+        return compiled
 
-        headers = config.setdefault("headers", {})
-        headers.setdefault("User-Agent", "web-to-sheets/0.1")
+    def _cache_key(self, content):
+        validator_version = getattr(self.validator, "VERSION", 0)
+        salt = f"{COMPILER_VERSION}:{type(self.validator).__qualname__}:{validator_version}\n"
+        return hashlib.sha256(salt.encode("utf-8") + content).hexdigest()
 
-        config.setdefault("cookies", {})
-        config.setdefault("auth", {"type": "none"})
-        config.setdefault("respect_robots", True)
-        config.setdefault("output", {})
-        config.setdefault("allowed_domains", [])
+    def _read_cache(self, cache_key):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self.cache_dir / f"{cache_key}.json", "r", encoding="utf-8") as handle:
+                config = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        return config if isinstance(config, dict) else None
 
-        return config
+    def _write_cache(self, cache_key, config):
+        if self.cache_dir is None:
+            return
+        try:
+            payload = json.dumps(config, ensure_ascii=False)
+        except (TypeError, ValueError):
+            payload = None
+        if payload is None or json.loads(payload) != config:
+            # YAML values without an exact JSON form (dates, non-string keys) are not cached.
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(payload)
+            os.replace(tmp_path, self.cache_dir / f"{cache_key}.json")
+        except OSError:
+            return
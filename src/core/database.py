@@ -1,48 +1,171 @@
 import hashlib
 import json
 import sqlite3
+import time
+from contextlib import closing
 from pathlib import Path
 
+SECONDS_PER_DAY = 86400
+
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+DEFAULT_BUSY_TIMEOUT = 30.0
+
 
 def _hash_dedupe_key(dedupe_key):
     normalized = json.dumps(dedupe_key, ensure_ascii=False, sort_keys=False, separators=(",", ":"))
     return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 
+def _expiry_cutoff(ttl_days, now=None):
+    return (now if now is not None else time.time()) - float(ttl_days) * SECONDS_PER_DAY
+
+
+def _classify(key_hashes, fingerprints, lookup):
+    """Statuses ``claim`` would return; ``lookup(key_hash)`` gives ``(fingerprint,)`` or None."""
+    key_hashes = list(key_hashes)
+    if fingerprints is None:
+        fingerprints = [None] * len(key_hashes)
+    statuses = []
+    batch = {}
+    for key_hash, fingerprint in zip(key_hashes, fingerprints, strict=True):
+        if key_hash in batch:
+            stored = (batch[key_hash],)
+        else:
+            stored = lookup(key_hash)
+        if fingerprint is not None or key_hash not in batch:
+            batch[key_hash] = fingerprint if stored is None or fingerprint is not None else stored[0]
+        if stored is None:
+            statuses.append(NEW)
+        elif fingerprint is None or stored[0] is None or stored[0] == fingerprint:
+            statuses.append(UNCHANGED)
+        else:
+            statuses.append(CHANGED)
+    return statuses
+
+
 class InMemoryDedupeDB:
     """Ephemeral dedupe store for demo mode and tests."""
 
     def __init__(self):
+        # site -> key_hash -> [first_seen, last_seen, fingerprint]
         self._seen = {}
 
     def is_deduped(self, site, dedupe_key):
         key_hash = _hash_dedupe_key(dedupe_key)
-        return key_hash in self._seen.get(site, set())
+        return key_hash in self._seen.get(site, {})
 
     def mark_deduped(self, site, dedupe_key):
         key_hash = _hash_dedupe_key(dedupe_key)
-        self._seen.setdefault(site, set()).add(key_hash)
+        now = time.time()
+        entry = self._seen.setdefault(site, {}).setdefault(key_hash, [now, now, None])
+        entry[1] = now
+
+    def claim(self, site, dedupe_keys, min_new=0, fingerprints=None, journal=None):
+        now = time.time()
+        site_keys = self._seen.setdefault(site, {})
+        if fingerprints is None:
+            fingerprints = [None] * len(dedupe_keys)
+        snapshot = {key_hash: list(entry) for key_hash, entry in site_keys.items()}
+        statuses = []
+        for dedupe_key, fingerprint in zip(dedupe_keys, fingerprints, strict=True):
+            key_hash = _hash_dedupe_key(dedupe_key)
+            entry = site_keys.get(key_hash)
+            if entry is None:
+                site_keys[key_hash] = [now, now, fingerprint]
+                statuses.append(NEW)
+                continue
+            previous = entry[2]
+            entry[1] = now
+            if fingerprint is None:
+                statuses.append(UNCHANGED)
+                continue
+            entry[2] = fingerprint
+            statuses.append(CHANGED if previous is not None and previous != fingerprint else UNCHANGED)
+        if sum(status != UNCHANGED for status in statuses) < min_new:
+            self._seen[site] = snapshot
+        elif journal is not None:
+            journal(None, statuses)
+        return statuses
+
+    def classify(self, site, dedupe_keys, fingerprints=None):
+        site_keys = self._seen.get(site, {})
+        return _classify(
+            (_hash_dedupe_key(dedupe_key) for dedupe_key in dedupe_keys),
+            fingerprints,
+            lambda key_hash: (site_keys[key_hash][2],) if key_hash in site_keys else None,
+        )
+
+    def expire(self, site, ttl_days):
+        cutoff = _expiry_cutoff(ttl_days)
+        site_keys = self._seen.get(site, {})
+        expired = [key_hash for key_hash, entry in site_keys.items() if entry[1] < cutoff]
+        for key_hash in expired:
+            del site_keys[key_hash]
+        return len(expired)
+
+    def stats(self):
+        return [
+            {
+                "site": site,
+                "keys": len(keys),
+                "first_seen": min((entry[0] for entry in keys.values()), default=None),
+                "last_seen": max((entry[1] for entry in keys.values()), default=None),
+            }
+            for site, keys in sorted(self._seen.items())
+        ]
 
 
 class DedupeDB:
-    def __init__(self, db_path="dedupe.db"):
+    def __init__(self, db_path="dedupe.db", busy_timeout=DEFAULT_BUSY_TIMEOUT):
         self.db_path = Path(db_path).expanduser()
+        self.busy_timeout = busy_timeout
         self.init_db()
 
+    def _connect(self):
+        # The busy timeout makes concurrent runs queue for the write lock instead of
+        # failing immediately with "database is locked".
+        return sqlite3.connect(str(self.db_path), timeout=self.busy_timeout)
+
     def init_db(self):
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        with sqlite3.connect(str(self.db_path)) as conn:
+        with self._connect() as conn:
+            # WAL lets readers (is_deduped, stats) proceed while another run holds the write lock.
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS deduped (
                     site TEXT,
                     key_hash TEXT,
+                    first_seen INTEGER,
+                    last_seen INTEGER,
+                    fingerprint TEXT,
                     PRIMARY KEY (site, key_hash)
                 )
             """)
+            self._migrate(conn)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS deduped_site_last_seen ON deduped (site, last_seen)"
+            )
+
+    @staticmethod
+    def _migrate(conn):
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(deduped)")}
+        if "fingerprint" not in columns:
+            conn.execute("ALTER TABLE deduped ADD COLUMN fingerprint TEXT")
+        if {"first_seen", "last_seen"} <= columns:
+            return
+        # Databases created before key expiry existed have no timestamps. Treat their
+        # keys as seen now so they get one full TTL window before becoming eligible.
+        now = int(time.time())
+        for column in ("first_seen", "last_seen"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE deduped ADD COLUMN {column} INTEGER")
+                conn.execute(f"UPDATE deduped SET {column} = ? WHERE {column} IS NULL", (now,))
 
     def is_deduped(self, site, dedupe_key):
         key_hash = _hash_dedupe_key(dedupe_key)
-        with sqlite3.connect(str(self.db_path)) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT 1 FROM deduped WHERE site = ? AND key_hash = ?",
@@ -52,8 +175,149 @@ class DedupeDB:
 
     def mark_deduped(self, site, dedupe_key):
         key_hash = _hash_dedupe_key(dedupe_key)
-        with sqlite3.connect(str(self.db_path)) as conn:
+        now = int(time.time())
+        with self._connect() as conn:
             conn.execute(
-                "INSERT OR IGNORE INTO deduped (site, key_hash) VALUES (?, ?)",
-                (site, key_hash),
+                """
+                INSERT INTO deduped (site, key_hash, first_seen, last_seen) VALUES (?, ?, ?, ?)
+                ON CONFLICT (site, key_hash) DO UPDATE SET last_seen = excluded.last_seen
+                """,
+                (site, key_hash, now, now),
+            )
+
+    def claim(self, site, dedupe_keys, min_new=0, fingerprints=None, journal=None):
+        """Atomically claim ``dedupe_keys`` and classify each one.
+
+        Returns one status per key: ``NEW`` when the key was inserted by this call,
+        ``CHANGED`` when it already existed with a different fingerprint (only reported
+        when ``fingerprints`` are given), and ``UNCHANGED`` otherwise, including repeats
+        earlier in the same call. Existing keys get their ``last_seen`` refreshed and
+        their fingerprint updated. Everything runs in one ``BEGIN IMMEDIATE``
+        transaction, so two overlapping runs can never both claim the same key or
+        change. When fewer than ``min_new`` keys are new or changed the transaction is
+        rolled back, leaving the store untouched, and the caller reports the shortfall.
+
+        ``journal(conn, statuses)`` runs inside the transaction just before it commits,
+        so callers can record what the claimed rows owe (e.g. an export outbox entry)
+        atomically with the claim.
+        """
+        key_hashes = [_hash_dedupe_key(dedupe_key) for dedupe_key in dedupe_keys]
+        if fingerprints is None:
+            fingerprints = [None] * len(key_hashes)
+        now = int(time.time())
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                statuses = [
+                    self._claim_one(conn, site, key_hash, fingerprint, now)
+                    for key_hash, fingerprint in zip(key_hashes, fingerprints, strict=True)
+                ]
+                claimed = sum(status != UNCHANGED for status in statuses)
+                if claimed >= min_new and journal is not None:
+                    journal(conn, statuses)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT" if claimed >= min_new else "ROLLBACK")
+            return statuses
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _claim_one(conn, site, key_hash, fingerprint, now):
+        cursor = conn.execute(
+            """
+            INSERT INTO deduped (site, key_hash, first_seen, last_seen, fingerprint)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (site, key_hash) DO NOTHING
+            """,
+            (site, key_hash, now, now, fingerprint),
+        )
+        if cursor.rowcount == 1:
+            return NEW
+
+        if fingerprint is None:
+            conn.execute(
+                "UPDATE deduped SET last_seen = ? WHERE site = ? AND key_hash = ?",
+                (now, site, key_hash),
             )
+            return UNCHANGED
+
+        (previous,) = conn.execute(
+            "SELECT fingerprint FROM deduped WHERE site = ? AND key_hash = ?",
+            (site, key_hash),
+        ).fetchone()
+        conn.execute(
+            "UPDATE deduped SET last_seen = ?, fingerprint = ? WHERE site = ? AND key_hash = ?",
+            (now, fingerprint, site, key_hash),
+        )
+        # Keys stored before change tracking was enabled have no fingerprint yet; adopt
+        # the current one silently rather than reporting every existing row as changed.
+        return CHANGED if previous is not None and previous != fingerprint else UNCHANGED
+
+    def classify(self, site, dedupe_keys, fingerprints=None):
+        """Return the statuses :meth:`claim` would report, without recording anything."""
+        with self._connect() as conn:
+
+            def lookup(key_hash):
+                return conn.execute(
+                    "SELECT fingerprint FROM deduped WHERE site = ? AND key_hash = ?",
+                    (site, key_hash),
+                ).fetchone()
+
+            return _classify(
+                (_hash_dedupe_key(dedupe_key) for dedupe_key in dedupe_keys), fingerprints, lookup
+            )
+
+    def expire(self, site, ttl_days):
+        """Delete keys for ``site`` not seen within ``ttl_days``; returns the number removed."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM deduped WHERE site = ? AND last_seen < ?",
+                (site, int(_expiry_cutoff(ttl_days))),
+            )
+            return cursor.rowcount
+
+    def vacuum(self):
+        conn = self._connect()
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+    def stats(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT site, COUNT(*), MIN(first_seen), MAX(last_seen)
+                FROM deduped GROUP BY site ORDER BY site
+                """
+            ).fetchall()
+        return [
+            {"site": site, "keys": count, "first_seen": first_seen, "last_seen": last_seen}
+            for site, count, first_seen, last_seen in rows
+        ]
+
+    def size_bytes(self):
+        return self.db_path.stat().st_size if self.db_path.exists() else 0
+
+    def dedupe_table_bytes(self):
+        """Bytes used by the ``deduped`` table and its indexes, or None without ``dbstat``.
+
+        The file also holds export journals, sheet indexes, checkpoints and caches, so
+        its total size overstates what the dedupe keys take.
+        """
+        try:
+            with closing(self._connect()) as conn:
+                (size,) = conn.execute(
+                    """
+                    SELECT SUM(pgsize) FROM dbstat
+                    WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name = 'deduped')
+                    """
+                ).fetchone()
+        except sqlite3.OperationalError:
+            # SQLite builds without SQLITE_ENABLE_DBSTAT_VTAB have no dbstat table.
+            return None
+        return size or 0
@@ -0,0 +1,217 @@
+"""Detail-page follow: fetch each item's linked page and merge its fields into the item."""
+import hashlib
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from urllib.parse import urljoin
+
+from .database import DEFAULT_BUSY_TIMEOUT
+from .schedule import parse_interval
+from .transforms import TransformPipeline
+
+DEFAULT_FOLLOW_WORKERS = 4
+DEFAULT_FOLLOW_CACHE_TTL = "1d"
+# SQLite caps bound parameters per statement; stay well below the default limit.
+_SQL_CHUNK = 500
+
+
+def follow_options(value):
+    """Normalise a config's ``follow`` section; None when it is absent.
+
+    ``{field, selectors, workers: 4, cache_ttl: 1d}``: ``field`` names the item field
+    holding the link and ``selectors`` maps new field names to selectors applied to
+    the whole linked page. ``cache_ttl: 0`` turns off the cross-run cache. Raises
+    ValueError for malformed sections.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, dict):
+        raise ValueError("follow must be a mapping with field and selectors")
+    unknown = set(value) - {"field", "selectors", "workers", "cache_ttl"}
+    if unknown:
+        raise ValueError(f"follow has unknown keys: {', '.join(sorted(map(str, unknown)))}")
+    field = value.get("field")
+    if not isinstance(field, str) or not field.strip():
+        raise ValueError("follow.field must name the item field holding the link")
+    selectors = value.get("selectors")
+    if not isinstance(selectors, dict) or not selectors:
+        raise ValueError("follow.selectors must be a non-empty mapping of field names to selectors")
+    if "item" in selectors:
+        raise ValueError("follow.selectors apply to the whole linked page and cannot include 'item'")
+    if any(not isinstance(key, str) or not key.strip() for key in selectors) or any(
+        not isinstance(selector, str) or not selector.strip() for selector in selectors.values()
+    ):
+        raise ValueError("follow.selectors must map non-empty field names to non-empty CSS selector strings")
+    workers = value.get("workers", DEFAULT_FOLLOW_WORKERS)
+    if isinstance(workers, bool) or not isinstance(workers, int) or workers < 1:
+        raise ValueError("follow.workers must be an integer >= 1")
+    cache_ttl = value.get("cache_ttl", DEFAULT_FOLLOW_CACHE_TTL)
+    if cache_ttl == 0:
+        ttl = None
+    else:
+        try:
+            ttl = parse_interval(cache_ttl)
+        except ValueError:
+            raise ValueError("follow.cache_ttl must be a duration like '12h' or 0 to disable the cache") from None
+    return {"field": field, "selectors": dict(selectors), "workers": workers, "cache_ttl": ttl}
+
+
+def selectors_fingerprint(selectors):
+    payload = json.dumps(selectors, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class FollowCache:
+    """Fields extracted from detail pages, cached across runs in the dedupe database.
+
+    Entries are keyed by site and URL and tagged with a fingerprint of the follow
+    selectors, so editing the selectors invalidates them.
+    """
+
+    def __init__(self, db_path="dedupe.db", busy_timeout=DEFAULT_BUSY_TIMEOUT):
+        self.db_path = Path(db_path).expanduser()
+        self.busy_timeout = busy_timeout
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(str(self.db_path), timeout=self.busy_timeout)
+
+    def init_db(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS follow_cache (
+                    site TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    selectors_hash TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    fields_json TEXT NOT NULL,
+                    PRIMARY KEY (site, url)
+                ) WITHOUT ROWID
+            """)
+
+    def get_many(self, site, urls, selectors_hash, max_age, now=None):
+        """Return ``{url: fields}`` for cached pages fetched less than ``max_age`` seconds ago."""
+        urls = list(urls)
+        cutoff = (now if now is not None else time.time()) - max_age
+        found = {}
+        with closing(self._connect()) as conn:
+            for start in range(0, len(urls), _SQL_CHUNK):
+                chunk = urls[start:start + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"""
+                    SELECT url, fields_json FROM follow_cache
+                    WHERE site = ? AND selectors_hash = ? AND fetched_at >= ? AND url IN ({placeholders})
+                    """,
+                    (site, selectors_hash, cutoff, *chunk),
+                )
+                found.update((url, json.loads(fields_json)) for url, fields_json in rows)
+        return found
+
+    def put_many(self, site, selectors_hash, pages, now=None):
+        """Cache ``{url: fields}`` for ``site``."""
+        fetched_at = now if now is not None else time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO follow_cache (site, url, selectors_hash, fetched_at, fields_json)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    (site, url, selectors_hash, fetched_at, json.dumps(fields, ensure_ascii=False))
+                    for url, fields in pages.items()
+                ),
+            )
+
+
+class DetailFollower:
+    """Fetch the page each item links to and merge the extracted fields into the item.
+
+    Links are resolved against the listing page URL. Each URL is fetched at most once
+    per run; pages are fetched ``workers`` at a time through the scraper's rate
+    limiter and, with a :class:`FollowCache`, reused across runs until they are older
+    than ``cache_ttl``. Items the dedupe store has already seen are not followed
+    unless ``delta_export`` needs their detail fields to detect changes.
+    """
+
+    def __init__(self, scraper, options, cache=None):
+        self.scraper = scraper
+        self.logger = scraper.logger
+        self.site = scraper.config.get("name", "")
+        self.link_field = options["field"]
+        self.workers = options["workers"]
+        self.cache_ttl = options["cache_ttl"]
+        self.cache = cache if self.cache_ttl is not None else None
+        self.selectors_hash = selectors_fingerprint(options["selectors"])
+        self.follow_seen = bool(scraper.config.get("delta_export"))
+        transforms = scraper.config.get("transforms") or {}
+        # The scraper's own pipeline runs before the detail fields exist; these run after.
+        self.transforms = TransformPipeline(
+            {column: specs for column, specs in transforms.items() if column in options["selectors"]}
+        )
+        self.pages = {}
+        self.stats = {"fetched": 0, "cached": 0, "failed": 0}
+
+    def enrich(self, items, page_url, seen=None):
+        """Merge detail fields into ``items`` (in place) and return them.
+
+        ``seen`` holds the scraper's ``seen_check`` flags for ``items``; flagged items are
+        not followed.
+        """
+        if seen is None:
+            seen = [False] * len(items)
+        linked = [item for item, flag in zip(items, seen, strict=True) if item.get(self.link_field) and not flag]
+        targets = [(item, urljoin(page_url, item[self.link_field])) for item in linked]
+        if not targets:
+            return items
+
+        missing = list(dict.fromkeys(url for _, url in targets if url not in self.pages))
+        if missing and self.cache is not None:
+            cached = self.cache.get_many(self.site, missing, self.selectors_hash, self.cache_ttl)
+            self.pages.update(cached)
+            self.stats["cached"] += len(cached)
+            missing = [url for url in missing if url not in cached]
+        if missing:
+            fetched = self._fetch_all(missing)
+            self.pages.update(fetched)
+            fresh = {url: fields for url, fields in fetched.items() if fields is not None}
+            if fresh and self.cache is not None:
+                self.cache.put_many(self.site, self.selectors_hash, fresh)
+
+        enriched = []
+        for item, url in targets:
+            fields = self.pages.get(url)
+            if fields:
+                for field, value in fields.items():
+                    item[field] = value
+                enriched.append(item)
+        if enriched and self.transforms:
+            self.transforms.apply(enriched)
+        return items
+
+    def _fetch_all(self, urls):
+        if len(urls) == 1 or self.workers == 1:
+            pages = {url: self._fetch_one(url) for url in urls}
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(urls)), thread_name_prefix="ws-follow") as pool:
+                pages = dict(zip(urls, pool.map(self._fetch_one, urls), strict=True))
+        failed = sum(1 for fields in pages.values() if fields is None)
+        self.stats["fetched"] += len(pages) - failed
+        self.stats["failed"] += failed
+        return pages
+
+    def _fetch_one(self, url):
+        if not self.scraper._is_url_allowed(url, quiet=True):
+            return None
+        try:
+            self.scraper.rate_limit()
+            response = self.scraper.fetch(url)
+        except Exception as exc:
+            self.logger.error(f"Failed to fetch detail page {url}: {exc}")
+            return None
+        return self.scraper.parse_detail(response)
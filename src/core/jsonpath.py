@@ -0,0 +1,104 @@
+"""Dotted-path lookups for ``format: json`` sites."""
+import json
+import re
+
+MISSING = object()
+WILDCARD = "*"
+_BRACKET = re.compile(r"\[(\*|-?\d+)\]")
+
+
+def _parse(expression):
+    text = expression.strip()
+    if text.startswith("$"):
+        text = text[1:]
+    text = _BRACKET.sub(r".\1", text).strip(".")
+    if not text:
+        return ()
+    segments = []
+    for part in text.split("."):
+        if not part:
+            raise ValueError(f"Invalid JSON path {expression!r}: empty segment")
+        if part == WILDCARD:
+            segments.append(WILDCARD)
+        elif part.lstrip("-").isdigit():
+            segments.append(int(part))
+        else:
+            segments.append(part)
+    return tuple(segments)
+
+
+class JsonPath:
+    """A compiled path such as ``data.items``, ``$.results[0].id`` or ``tags.*.name``.
+
+    Segments are object keys, list indexes (negative counts from the end) or ``*``
+    for every element of a list or object. An empty path (``""`` or ``$``) is the
+    document itself.
+    """
+
+    def __init__(self, expression):
+        if not isinstance(expression, str):
+            raise ValueError(f"JSON path must be a string: {expression!r}")
+        self.expression = expression
+        self.segments = _parse(expression)
+        self.wildcard = WILDCARD in self.segments
+
+    def first(self, document, default=MISSING):
+        """Return the value at this path, or ``default``; ``*`` takes the first match."""
+        if not self.wildcard:
+            value = document
+            for segment in self.segments:
+                if isinstance(segment, int):
+                    if not isinstance(value, list) or not -len(value) <= segment < len(value):
+                        return default
+                    value = value[segment]
+                elif isinstance(value, dict) and segment in value:
+                    value = value[segment]
+                else:
+                    return default
+            return value
+        matches = self.find(document)
+        return matches[0] if matches else default
+
+    def find(self, document):
+        """Return every value this path matches."""
+        values = [document]
+        for segment in self.segments:
+            found = []
+            for value in values:
+                if segment == WILDCARD:
+                    if isinstance(value, list):
+                        found.extend(value)
+                    elif isinstance(value, dict):
+                        found.extend(value.values())
+                elif isinstance(segment, int):
+                    if isinstance(value, list) and -len(value) <= segment < len(value):
+                        found.append(value[segment])
+                elif isinstance(value, dict) and segment in value:
+                    found.append(value[segment])
+            values = found
+        return values
+
+    def items(self, document):
+        """Return the records at this path: a list's elements, or a single object."""
+        if self.wildcard:
+            return self.find(document)
+        value = self.first(document, None)
+        if value is None:
+            return []
+        return value if isinstance(value, list) else [value]
+
+    def value(self, document):
+        """Return a field value: scalars as-is, ``*`` matches joined like ``::textlist``.
+
+        Nested objects and lists are kept as compact JSON text so every sink can
+        write them; missing keys and nulls return :data:`MISSING`.
+        """
+        if self.wildcard:
+            texts = [str(match) for match in self.find(document) if match is not None and match != ""]
+            return ", ".join(texts) if texts else MISSING
+        value = self.first(document, None)
+        if value is None:
+            return MISSING
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        return value
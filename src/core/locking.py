@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+
+try:  # pragma: no cover - platform specific
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+class SiteLockedError(RuntimeError):
+    """Raised when another process already holds a site's run lock."""
+
+
+class SiteRunLock:
+    """Advisory per-site lock preventing overlapping runs of the same site.
+
+    The lock is an OS-level file lock, so it is released automatically when the
+    holding process exits or crashes; the lock file itself is left in place.
+    """
+
+    def __init__(self, lock_dir, site):
+        self.site = site
+        self.path = Path(lock_dir).expanduser() / f"{site}.lock"
+        self._handle = None
+
+    @classmethod
+    def for_dedupe_db(cls, db_path, site):
+        return cls(Path(db_path).expanduser().parent / ".locks", site)
+
+    def acquire(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:  # pragma: no cover - Windows
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError as exc:
+            handle.close()
+            raise SiteLockedError(f"Another run of site '{self.site}' is in progress") from exc
+
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._handle = handle
+
+    def release(self):
+        if self._handle is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                self._handle.seek(0)
+                msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.release()
@@ -0,0 +1,144 @@
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from .database import DEFAULT_BUSY_TIMEOUT
+
+
+class ExportOutbox:
+    """Write-ahead journal of row batches still owed to Google Sheets.
+
+    Stored in the dedupe database. A batch is journaled inside the same transaction
+    that claims its dedupe keys (see ``DedupeDB.claim(journal=...)``), so a key is
+    never marked exported without its row being recorded somewhere. Batches stay
+    pending until the exporter confirms them; ``rows_done`` remembers how far a
+    partially written batch got so ``ws export --replay`` resumes without
+    duplicating appended rows.
+    """
+
+    def __init__(self, db_path="dedupe.db", busy_timeout=DEFAULT_BUSY_TIMEOUT):
+        self.db_path = Path(db_path).expanduser()
+        self.busy_timeout = busy_timeout
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(str(self.db_path), timeout=self.busy_timeout)
+
+    def init_db(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS export_outbox (
+                    batch_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    site TEXT NOT NULL,
+                    run_id TEXT,
+                    created_at INTEGER,
+                    rows_json TEXT NOT NULL,
+                    rows_done INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS export_outbox_site ON export_outbox (site, batch_id)")
+
+    def record(self, site, run_id, rows, conn=None):
+        """Journal ``rows`` as pending and return the batch id.
+
+        Pass ``conn`` to write inside a caller's open transaction.
+        """
+        payload = json.dumps([dict(row) for row in rows], ensure_ascii=False, default=str)
+        params = (site, run_id, int(time.time()), payload)
+        sql = "INSERT INTO export_outbox (site, run_id, created_at, rows_json) VALUES (?, ?, ?, ?)"
+        if conn is not None:
+            return conn.execute(sql, params).lastrowid
+        with self._connect() as own_conn:
+            return own_conn.execute(sql, params).lastrowid
+
+    def ack(self, batch_ids):
+        """Drop batches the exporter has fully written."""
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM export_outbox WHERE batch_id = ?", ((batch_id,) for batch_id in batch_ids)
+            )
+
+    def mark_failed(self, batch_id, rows_done, error):
+        with self._connect() as conn:
+            conn.execute(
+                """
+                UPDATE export_outbox
+                SET rows_done = MAX(rows_done, ?), attempts = attempts + 1, last_error = ?
+                WHERE batch_id = ?
+                """,
+                (rows_done, str(error), batch_id),
+            )
+
+    def pending(self, site=None):
+        query = """
+            SELECT batch_id, site, run_id, created_at, rows_json, rows_done, attempts, last_error
+            FROM export_outbox
+        """
+        params = ()
+        if site is not None:
+            query += " WHERE site = ?"
+            params = (site,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY batch_id", params).fetchall()
+        return [
+            {
+                "batch_id": batch_id,
+                "site": site_name,
+                "run_id": run_id,
+                "created_at": created_at,
+                "rows": json.loads(rows_json),
+                "rows_done": rows_done,
+                "attempts": attempts,
+                "last_error": last_error,
+            }
+            for batch_id, site_name, run_id, created_at, rows_json, rows_done, attempts, last_error in rows
+        ]
+
+    def rows_done(self, batch_id):
+        """Return how many rows of a pending batch are written, or None once it is acknowledged."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT rows_done FROM export_outbox WHERE batch_id = ?", (batch_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def count(self, site=None):
+        query = "SELECT COUNT(*) FROM export_outbox"
+        params = ()
+        if site is not None:
+            query += " WHERE site = ?"
+            params = (site,)
+        with self._connect() as conn:
+            (total,) = conn.execute(query, params).fetchone()
+        return total
+
+    def deliver(self, exporter, rows, batches):
+        """Export ``rows`` and settle the journaled ``batches`` they came from.
+
+        ``batches`` lists ``(batch_id, start, count)``: ``rows`` is the concatenation of
+        each batch's stored rows from ``start`` onwards. Fully written batches are
+        acknowledged; the rest record how far they got. Returns True when every batch
+        was acknowledged.
+        """
+        if not rows:
+            self.ack([batch_id for batch_id, _, _ in batches])
+            return True
+        exporter.export(rows)
+        if exporter.complete:
+            self.ack([batch_id for batch_id, _, _ in batches])
+            return True
+
+        confirmed = exporter.rows_confirmed
+        error = exporter.last_error or "export incomplete"
+        done = []
+        for batch_id, start, count in batches:
+            if confirmed >= count:
+                done.append(batch_id)
+            else:
+                self.mark_failed(batch_id, start + confirmed, error)
+            confirmed = max(confirmed - count, 0)
+        self.ack(done)
+        return False
@@ -0,0 +1,136 @@
+"""Page parsing and extraction, runnable in the scraper's process or in a worker pool."""
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from .config import ScrapePlan, thaw
+from .jsonpath import MISSING
+from .records import record_type_for
+
+# The parser each ``parse_workers`` process builds once from the site config.
+_worker_parser = None
+
+
+class PageParser:
+    """The CPU-bound half of scraping a page: decode it, extract the items, find the next page.
+
+    It needs only the site config, so :func:`init_parse_worker` can rebuild it in each
+    worker process and pages are shipped to the pool as raw bodies.
+    """
+
+    def __init__(self, config):
+        self.plan = ScrapePlan.for_config(config)
+        self.record_type = record_type_for(config)
+        self.pagination = config.get("pagination") or {}
+
+    def body(self, response):
+        """Return what a worker needs of ``response``: raw bytes for JSON, decoded text for HTML."""
+        if self.plan.format == "json":
+            content = getattr(response, "content", None)
+            return content if content is not None else response.text
+        return response.text
+
+    def parse_document(self, body):
+        if self.plan.format == "json":
+            return json.loads(body)
+        return BeautifulSoup(body, "html.parser")
+
+    def parse(self, body, url):
+        """Return ``(items, next_hint)`` for a page body fetched from ``url``."""
+        document = self.parse_document(body)
+        return self.extract_items(document), self.next_hint(document, url)
+
+    def parse_detail(self, body):
+        """Return the ``follow`` fields extracted from a detail page body."""
+        return self.extract_fields(BeautifulSoup(body, "html.parser"), self.plan.follow_fields, {})
+
+    def extract_items(self, document):
+        if self.plan.format == "json":
+            return self.extract_json_items(document)
+        items = []
+        containers = document.select(self.plan.item_selector)
+        for container in containers:
+            item = self.extract_fields(container, self.plan.fields, self.record_type())
+            if item:
+                items.append(item)
+        return items
+
+    def extract_json_items(self, document):
+        items = []
+        fields = self.plan.fields
+        for record in self.plan.item_selector.items(document):
+            item = self.record_type()
+            for field, path, _, _ in fields:
+                value = path.value(record)
+                if value is not MISSING:
+                    item[field] = value
+            if item:
+                items.append(item)
+        return items
+
+    @staticmethod
+    def extract_fields(container, fields, item):
+        """Fill ``item`` from compiled ``(field, pattern, kind, attr)`` selectors matched in ``container``."""
+        for field, pattern, kind, attr_name in fields:
+            elements = container.select(pattern)
+            if elements:
+                if kind == "attr":
+                    item[field] = elements[0].get(attr_name)
+                elif kind == "textlist":
+                    texts = [element.get_text(strip=True) for element in elements if element.get_text(strip=True)]
+                    item[field] = ", ".join(texts)
+                else:
+                    item[field] = elements[0].get_text(strip=True)
+        return item
+
+    def next_hint(self, document, current_url):
+        """Return what the page says about the next one: a URL for next_link, a token for cursor."""
+        pagination_type = self.pagination.get("type")
+        if pagination_type == "next_link":
+            return self.get_next_url(document, current_url)
+        if pagination_type == "cursor":
+            token = self.plan.cursor_path.first(document, None)
+            return None if token is None or token is False or token == "" else token
+        return None
+
+    def get_next_url(self, document, current_url):
+        if self.plan.next_path is not None:
+            href = self.plan.next_path.first(document, None)
+            return urljoin(current_url, href) if isinstance(href, str) and href else None
+        next_link = document.select_one(self.pagination.get("next_selector", ""))
+        if not next_link:
+            return None
+        href = next_link.get("href")
+        if not href:
+            return None
+        return urljoin(current_url, href)
+
+
+def start_parse_pool(config, workers):
+    """Return a pool of ``workers`` processes, each holding a :class:`PageParser` for ``config``.
+
+    Workers are spawned rather than forked: the parent is threaded (fetch threads,
+    ``ws serve`` workers) and a forked child can inherit a lock some other thread held.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_parse_worker,
+        initargs=(thaw(config),),
+    )
+
+
+def init_parse_worker(config):
+    global _worker_parser
+    _worker_parser = PageParser(config)
+
+
+def parse_in_worker(body, url):
+    return _worker_parser.parse(body, url)
+
+
+def parse_detail_in_worker(body):
+    return _worker_parser.parse_detail(body)
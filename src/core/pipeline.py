@@ -0,0 +1,153 @@
+import queue
+import threading
+
+from .sinks import build_sink
+
+DEFAULT_QUEUE_BATCHES = 8
+DEFAULT_FLUSH_ROWS = 500
+_DONE = object()
+
+
+def pipeline_enabled(config):
+    sheets_cfg = (config.get('output') or {}).get('sheets') or {}
+    return bool(sheets_cfg.get('pipeline'))
+
+
+class ExportPipeline:
+    """Dedupe scraped batches as they arrive and export them on a background thread.
+
+    Batches are claimed on the scraping thread and handed through a bounded queue
+    (``output.sheets.queue_batches``) to a single exporter thread that writes the file
+    sink and Google Sheets, so export round trips overlap with fetching. A full queue
+    makes the scraper wait rather than buffer without limit.
+
+    ``min_rows`` is honoured by holding the first flush: until enough rows qualify,
+    batches are only classified against the dedupe store and buffered, then claimed
+    together. If the threshold is never reached the buffer goes through
+    :meth:`DataProcessor.process`, which reports the shortfall as a normal run would.
+    """
+
+    def __init__(self, processor, exporter=None, logger=None, queue_batches=None):
+        sheets_cfg = (processor.config.get('output') or {}).get('sheets') or {}
+        self.processor = processor
+        self.exporter = exporter
+        self.logger = logger or processor.logger
+        self.queue = queue.Queue(maxsize=queue_batches or sheets_cfg.get('queue_batches', DEFAULT_QUEUE_BATCHES))
+        self.flush_rows = getattr(exporter, 'chunk_rows', None) or DEFAULT_FLUSH_ROWS
+        self.exported = []
+        # Journaled batches Sheets did not fully confirm; they stay in the outbox.
+        self.undelivered = 0
+        self._sink = None
+        self._thread = None
+        self._error = None
+
+    def run(self, batches):
+        """Consume ``batches`` and return every exported row once the queue has drained."""
+        min_rows = self.processor.config['min_rows']
+        held = []
+        pending = 0
+        flowing = False
+        try:
+            for batch in batches:
+                if not batch:
+                    continue
+                if flowing:
+                    self._put(self.processor.claim(batch))
+                    continue
+                held.extend(batch)
+                pending += self.processor.count_pending(batch)
+                if pending < min_rows:
+                    continue
+                claimed = self.processor.claim(held, min_new=min_rows)
+                if len(claimed) < min_rows:
+                    # Rows repeated across batches were counted twice; keep holding.
+                    pending = len(claimed)
+                    continue
+                held = []
+                flowing = True
+                self.logger.info(f"Reached min_rows={min_rows}; exporting while scraping continues")
+                self._put(claimed)
+        except BaseException:
+            self._drain(raise_errors=False)
+            raise
+        self._drain()
+
+        if not flowing:
+            processed = self.processor.process(held)
+            if processed and self.exporter is not None:
+                self._send(processed, self._journaled(processed))
+            return processed
+        self.processor.finish()
+        return self.exported
+
+    def _put(self, rows):
+        if self._error is not None:
+            raise self._error
+        if not rows:
+            return
+        batches = self._journaled(rows)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._consume, name='sheets-export', daemon=True)
+            self._thread.start()
+        self.queue.put((rows, batches))
+
+    def _consume(self):
+        while True:
+            item = self.queue.get()
+            if item is _DONE:
+                return
+            rows, batches = list(item[0]), list(item[1])
+            done = False
+            # Merge batches that queued up while the last export ran into one request.
+            while len(rows) < self.flush_rows:
+                try:
+                    more = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is _DONE:
+                    done = True
+                    break
+                rows.extend(more[0])
+                batches.extend(more[1])
+            if self._error is None:
+                try:
+                    self._export(rows, batches)
+                except Exception as exc:
+                    # Keep draining so the producer never blocks on a full queue.
+                    self._error = exc
+            if done:
+                return
+
+    def _export(self, rows, batches):
+        if self._sink is None:
+            self._sink = build_sink(self.processor.config, self.logger, run_id=self.processor.run_id)
+        self._sink.write(rows)
+        if self.exporter is not None:
+            self._send(rows, batches)
+        self.exported.extend(rows)
+
+    def _journaled(self, rows):
+        batch_id = self.processor.last_journal_id
+        return [(batch_id, 0, len(rows))] if batch_id is not None else []
+
+    def _send(self, rows, batches):
+        outbox = self.processor.outbox
+        if outbox is not None and batches:
+            if not outbox.deliver(self.exporter, rows, batches):
+                self.undelivered += len(batches)
+        else:
+            self.exporter.export(rows)
+
+    def _drain(self, raise_errors=True):
+        if self._thread is not None:
+            self.queue.put(_DONE)
+            self._thread.join()
+            self._thread = None
+        if self._sink is not None:
+            if self._error is None:
+                self._sink.close()
+            else:
+                self._sink.abort()
+            self._sink = None
+        if raise_errors and self._error is not None:
+            raise self._error
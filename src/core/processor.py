@@ -1,78 +1,170 @@
-import csv
+import hashlib
+import json
 import os
 from pathlib import Path
 
-from .database import DedupeDB, InMemoryDedupeDB
+from .database import UNCHANGED, DedupeDB, InMemoryDedupeDB
+from .records import DEFAULT_CHANGE_COLUMN
+from .sinks import build_sink
+
+
+def resolve_dedupe_db_path(config):
+    return config.get("dedupe_db_path") or os.getenv("DEDUPE_DB_PATH", "dedupe.db")
 
 
 class DataProcessor:
-    def __init__(self, config, logger, demo_mode=False, db=None):
+    def __init__(self, config, logger, demo_mode=False, db=None, run_id=None, outbox=None):
         self.config = config
         self.logger = logger
         self.demo_mode = demo_mode
+        self.run_id = run_id
+        # Optional ExportOutbox: claimed rows are journaled until Sheets confirms them.
+        self.outbox = outbox
+        self.last_journal_id = None
+        # Optional callable() -> bool: True when an empty scrape is expected rather than a
+        # failure, e.g. sitemap discovery found no pages changed since the last crawl.
+        self.expect_empty = None
         if db is not None:
             self.db = db
         elif demo_mode:
             self.db = InMemoryDedupeDB()
         else:
-            db_path = config.get("dedupe_db_path") or os.getenv("DEDUPE_DB_PATH", "dedupe.db")
-            self.db = DedupeDB(db_path=db_path)
+            self.db = DedupeDB(db_path=resolve_dedupe_db_path(config))
+        self.delta_export = bool(config.get('delta_export'))
+        self.change_column = (config.get('output') or {}).get('change_column', DEFAULT_CHANGE_COLUMN)
+
+    def seen_flags(self, items):
+        """Return, for each of ``items``, whether it was already exported for this site.
+
+        The whole batch is looked up in one dedupe-store call. With ``delta_export`` an
+        item only counts as seen when its fingerprint is unchanged too, so
+        ``stop_when_seen`` keeps crawling past pages whose rows changed.
+        """
+        flags = [False] * len(items)
+        complete, positions = [], []
+        for position, item in enumerate(items):
+            try:
+                self._build_dedupe_key(item)
+            except ValueError:
+                # Let process() report the missing keys; an incomplete item is never "seen".
+                continue
+            complete.append(item)
+            positions.append(position)
+        if complete:
+            dedupe_keys, fingerprints = self._claim_inputs(complete)
+            statuses = self.db.classify(self.config['name'], dedupe_keys, fingerprints=fingerprints)
+            for position, status in zip(positions, statuses, strict=True):
+                flags[position] = status == UNCHANGED
+        return flags
 
     def process(self, data):
-        deduped_data = []
-        pending_marks = []
-        for item in data:
-            dedupe_key = self._build_dedupe_key(item)
-            if not self.db.is_deduped(self.config['name'], dedupe_key):
-                deduped_data.append(item)
-                pending_marks.append(dedupe_key)
-
-        if len(deduped_data) < self.config['min_rows']:
-            if pending_marks:
+        min_rows = self.config['min_rows']
+        # Claim keys atomically so an overlapping run of the same site cannot export the
+        # same rows; the claim is rolled back when fewer than min_rows rows qualify.
+        deduped_data = self.claim(data, min_new=min_rows)
+        self._expire_stale_keys()
+
+        if len(deduped_data) < min_rows:
+            if deduped_data:
                 # We gathered new rows but did not hit the configured threshold.
-                raise ValueError(f"Insufficient data: {len(deduped_data)} < {self.config['min_rows']}")
+                raise ValueError(f"Insufficient data: {len(deduped_data)} < {min_rows}")
 
             if data:
                 self.logger.info("No new unique rows found; skipping export")
                 return []
 
-            raise ValueError(f"Insufficient data: {len(deduped_data)} < {self.config['min_rows']}")
+            if self.expect_empty is not None and self.expect_empty():
+                self.logger.info("Nothing changed since the last crawl; skipping export")
+                return []
+
+            raise ValueError(f"Insufficient data: {len(deduped_data)} < {min_rows}")
 
-        for dedupe_key in pending_marks:
-            self.db.mark_deduped(self.config['name'], dedupe_key)
+        self.write_output(deduped_data)
+        return deduped_data
 
-        self.write_csv(deduped_data)
+    def claim(self, data, min_new=0):
+        """Claim ``data``'s dedupe keys and return the new or changed rows to export.
+
+        Nothing is recorded when fewer than ``min_new`` rows qualify; the returned rows
+        then only report what would have been exported. With an outbox the rows are
+        journaled in the same transaction and ``last_journal_id`` names the batch.
+        """
+        dedupe_keys, fingerprints = self._claim_inputs(data)
+        self.last_journal_id = None
+        journal = self._journal(data) if self.outbox is not None else None
+        statuses = self.db.claim(
+            self.config['name'], dedupe_keys, min_new=min_new, fingerprints=fingerprints, journal=journal
+        )
+        deduped_data = []
+        for item, status in zip(data, statuses, strict=True):
+            if status == UNCHANGED:
+                continue
+            if self.delta_export:
+                item[self.change_column] = status
+            deduped_data.append(item)
         return deduped_data
 
-    def write_csv(self, data):
+    def count_pending(self, data):
+        """Return how many rows of ``data`` claim() would export, without claiming them."""
+        dedupe_keys, fingerprints = self._claim_inputs(data)
+        statuses = self.db.classify(self.config['name'], dedupe_keys, fingerprints=fingerprints)
+        return sum(status != UNCHANGED for status in statuses)
+
+    def finish(self):
+        """Run end-of-run housekeeping for callers that claim batch by batch."""
+        self._expire_stale_keys()
+
+    def write_output(self, data):
+        """Write rows to the local file sink selected by ``output.format``."""
         if not data:
             return
 
-        filename = f"{self.config['name']}.csv"
-        output_cfg = self.config.get('output', {})
-        output_dir = output_cfg.get('csv_dir')
-        columns = output_cfg.get('columns')
+        with build_sink(self.config, self.logger, run_id=self.run_id) as sink:
+            sink.write(data)
 
-        if columns is not None:
-            if not isinstance(columns, list) or not all(isinstance(col, str) for col in columns):
-                raise ValueError('output.columns must be a list of column names when provided')
-        else:
-            columns = list(data[0].keys())
+    # Kept for callers written before output.format existed.
+    write_csv = write_output
 
-        if output_dir:
-            file_path = Path(output_dir) / filename
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-        else:
-            file_path = Path(filename)
-        with open(file_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=columns)
-            writer.writeheader()
-            formatted_rows = [
-                {column: item.get(column, "") for column in columns}
-                for item in data
-            ]
-            writer.writerows(formatted_rows)
-        self.logger.info(f"CSV written: {file_path}")
+    def _expire_stale_keys(self):
+        ttl_days = self.config.get('dedupe_ttl_days')
+        if not ttl_days:
+            return
+        expired = self.db.expire(self.config['name'], ttl_days)
+        if expired:
+            self.logger.info(f"Expired {expired} dedupe keys older than {ttl_days} days")
+
+    def _journal(self, data):
+        # Only share the claim's transaction when the outbox lives in the same file.
+        shares_db = Path(getattr(self.db, 'db_path', '')).resolve() == self.outbox.db_path.resolve()
+
+        def record(conn, statuses):
+            rows = []
+            for item, status in zip(data, statuses, strict=True):
+                if status == UNCHANGED:
+                    continue
+                row = dict(item)
+                if self.delta_export:
+                    row[self.change_column] = status
+                rows.append(row)
+            if rows:
+                self.last_journal_id = self.outbox.record(
+                    self.config['name'], self.run_id, rows, conn=conn if shares_db else None
+                )
+
+        return record
+
+    def _claim_inputs(self, data):
+        dedupe_keys = [self._build_dedupe_key(item) for item in data]
+        fingerprints = [self._fingerprint(item) for item in data] if self.delta_export else None
+        return dedupe_keys, fingerprints
+
+    def _fingerprint(self, item) -> str:
+        """Hash the exported non-key fields so changed rows can be told apart from repeats."""
+        ignored = set(self.config["dedupe_keys"]) | {self.change_column}
+        columns = (self.config.get('output') or {}).get('columns') or sorted(item.keys())
+        values = [[column, item.get(column)] for column in columns if column not in ignored]
+        payload = json.dumps(values, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
 
     def _build_dedupe_key(self, item: dict) -> tuple:
         missing_keys = [key for key in self.config["dedupe_keys"] if key not in item]
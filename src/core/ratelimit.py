@@ -0,0 +1,38 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token-bucket limiter: ``rate`` tokens per second, up to ``burst``."""
+
+    def __init__(self, rate, burst=1, logger=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = max(float(rate), 0.0)
+        self.burst = max(int(burst), 1)
+        self.logger = logger
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._last_refill = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        if self.rate <= 0:
+            return
+
+        # Holding the lock while sleeping keeps concurrent callers strictly queued.
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait_time = (1 - self._tokens) / self.rate
+                if self.logger is not None:
+                    self.logger.debug(f'Rate limit reached; sleeping for {wait_time:.2f}s')
+                self._sleep(wait_time)
+                self._refill()
+            self._tokens = max(0.0, self._tokens - 1)
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._last_refill
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._last_refill = now
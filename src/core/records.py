@@ -0,0 +1,121 @@
+from collections.abc import Mapping
+from functools import lru_cache
+
+DEFAULT_CHANGE_COLUMN = "change_type"
+_MISSING = object()
+
+
+class Record(Mapping):
+    """Compact, dict-compatible row with one ``__slots__`` entry per field.
+
+    Concrete record types are created per site with :func:`record_type`. Instances
+    carry no per-row ``__dict__`` or repeated key strings: field names live once on the
+    class and values sit in fixed slots. Unset fields behave like missing dict keys
+    (``in``, ``get`` and ``[]`` all agree), so extractors can keep skipping fields whose
+    selector matched nothing.
+    """
+
+    __slots__ = ()
+    _fields = ()
+    # field name -> slot attribute; slots are positional (``_0``, ``_1``...) so any
+    # field name works, including ones that are not identifiers or that clash with
+    # mapping methods such as ``items``.
+    _slot_for = {}
+
+    def __init__(self, values=None, **kwargs):
+        if values:
+            for field, value in dict(values).items():
+                self[field] = value
+        for field, value in kwargs.items():
+            self[field] = value
+
+    def __getitem__(self, field):
+        slot = self._slot_for.get(field) if isinstance(field, str) else None
+        if slot is not None:
+            value = getattr(self, slot, _MISSING)
+            if value is not _MISSING:
+                return value
+        raise KeyError(field)
+
+    def __setitem__(self, field, value):
+        slot = self._slot_for.get(field) if isinstance(field, str) else None
+        if slot is None:
+            raise KeyError(f"{type(self).__name__} has no field {field!r}")
+        setattr(self, slot, value)
+
+    def __contains__(self, field):
+        slot = self._slot_for.get(field) if isinstance(field, str) else None
+        return slot is not None and hasattr(self, slot)
+
+    def __iter__(self):
+        for field, slot in self._slot_for.items():
+            if hasattr(self, slot):
+                yield field
+
+    def __len__(self):
+        return sum(1 for slot in self._slot_for.values() if hasattr(self, slot))
+
+    def get(self, field, default=None):
+        slot = self._slot_for.get(field) if isinstance(field, str) else None
+        if slot is None:
+            return default
+        return getattr(self, slot, default)
+
+    def values_for(self, columns, default=""):
+        """Return the values for ``columns`` in order, substituting ``default`` for gaps."""
+        slot_for = self._slot_for
+        return [
+            getattr(self, slot_for[column], default) if column in slot_for else default
+            for column in columns
+        ]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __reduce__(self):
+        # Record types are generated at runtime, so pickle by field list instead of by
+        # class reference; this keeps records usable with multiprocessing.
+        values = [getattr(self, slot, _MISSING) for slot in self._slot_for.values()]
+        missing = tuple(value is _MISSING for value in values)
+        values = tuple(None if value is _MISSING else value for value in values)
+        return _rebuild_record, (self._fields, missing, values)
+
+
+def _rebuild_record(fields, missing, values):
+    record = record_type(fields)()
+    for field, is_missing, value in zip(fields, missing, values, strict=True):
+        if not is_missing:
+            record[field] = value
+    return record
+
+
+@lru_cache(maxsize=None)
+def record_type(fields):
+    """Return the (cached) ``Record`` subclass for the given tuple of field names."""
+    fields = tuple(dict.fromkeys(fields))
+    slot_for = {field: f"_{index}" for index, field in enumerate(fields)}
+    return type(
+        "Record",
+        (Record,),
+        {
+            "__slots__": tuple(slot_for.values()),
+            "_fields": fields,
+            "_slot_for": slot_for,
+        },
+    )
+
+
+def record_fields(config):
+    """Field names a site's records need: selector fields, detail-page fields and derived columns."""
+    fields = [field for field in (config.get('selectors') or {}) if field != 'item']
+    fields.extend((config.get('follow') or {}).get('selectors') or {})
+    if config.get('delta_export'):
+        fields.append((config.get('output') or {}).get('change_column', DEFAULT_CHANGE_COLUMN))
+    return tuple(fields)
+
+
+def record_type_for(config):
+    return record_type(record_fields(config))
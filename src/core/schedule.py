@@ -0,0 +1,133 @@
+import re
+from datetime import datetime, timedelta
+
+_INTERVAL = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*$")
+_INTERVAL_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+_CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+)
+# A cron expression that cannot fire within this many days (e.g. "0 0 31 2 *") is rejected.
+CRON_SEARCH_DAYS = 366 * 5
+
+
+def parse_interval(value):
+    """Return seconds for ``900``, ``"90s"``, ``"15m"``, ``"2h"`` or ``"1d"``."""
+    if isinstance(value, bool):
+        raise ValueError("schedule.every must be a number of seconds or a duration like '15m'")
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = _INTERVAL.match(str(value))
+        if not match:
+            raise ValueError("schedule.every must be a number of seconds or a duration like '15m'")
+        seconds = float(match.group(1)) * _INTERVAL_UNITS[match.group(2)]
+    if seconds <= 0:
+        raise ValueError("schedule.every must be positive")
+    return seconds
+
+
+def _parse_cron_field(text, name, low, high):
+    values = set()
+    for part in text.split(","):
+        span, _, step_text = part.partition("/")
+        try:
+            step = int(step_text) if step_text else 1
+            if span == "*":
+                start, end = low, high
+            elif "-" in span:
+                start, end = (int(bound) for bound in span.split("-", 1))
+            else:
+                start = int(span)
+                end = high if step_text else start
+        except ValueError:
+            raise ValueError(f"schedule.cron has an invalid {name} field: {text!r}") from None
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"schedule.cron {name} field out of range {low}-{high}: {text!r}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronExpression:
+    """Standard five-field cron expression evaluated in local time.
+
+    Supports ``*``, lists, ranges and steps. As in cron, when both day of month
+    and day of week are restricted a day matching either one fires.
+    """
+
+    def __init__(self, expression):
+        fields = str(expression).split()
+        if len(fields) != 5:
+            raise ValueError("schedule.cron must have five fields: minute hour day-of-month month day-of-week")
+        self.expression = " ".join(fields)
+        parsed = [_parse_cron_field(field, *spec) for field, spec in zip(fields, _CRON_FIELDS, strict=True)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # Both 0 and 7 mean Sunday.
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+        self.next_after(datetime(2000, 1, 1))
+
+    def _day_matches(self, moment):
+        in_month = moment.day in self.days
+        in_week = moment.isoweekday() % 7 in self.weekdays
+        if self._any_day:
+            return in_week
+        if self._any_weekday:
+            return in_month
+        return in_month or in_week
+
+    def next_after(self, moment):
+        """Return the first matching minute strictly after ``moment``."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=CRON_SEARCH_DAYS)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"schedule.cron never fires: {self.expression!r}")
+
+
+class Schedule:
+    """When ``ws serve`` runs a site, from the site's ``schedule`` mapping.
+
+    ``{every: 15m}`` runs at a fixed interval; ``{cron: "*/15 * * * *"}`` follows a
+    cron expression.
+    """
+
+    def __init__(self, every=None, cron=None):
+        if (every is None) == (cron is None):
+            raise ValueError("schedule must set exactly one of every or cron")
+        self.interval = parse_interval(every) if every is not None else None
+        self.cron = CronExpression(cron) if cron is not None else None
+
+    @classmethod
+    def from_config(cls, spec):
+        if not isinstance(spec, dict):
+            raise ValueError("schedule must be a mapping with every or cron")
+        unknown = set(spec) - {"every", "cron"}
+        if unknown:
+            raise ValueError(f"schedule has unknown keys: {', '.join(sorted(map(str, unknown)))}")
+        return cls(every=spec.get("every"), cron=spec.get("cron"))
+
+    def next_run(self, after):
+        """Return the epoch time of the first run strictly after epoch time ``after``."""
+        if self.interval is not None:
+            return after + self.interval
+        return self.cron.next_after(datetime.fromtimestamp(after)).timestamp()
+
+    def describe(self):
+        if self.interval is not None:
+            return f"every {self.interval:g}s"
+        return f"cron {self.cron.expression}"
@@ -1,101 +1,318 @@
 import random
 import time
 import urllib.robotparser as robotparser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from types import SimpleNamespace
-from urllib.parse import parse_qsl, unquote, urlencode, urljoin, urlparse, urlsplit, urlunsplit
+from urllib.parse import parse_qsl, unquote, urlencode, urlparse, urlsplit, urlunsplit
 
 import requests
-from bs4 import BeautifulSoup
 
 from .auth import Authenticator
+from .config import ScrapePlan
+from .follow import DetailFollower
+from .parsing import PageParser, parse_detail_in_worker, parse_in_worker, start_parse_pool
+from .ratelimit import TokenBucket
+from .records import record_type_for
+from .sitemap import SitemapDiscovery, discovery_options
+from .transforms import TransformPipeline
+from .urls import InvalidUrl
+
+# URL sources can expand to many thousands of URLs; error messages list only the first few.
+FAILED_URLS_SHOWN = 5
 
 
 class Scraper:
-    def __init__(self, config, logger):
+    def __init__(
+        self,
+        config,
+        logger,
+        seen_check=None,
+        session=None,
+        robot_parsers=None,
+        on_page=None,
+        lastmods=None,
+        follow_cache=None,
+        parse_pool=None,
+    ):
         self.config = config
         self.logger = logger
-        self.session = requests.Session()
+        # Optional callable(items) -> list of bools reporting which items were exported
+        # before; used by pagination.stop_when_seen to end incremental crawls early.
+        self.seen_check = seen_check
+        # Optional callable(position, items) run after each page, e.g. to checkpoint it.
+        self.on_page = on_page
+        # Optional SitemapLastmods store; with `discovery: sitemap` only changed pages are crawled.
+        self.lastmods = lastmods
+        self.discovery = None
+        # `ws serve` passes a session and robots cache kept warm across runs of the site.
+        self.session = session if session is not None else requests.Session()
         self.auth = Authenticator(self.session)
         self.auth.authenticate(config.get('auth', {}))
-        self.allowed_domains = set(config.get('allowed_domains', []))
+        # Timeouts, headers, allowed hosts and compiled selectors are resolved once here
+        # (or taken from a CompiledConfig) instead of on every request and page.
+        self.plan = ScrapePlan.for_config(config)
         self.demo_mode = config.get('demo_mode', False)
         self.respect_robots = config.get("respect_robots", True)
-        self._robot_parsers = {}
-        rate_limit_cfg = config.get('rate_limit', {}) or {}
-        self._rps = max(float(rate_limit_cfg.get('rps', 1)), 0.0)
-        default_burst = max(1, int(self._rps)) if self._rps else 1
-        self._burst = max(int(rate_limit_cfg.get('burst', default_burst)), 1)
-        self._tokens = float(self._burst)
-        self._last_refill = time.monotonic()
-        headers = config.get('headers', {}) or {}
-        self.user_agent = headers.get('User-Agent', 'web-to-sheets/0.1')
-
-    def scrape(self, demo_mode=False):
-        self.demo_mode = demo_mode or self.demo_mode
+        self._robot_parsers = robot_parsers if robot_parsers is not None else {}
+        self._limiter = TokenBucket(self.plan.rps, self.plan.burst, logger=logger)
+        # Items are compact slot-based records rather than one dict per row.
+        self.record_type = record_type_for(config)
+        self.parser = PageParser(config)
+        # With `parse_workers` > 1, iter_batches runs parsing in a process pool: the one
+        # passed in (`ws serve` keeps it warm across runs) or one started for the crawl.
+        self._shared_parse_pool = parse_pool
+        self._parse_pool = None
+        self.transforms = TransformPipeline.from_config(config)
+        self.user_agent = self.plan.user_agent
+        # `follow:` sites fetch each item's linked page; follow_cache keeps those across runs.
+        self.follower = (
+            DetailFollower(self, self.plan.follow, cache=follow_cache)
+            if self.plan.follow
+            else None
+        )
+
+    def scrape(self, demo_mode=False, resume=None):
         data = []
+        for items in self.iter_batches(demo_mode=demo_mode, per_page=False, resume=resume):
+            data.extend(items)
+        return data
+
+    def iter_batches(self, demo_mode=False, per_page=True, resume=None):
+        """Yield scraped items batch by batch: one batch per page, or per URL.
+
+        With ``per_page`` a URL that fails part-way keeps the pages it already yielded;
+        otherwise a failing URL contributes nothing, as in :meth:`scrape`. ``resume`` is
+        a position previously passed to ``on_page``; crawling continues after it.
+        """
+        self.demo_mode = demo_mode or self.demo_mode
+        scraped_any = False
         failures = []
-        for url in self.config['urls']:
-            try:
-                if not self._is_url_allowed(url):
-                    continue
-                items = self.scrape_url(url)
-                data.extend(items)
-            except Exception as e:
-                self.logger.error(f"Failed to scrape {url}: {e}")
-                failures.append((url, str(e)))
-
-        if failures and not data:
-            failed_urls = ", ".join(url for url, _ in failures)
+        failure_count = 0
+        urls = self.plan.urls
+        options = discovery_options(self.config.get('discovery'))
+        if options is not None:
+            # `urls` then lists sitemaps; the pages to crawl come from them.
+            lastmods = self.lastmods if options['incremental'] else None
+            self.discovery = SitemapDiscovery(self, self.config.get('name', ''), lastmods=lastmods)
+            urls = self.discovery.iter_urls(urls)
+        tasks = self._url_tasks(urls, resume)
+        workers = self.plan.parse_workers
+        fetcher = None
+        if workers > 1:
+            # Parsing is CPU-bound and serialised by the GIL: a thread pool fetches the
+            # first pages of the next URLs ahead and the process pool parses them, while
+            # this thread handles the current URL's follow-on pages.
+            self._parse_pool = self._shared_parse_pool or start_parse_pool(self.config, workers)
+            fetcher = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ws-fetch')
+            tasks = self._prefetch(tasks, fetcher, workers)
+        try:
+            for url_index, url, start, first_page in tasks:
+                try:
+                    if isinstance(url, InvalidUrl):
+                        raise ValueError(url.reason)
+                    if per_page:
+                        for items in self.iter_pages(url, url_index=url_index, start=start, first_page=first_page):
+                            scraped_any = scraped_any or bool(items)
+                            yield items
+                    else:
+                        items = self.scrape_url(url, url_index=url_index, start=start, first_page=first_page)
+                        scraped_any = scraped_any or bool(items)
+                        yield items
+                except Exception as e:
+                    self.logger.error(f"Failed to scrape {url}: {e}")
+                    if self.discovery is not None:
+                        self.discovery.mark_failed(url)
+                    failure_count += 1
+                    if len(failures) < FAILED_URLS_SHOWN:
+                        failures.append(url)
+        finally:
+            tasks.close()
+            if fetcher is not None:
+                fetcher.shutdown(cancel_futures=True)
+                if self._parse_pool is not self._shared_parse_pool:
+                    self._parse_pool.shutdown(cancel_futures=True)
+                self._parse_pool = None
+
+        if self.follower is not None:
+            stats = self.follower.stats
+            self.logger.info(
+                f"Detail pages: {stats['fetched']} fetched, {stats['cached']} from cache, {stats['failed']} failed"
+            )
+        if failures and not scraped_any:
+            failed_urls = ", ".join(failures)
+            if failure_count > len(failures):
+                failed_urls += f" and {failure_count - len(failures)} more"
             raise RuntimeError(f"All URLs failed to scrape: {failed_urls}")
 
-        return data
-
-    def scrape_url(self, url):
+    def _url_tasks(self, urls, resume):
+        for url_index, url in enumerate(urls):
+            start = None
+            if resume is not None:
+                if url_index < resume['url_index'] or (
+                    url_index == resume['url_index'] and resume['next_url'] is None
+                ):
+                    continue
+                if url_index == resume['url_index']:
+                    start = resume
+            # Bad lines of a URLs file go through so they are counted as failed URLs.
+            if isinstance(url, InvalidUrl) or self._is_url_allowed(url):
+                yield url_index, url, start, None
+
+    def _prefetch(self, tasks, fetcher, window):
+        """Start loading each URL's first page up to ``window`` URLs ahead, keeping their order."""
+        pending = deque()
+        try:
+            for url_index, url, start, _ in tasks:
+                first_page = None
+                if not isinstance(url, InvalidUrl):
+                    first_page = fetcher.submit(self.load_page, self._first_page_url(url, start), self._parse_pool)
+                pending.append((url_index, url, start, first_page))
+                if len(pending) > window:
+                    yield pending.popleft()
+            while pending:
+                yield pending.popleft()
+        finally:
+            for *_, first_page in pending:
+                if first_page is not None:
+                    first_page.cancel()
+
+    def scrape_url(self, url, url_index=0, start=None, first_page=None):
         items = []
+        for page_items in self.iter_pages(url, url_index=url_index, start=start, first_page=first_page):
+            items.extend(page_items)
+        return items
+
+    def _first_page_url(self, url, start):
+        if start is not None:
+            return start['next_url']
+        pagination = self.config.get('pagination', {}) or {}
+        if pagination.get('type') == 'query_param':
+            return self._apply_query_param(url, pagination['param'], pagination.get('start', 1))
+        return url
+
+    def iter_pages(self, url, url_index=0, start=None, first_page=None):
+        """Yield the items of each page reached from ``url`` by its pagination.
+
+        Before each page is yielded, ``on_page`` (when set) receives the crawl position
+        after that page, so an interrupted crawl can continue from ``start``.
+        ``first_page`` is a future already loading the first page (see :meth:`load_page`).
+        """
         pagination = self.config.get('pagination', {}) or {}
         pagination_type = pagination.get('type', 'none')
         max_pages = 1 if pagination_type == 'none' else pagination.get('max_pages')
 
         base_url = url
-        current_url = (
-            self._apply_query_param(base_url, pagination['param'], pagination.get('start', 1))
-            if pagination_type == 'query_param'
-            else base_url
-        )
-        page_number = pagination.get('start', 1) if pagination_type == 'query_param' else None
-        page_count = 0
+        current_url = self._first_page_url(base_url, start)
+        if start is not None:
+            page_number = start['page_number']
+            page_count = start['page_count']
+            seen_pages = start['seen_pages']
+        else:
+            page_number = pagination.get('start', 1) if pagination_type == 'query_param' else None
+            page_count = 0
+            seen_pages = 0
+        stop_after_seen = self._stop_when_seen_pages(pagination)
 
         while max_pages is None or page_count < max_pages:
             if not self._is_url_allowed(current_url):
                 self.logger.error(f"Skipping disallowed URL: {current_url}")
                 break
 
-            self.rate_limit()
-            response = self.fetch(current_url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            page_items = self.extract_items(soup)
-            items.extend(page_items)
+            if first_page is not None:
+                page_items, next_hint = first_page.result()
+                first_page = None
+            else:
+                page_items, next_hint = self.load_page(current_url)
+            if self.transforms:
+                # Normalise per page so stop_when_seen and dedupe see the final values.
+                self.transforms.apply(page_items)
+            # One seen lookup per page serves both detail following and stop_when_seen. With
+            # delta_export every item is followed and seen is judged on the enriched rows.
+            seen = None
+            if self.follower is not None:
+                if not self.follower.follow_seen and self.seen_check is not None:
+                    seen = self.seen_check(page_items)
+                self.follower.enrich(page_items, current_url, seen)
             page_count += 1
 
-            if pagination_type == 'none':
-                break
-
-            if max_pages is not None and page_count >= max_pages:
-                break
-
-            if pagination_type == 'query_param':
+            if stop_after_seen and pagination_type != 'none':
+                # Check before yielding: a pipelined consumer may claim the page's keys.
+                if seen is None:
+                    seen = self.seen_check(page_items)
+                has_new = not all(seen)
+                seen_pages = 0 if has_new else seen_pages + 1
+            stopped = bool(stop_after_seen) and pagination_type != 'none' and seen_pages >= stop_after_seen
+
+            next_url = None
+            finished = pagination_type == 'none' or stopped or (max_pages is not None and page_count >= max_pages)
+            if not finished and pagination_type == 'query_param':
                 page_number += 1
-                current_url = self._apply_query_param(base_url, pagination['param'], page_number)
-            elif pagination_type == 'next_link':
-                next_url = self.get_next_url(soup, current_url, pagination)
-                if not next_url:
-                    break
-                current_url = next_url
-            else:
+                next_url = self._apply_query_param(base_url, pagination['param'], page_number)
+            elif not finished and pagination_type == 'next_link':
+                next_url = next_hint
+            elif not finished and pagination_type == 'cursor' and next_hint is not None:
+                # Cursor/next-token APIs: the payload names the next page; no token ends the crawl.
+                next_url = self._apply_query_param(base_url, pagination['param'], next_hint)
+            if next_url == current_url:
+                # A payload or page that points at itself would otherwise loop forever.
+                next_url = None
+
+            if self.on_page is not None:
+                self.on_page(
+                    {
+                        'url_index': url_index,
+                        'next_url': next_url,
+                        'page_number': page_number,
+                        'page_count': page_count,
+                        'seen_pages': seen_pages,
+                    },
+                    page_items,
+                )
+            yield page_items
+
+            if stopped:
+                self.logger.info(
+                    f"Stopping pagination after {seen_pages} page(s) without new rows: {current_url}"
+                )
+            if not next_url:
                 break
-
-        return items
+            current_url = next_url
+
+    def _stop_when_seen_pages(self, pagination):
+        stop_when_seen = pagination.get('stop_when_seen')
+        if not stop_when_seen or self.seen_check is None:
+            return 0
+        # `true` stops on the first fully-seen page; an integer requires that many in a row.
+        return 1 if stop_when_seen is True else int(stop_when_seen)
+
+    def discovery_up_to_date(self):
+        """True when sitemap discovery ran cleanly and found no new or changed pages."""
+        return self.discovery is not None and self.discovery.up_to_date()
+
+    def commit_discovery(self):
+        """Remember sitemap lastmods after a successful run, so the next run skips unchanged pages."""
+        if self.discovery is not None:
+            self.discovery.commit()
+
+    @staticmethod
+    def _local_path(parsed):
+        path_str = parsed.path
+        if parsed.netloc:
+            path_str = f"//{parsed.netloc}{parsed.path}"
+        return Path(unquote(path_str))
+
+    def open_stream(self, url):
+        """Open ``url`` as a binary stream without reading it into memory (used for sitemaps)."""
+        parsed = urlsplit(url)
+        if parsed.scheme == 'file':
+            return open(self._local_path(parsed), 'rb')
+        self.rate_limit()
+        response = self.session.get(url, timeout=self.plan.timeout, headers=self.plan.headers, stream=True)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        return response.raw
 
     def fetch(self, url):
         retries = 3
@@ -103,10 +320,7 @@ class Scraper:
             try:
                 parsed = urlsplit(url)
                 if parsed.scheme == 'file':
-                    path_str = parsed.path
-                    if parsed.netloc:
-                        path_str = f"//{parsed.netloc}{parsed.path}"
-                    file_path = Path(unquote(path_str))
+                    file_path = self._local_path(parsed)
                     if not file_path.exists():
                         raise FileNotFoundError(file_path)
 
@@ -118,9 +332,7 @@ class Scraper:
                 if not self._is_url_allowed(url):
                     raise Exception(f"URL disallowed by policy: {url}")
 
-                timeout = (self.config['timeouts']['connect'], self.config['timeouts']['read'])
-                response = self.session.get(url, timeout=timeout,
-                                            headers=self.config['headers'])
+                response = self.session.get(url, timeout=self.plan.timeout, headers=self.plan.headers)
                 response.raise_for_status()
                 return response
             except requests.exceptions.HTTPError as e:
@@ -133,60 +345,40 @@ class Scraper:
                 raise Exception(f"Fixture not found: {e}") from e
         raise Exception("Max retries exceeded")
 
+    def load_page(self, url, pool=None):
+        """Fetch ``url`` and return ``(items, next_hint)`` (see :meth:`PageParser.next_hint`).
+
+        With ``pool`` the page is parsed in that process pool. Only prefetched first
+        pages use it: they load on several threads at once, whereas a follow-on page
+        is awaited straight away and shipping it to a process would only add overhead.
+        """
+        self.rate_limit()
+        response = self.fetch(url)
+        if pool is not None:
+            return pool.submit(parse_in_worker, self.parser.body(response), url).result()
+        document = self.parse_document(response)
+        return self.extract_items(document), self.parser.next_hint(document, url)
+
+    def parse_document(self, response):
+        """Decode a fetched page: parsed JSON for ``format: json`` sites, else a soup."""
+        return self.parser.parse_document(self.parser.body(response))
+
+    def parse_detail(self, response):
+        """Return the ``follow`` fields of a fetched detail page."""
+        if self._parse_pool is not None:
+            return self._parse_pool.submit(parse_detail_in_worker, response.text).result()
+        return self.parser.parse_detail(response.text)
+
     def extract_items(self, soup):
-        items = []
-        containers = soup.select(self.config['selectors']['item'])
-        for container in containers:
-            item = {}
-            for field, selector in self.config['selectors'].items():
-                if field != 'item':
-                    parts = selector.split('::')
-                    clean_selector = parts[0]
-                    modifier = parts[1] if len(parts) > 1 else None
-                    elements = container.select(clean_selector)
-                    if elements:
-                        if modifier and modifier.startswith('attr('):
-                            attr_name = modifier[5:-1]
-                            item[field] = elements[0].get(attr_name)
-                        elif modifier == 'textlist':
-                            texts = [element.get_text(strip=True) for element in elements if element.get_text(strip=True)]
-                            item[field] = ', '.join(texts)
-                        else:
-                            item[field] = elements[0].get_text(strip=True)
-            if item:
-                items.append(item)
-        return items
+        return self.parser.extract_items(soup)
 
     def get_next_url(self, soup, current_url, pagination):
         if pagination.get('type') != 'next_link':
             return None
-        next_link = soup.select_one(pagination.get('next_selector', ''))
-        if not next_link:
-            return None
-        href = next_link.get('href')
-        if not href:
-            return None
-        next_url = urljoin(current_url, href)
-        return next_url
+        return self.parser.get_next_url(soup, current_url)
 
     def rate_limit(self):
-        if self._rps <= 0:
-            return
-
-        now = time.monotonic()
-        elapsed = now - self._last_refill
-        self._tokens = min(self._burst, self._tokens + elapsed * self._rps)
-
-        if self._tokens < 1:
-            wait_time = (1 - self._tokens) / self._rps
-            self.logger.debug(f'Rate limit reached; sleeping for {wait_time:.2f}s')
-            time.sleep(wait_time)
-            now = time.monotonic()
-            elapsed = now - self._last_refill
-            self._tokens = min(self._burst, self._tokens + elapsed * self._rps)
-
-        self._tokens = max(0.0, self._tokens - 1)
-        self._last_refill = time.monotonic()
+        self._limiter.acquire()
 
     def _apply_query_param(self, url, param, value):
         split_url = urlsplit(url)
@@ -195,14 +387,16 @@ class Scraper:
         new_query = urlencode(query_params, doseq=True)
         return urlunsplit((split_url.scheme, split_url.netloc, split_url.path, new_query, split_url.fragment))
 
-    def _is_url_allowed(self, url: str) -> bool:
+    def _is_url_allowed(self, url: str, quiet: bool = False) -> bool:
+        # Sitemap discovery filters many URLs at once; `quiet` logs those at debug level.
+        report = self.logger.debug if quiet else self.logger.error
         parsed = urlparse(url)
 
         if parsed.scheme not in ('http', 'https'):
             return True
 
-        if self.allowed_domains and not self._is_allowed_domain(parsed.netloc):
-            self.logger.error(f"URL not in allowed domains: {url}")
+        if self.plan.allowed_hosts and not self._is_allowed_domain(parsed.netloc):
+            report(f"URL not in allowed domains: {url}")
             return False
 
         if self.demo_mode or not self.respect_robots:
@@ -214,7 +408,7 @@ class Scraper:
 
         can_fetch = parser.can_fetch(self.user_agent, url)
         if not can_fetch:
-            self.logger.error(f"Blocked by robots.txt: {url}")
+            report(f"Blocked by robots.txt: {url}")
         return can_fetch
 
     def _get_robot_parser(self, parsed_url):
@@ -225,8 +419,7 @@ class Scraper:
         robots_url = urlunsplit((parsed_url.scheme, netloc, '/robots.txt', '', ''))
         parser = robotparser.RobotFileParser()
         try:
-            timeout = (self.config['timeouts']['connect'], self.config['timeouts']['read'])
-            response = self.session.get(robots_url, timeout=timeout, headers=self.config['headers'])
+            response = self.session.get(robots_url, timeout=self.plan.timeout, headers=self.plan.headers)
             if response.status_code >= 400:
                 self.logger.info(f'robots.txt unavailable for {netloc}; assuming allowed')
                 self._robot_parsers[netloc] = None
@@ -241,8 +434,6 @@ class Scraper:
 
     def _is_allowed_domain(self, request_netloc: str) -> bool:
         request_host = request_netloc.split(":", 1)[0].lower()
-        for allowed_domain in self.allowed_domains:
-            allowed_host = allowed_domain.split(":", 1)[0].lower()
-            if request_host == allowed_host or request_host.endswith(f".{allowed_host}"):
-                return True
-        return False
+        if request_host in self.plan.allowed_hosts:
+            return True
+        return any(request_host.endswith(f".{allowed_host}") for allowed_host in self.plan.allowed_hosts)
@@ -0,0 +1,435 @@
+"""Long-running scheduler behind ``ws serve``."""
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from .checkpoint import CrawlCheckpoint
+from .config import ConfigLoader
+from .database import DedupeDB
+from .follow import FollowCache
+from .outbox import ExportOutbox
+from .schedule import Schedule
+from .sitemap import SitemapLastmods
+
+DEFAULT_WORKERS = 4
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_RELOAD_INTERVAL = 5.0
+# Cached robots.txt rules are refetched after this long, as a fresh process would.
+ROBOTS_TTL_SECONDS = 24 * 3600
+
+
+class WarmState:
+    """Objects ``ws serve`` keeps alive between runs instead of rebuilding per run.
+
+    Each site keeps its ``requests.Session`` (connection pool, cookies) and parsed
+    robots.txt rules, and sites with ``parse_workers`` > 1 their parse process pool;
+    dedupe stores, export journals, crawl checkpoints, sitemap
+    lastmods and detail-page caches are shared per database file, so their schema
+    setup runs once. Google Sheets clients are already cached
+    per process by :func:`src.core.sheets.get_client`.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._sessions = {}
+        self._robots = {}
+        self._dbs = {}
+        self._outboxes = {}
+        self._checkpoints = {}
+        self._lastmods = {}
+        self._follow_caches = {}
+        self._parse_pools = {}
+        self._lock = threading.Lock()
+
+    def session(self, site):
+        with self._lock:
+            session = self._sessions.get(site)
+            if session is None:
+                import requests
+
+                session = self._sessions[site] = requests.Session()
+            return session
+
+    def robot_parsers(self, site):
+        with self._lock:
+            created, parsers = self._robots.get(site, (None, None))
+            if parsers is None or self.clock() - created > ROBOTS_TTL_SECONDS:
+                created, parsers = self._robots[site] = (self.clock(), {})
+            return parsers
+
+    def dedupe_db(self, db_path):
+        key = Path(db_path).expanduser().resolve()
+        with self._lock:
+            if key not in self._dbs:
+                self._dbs[key] = DedupeDB(db_path=key)
+            return self._dbs[key]
+
+    def outbox(self, db_path):
+        key = Path(db_path).expanduser().resolve()
+        with self._lock:
+            if key not in self._outboxes:
+                self._outboxes[key] = ExportOutbox(key)
+            return self._outboxes[key]
+
+    def checkpoint(self, db_path):
+        key = Path(db_path).expanduser().resolve()
+        with self._lock:
+            if key not in self._checkpoints:
+                self._checkpoints[key] = CrawlCheckpoint(key)
+            return self._checkpoints[key]
+
+    def sitemap_lastmods(self, db_path):
+        key = Path(db_path).expanduser().resolve()
+        with self._lock:
+            if key not in self._lastmods:
+                self._lastmods[key] = SitemapLastmods(key)
+            return self._lastmods[key]
+
+    def follow_cache(self, db_path):
+        key = Path(db_path).expanduser().resolve()
+        with self._lock:
+            if key not in self._follow_caches:
+                self._follow_caches[key] = FollowCache(key)
+            return self._follow_caches[key]
+
+    def parse_pool(self, site, config, workers):
+        """Return the site's parse process pool, started on first use."""
+        with self._lock:
+            pool = self._parse_pools.get(site)
+            if pool is None:
+                from .parsing import start_parse_pool
+
+                pool = self._parse_pools[site] = start_parse_pool(config, workers)
+            return pool
+
+    def forget(self, site):
+        """Drop a site's session, robots cache and parse pool, e.g. after its config changed.
+
+        None of them is closed: a run already in progress may still be using them. A
+        dropped pool stops its processes once that run lets go of it.
+        """
+        with self._lock:
+            self._sessions.pop(site, None)
+            self._robots.pop(site, None)
+            self._parse_pools.pop(site, None)
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            pools = list(self._parse_pools.values())
+            self._sessions.clear()
+            self._robots.clear()
+            self._parse_pools.clear()
+        for session in sessions:
+            session.close()
+        for pool in pools:
+            pool.shutdown(cancel_futures=True)
+
+
+class ServeDaemon:
+    """Run scheduled sites on a bounded worker pool until stopped.
+
+    Sites opt in with a ``schedule`` mapping in their YAML (see
+    :class:`src.core.schedule.Schedule`). ``runner(site, config, warm, logger)`` runs
+    one site and returns its exit code. Configs are re-read when their file changes;
+    a site never runs twice at once, and a run that comes due while the previous one
+    is still going is skipped. Health is written to ``status_path`` as JSON and, with
+    :meth:`start_http`, served on ``/health`` and ``/metrics``.
+    """
+
+    def __init__(
+        self,
+        sites_dir,
+        logger,
+        runner,
+        workers=DEFAULT_WORKERS,
+        status_path=None,
+        loader=None,
+        clock=time.time,
+        poll_interval=DEFAULT_POLL_INTERVAL,
+        reload_interval=DEFAULT_RELOAD_INTERVAL,
+    ):
+        self.sites_dir = Path(sites_dir)
+        self.logger = logger
+        self.runner = runner
+        self.workers = workers
+        self.status_path = Path(status_path) if status_path else None
+        self.loader = loader or ConfigLoader()
+        self.clock = clock
+        self.poll_interval = poll_interval
+        self.reload_interval = reload_interval
+        self.warm = WarmState(clock=clock)
+        self.sites = {}
+        self.started_at = clock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ws-serve")
+        # Submitted runs by future, so shutdown can tell queued runs from running ones.
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stopped = False
+        self._last_reload = None
+        self._http = None
+        self._previous = self._read_previous_status()
+
+    def reload(self):
+        """Pick up added, changed and removed site configs."""
+        self._last_reload = self.clock()
+        paths = {path.stem: path for path in sorted(self.sites_dir.glob("*.yaml"))}
+        with self._lock:
+            for name in set(self.sites) - set(paths):
+                self.logger.info(f"Site config removed; unscheduling {name}")
+                del self.sites[name]
+                self.warm.forget(name)
+        for name, path in paths.items():
+            try:
+                mtime = path.stat().st_mtime_ns
+            except OSError:
+                continue
+            state = self.sites.get(name)
+            if state is not None and state["mtime"] == mtime:
+                continue
+            self._load_site(name, path, mtime, state)
+
+    def _load_site(self, name, path, mtime, state):
+        try:
+            config = self.loader.load(str(path))
+        except ValueError as exc:
+            # Keep serving the last good config; the error shows up in the status.
+            self.logger.error(f"Failed to load config for {name}: {exc}")
+            with self._lock:
+                state = self.sites.setdefault(name, state or self._new_state(name))
+                state.update(mtime=mtime, error=str(exc))
+            return
+        schedule = Schedule.from_config(config["schedule"]) if config.get("schedule") else None
+        now = self.clock()
+        with self._lock:
+            if state is None:
+                state = self.sites[name] = self._new_state(name)
+                last_started = (self._previous.get(name) or {}).get("last_started")
+                state["next_run"] = self._next_run(schedule, last_started, now)
+                self.logger.info(
+                    f"Scheduled {name}: {schedule.describe()}" if schedule else f"{name} has no schedule; not serving it"
+                )
+            else:
+                self.logger.info(f"Reloaded config for {name}")
+                self.warm.forget(name)
+                previous = state["schedule"]
+                if schedule is None or previous is None or schedule.describe() != previous.describe():
+                    state["next_run"] = self._next_run(schedule, state["last_started"], now)
+            state.update(config=config, schedule=schedule, mtime=mtime, error=None)
+
+    @staticmethod
+    def _new_state(name):
+        return {
+            "site": name,
+            "config": None,
+            "schedule": None,
+            "mtime": None,
+            "next_run": None,
+            "running": False,
+            "runs": 0,
+            "failures": 0,
+            "skipped": 0,
+            "last_exit_code": None,
+            "last_started": None,
+            "last_finished": None,
+            "last_duration": None,
+            "error": None,
+        }
+
+    @staticmethod
+    def _next_run(schedule, last_started, now):
+        if schedule is None:
+            return None
+        if schedule.cron is not None:
+            return schedule.next_run(now)
+        # Keep the interval across restarts and reloads instead of running at once.
+        return max(now, schedule.next_run(last_started)) if last_started else now
+
+    def tick(self, now=None):
+        """Submit every site that is due; returns the names submitted."""
+        now = self.clock() if now is None else now
+        submitted = []
+        with self._lock:
+            for name, state in self.sites.items():
+                if state["next_run"] is None or now < state["next_run"]:
+                    continue
+                schedule = state["schedule"]
+                state["next_run"] = schedule.next_run(now)
+                if state["running"]:
+                    state["skipped"] += 1
+                    self.logger.info(f"Skipping {name}: previous run still in progress")
+                    continue
+                state["running"] = True
+                submitted.append((name, state["config"]))
+        for name, config in submitted:
+            future = self._executor.submit(self._run, name, config)
+            with self._lock:
+                self._futures[future] = name
+            future.add_done_callback(self._forget_future)
+        return [name for name, _ in submitted]
+
+    def _forget_future(self, future):
+        with self._lock:
+            self._futures.pop(future, None)
+
+    def _run(self, name, config):
+        started = self.clock()
+        with self._lock:
+            if name in self.sites:
+                self.sites[name]["last_started"] = started
+        try:
+            exit_code = self.runner(name, config, self.warm, self.logger)
+        except Exception as exc:  # pragma: no cover - runner reports its own errors
+            self.logger.error(f"Scheduled run of {name} crashed: {exc}")
+            exit_code = -1
+        finished = self.clock()
+        with self._lock:
+            state = self.sites.get(name)
+            if state is None:
+                return
+            state["running"] = False
+            state["runs"] += 1
+            state["failures"] += 1 if exit_code else 0
+            state["last_exit_code"] = exit_code
+            state["last_finished"] = finished
+            state["last_duration"] = finished - started
+
+    def status(self):
+        with self._lock:
+            sites = {
+                name: {
+                    key: value
+                    for key, value in state.items()
+                    if key not in ("config", "schedule", "mtime")
+                }
+                | {"schedule": state["schedule"].describe() if state["schedule"] else None}
+                for name, state in self.sites.items()
+            }
+        return {
+            "state": "stopped" if self._stopped else "stopping" if self._stop.is_set() else "running",
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "uptime": self.clock() - self.started_at,
+            "workers": self.workers,
+            "running": sum(1 for site in sites.values() if site["running"]),
+            "sites": sites,
+        }
+
+    def metrics(self):
+        """Prometheus text exposition of :meth:`status`."""
+        status = self.status()
+        lines = [
+            "# TYPE ws_serve_uptime_seconds gauge",
+            f"ws_serve_uptime_seconds {status['uptime']:.3f}",
+            "# TYPE ws_serve_running_sites gauge",
+            f"ws_serve_running_sites {status['running']}",
+        ]
+        series = (
+            ("ws_site_runs_total", "counter", "runs"),
+            ("ws_site_failures_total", "counter", "failures"),
+            ("ws_site_skipped_total", "counter", "skipped"),
+            ("ws_site_last_duration_seconds", "gauge", "last_duration"),
+            ("ws_site_last_exit_code", "gauge", "last_exit_code"),
+            ("ws_site_next_run_timestamp", "gauge", "next_run"),
+        )
+        for metric, kind, key in series:
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, site in status["sites"].items():
+                if site[key] is not None:
+                    lines.append(f'{metric}{{site="{name}"}} {site[key]}')
+        return "\n".join(lines) + "\n"
+
+    def write_status(self):
+        if self.status_path is None:
+            return
+        try:
+            self.status_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.status_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(self.status(), handle, indent=2)
+            os.replace(tmp_path, self.status_path)
+        except OSError as exc:
+            self.logger.error(f"Failed to write status file {self.status_path}: {exc}")
+
+    def _read_previous_status(self):
+        if self.status_path is None:
+            return {}
+        try:
+            with open(self.status_path, "r", encoding="utf-8") as handle:
+                return json.load(handle).get("sites") or {}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def start_http(self, port, host="127.0.0.1"):
+        """Serve ``/health`` (JSON) and ``/metrics`` (Prometheus) on a background thread."""
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/health":
+                    body = json.dumps(daemon.status()).encode("utf-8")
+                    content_type = "application/json"
+                elif self.path == "/metrics":
+                    body = daemon.metrics().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(503 if daemon._stop.is_set() else 200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args):
+                pass
+
+        self._http = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._http.serve_forever, name="ws-serve-http", daemon=True).start()
+        return self._http.server_address[1]
+
+    def serve_forever(self):
+        """Schedule runs until :meth:`stop`, then wait for in-flight runs to finish."""
+        self.logger.info(f"ws serve started: {self.sites_dir} with {self.workers} worker(s)")
+        try:
+            while not self._stop.is_set():
+                if self._last_reload is None or self.clock() - self._last_reload >= self.reload_interval:
+                    self.reload()
+                self.tick()
+                self.write_status()
+                self._stop.wait(self.poll_interval)
+        finally:
+            self.shutdown()
+
+    def stop(self, *_signal_args):
+        """Ask :meth:`serve_forever` to return; safe to use as a signal handler."""
+        self._stop.set()
+
+    def shutdown(self):
+        self._stop.set()
+        # Runs still queued behind busy workers are dropped; only in-flight ones are awaited.
+        with self._lock:
+            queued = list(self._futures.items())
+        cancelled = sorted(name for future, name in queued if future.cancel())
+        with self._lock:
+            for name in cancelled:
+                if name in self.sites:
+                    self.sites[name]["running"] = False
+        if cancelled:
+            self.logger.info(f"ws serve stopping; cancelled queued runs of {', '.join(cancelled)}")
+        self.logger.info("ws serve stopping; waiting for running sites to finish")
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http = None
+        self.warm.close()
+        self._stopped = True
+        self.write_status()
+        self.logger.info("ws serve stopped")
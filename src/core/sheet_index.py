@@ -0,0 +1,115 @@
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from .database import DEFAULT_BUSY_TIMEOUT, _hash_dedupe_key
+
+# Stay well below SQLite's bound-parameter limit when looking keys up in bulk.
+_LOOKUP_BATCH = 500
+
+
+class SheetIndex:
+    """Local mirror mapping each exported dedupe key to its row in a worksheet.
+
+    Lives in the dedupe database file so it is backed up, locked and cleaned up with
+    it. Keys are hashed from the cell text written to the sheet, which is also what a
+    bootstrap read gets back. ``row_json`` holds the last values written for a row,
+    or NULL for rows only known from a bootstrap, so upserts can send just the cells
+    that changed.
+    """
+
+    def __init__(self, db_path="dedupe.db", busy_timeout=DEFAULT_BUSY_TIMEOUT):
+        self.db_path = Path(db_path).expanduser()
+        self.busy_timeout = busy_timeout
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(str(self.db_path), timeout=self.busy_timeout)
+
+    def init_db(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sheet_rows (
+                    sheet_id TEXT,
+                    tab TEXT,
+                    key_hash TEXT,
+                    row_number INTEGER,
+                    row_json TEXT,
+                    PRIMARY KEY (sheet_id, tab, key_hash)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sheet_tabs (
+                    sheet_id TEXT,
+                    tab TEXT,
+                    bootstrapped_at INTEGER,
+                    PRIMARY KEY (sheet_id, tab)
+                )
+            """)
+
+    def is_bootstrapped(self, sheet_id, tab):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM sheet_tabs WHERE sheet_id = ? AND tab = ?", (sheet_id, tab)
+            ).fetchone()
+        return row is not None
+
+    def bootstrap(self, sheet_id, tab, entries):
+        """Replace the index for a tab with ``(key, row_number)`` pairs read from the sheet."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sheet_rows WHERE sheet_id = ? AND tab = ?", (sheet_id, tab))
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO sheet_rows (sheet_id, tab, key_hash, row_number, row_json)
+                VALUES (?, ?, ?, ?, NULL)
+                """,
+                ((sheet_id, tab, _hash_dedupe_key(list(key)), row_number) for key, row_number in entries),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sheet_tabs (sheet_id, tab, bootstrapped_at) VALUES (?, ?, ?)",
+                (sheet_id, tab, int(time.time())),
+            )
+
+    def lookup(self, sheet_id, tab, keys):
+        """Return ``{key: (row_number, values_or_None)}`` for the keys already in the sheet."""
+        by_hash = {_hash_dedupe_key(list(key)): key for key in keys}
+        hashes = list(by_hash)
+        found = {}
+        with self._connect() as conn:
+            for start in range(0, len(hashes), _LOOKUP_BATCH):
+                batch = hashes[start:start + _LOOKUP_BATCH]
+                placeholders = ", ".join("?" * len(batch))
+                rows = conn.execute(
+                    f"""
+                    SELECT key_hash, row_number, row_json FROM sheet_rows
+                    WHERE sheet_id = ? AND tab = ? AND key_hash IN ({placeholders})
+                    """,
+                    (sheet_id, tab, *batch),
+                )
+                for key_hash, row_number, row_json in rows:
+                    values = json.loads(row_json) if row_json is not None else None
+                    found[by_hash[key_hash]] = (row_number, values)
+        return found
+
+    def record(self, sheet_id, tab, entries):
+        """Store ``(key, row_number, values)`` for rows just written to the sheet."""
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO sheet_rows (sheet_id, tab, key_hash, row_number, row_json)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    (sheet_id, tab, _hash_dedupe_key(list(key)), row_number, json.dumps(values))
+                    for key, row_number, values in entries
+                ),
+            )
+
+    def reset(self, sheet_id, tab):
+        """Forget a tab so the next upsert bootstraps it again."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sheet_rows WHERE sheet_id = ? AND tab = ?", (sheet_id, tab))
+            conn.execute("DELETE FROM sheet_tabs WHERE sheet_id = ? AND tab = ?", (sheet_id, tab))
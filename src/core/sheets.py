@@ -1,18 +1,159 @@
 import os
+import random
+import re
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import gspread
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from .processor import resolve_dedupe_db_path
+from .ratelimit import TokenBucket
+from .sheet_index import SheetIndex
+from .sinks import resolve_output_columns, row_values
+
+DEFAULT_CHUNK_ROWS = 500
+# Google's default write quota is 60 requests per minute per user.
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_MAX_BACKOFF = 64.0
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+SHEET_MODES = ('append', 'upsert')
+_UPDATED_RANGE_START = re.compile(r'![A-Z]+(\d+)')
+
+# Exporters sharing a service account share its quota, so the request budget is
+# per credentials file rather than per exporter.
+_request_budgets: Dict[str, TokenBucket] = {}
+_budget_lock = threading.Lock()
+
+
+# Authorised clients per (credentials file, mtime). google-auth refreshes a client's
+# access token only once it has expired, so reusing the client skips the OAuth
+# exchange for every export after the first in a long-running or multi-site process.
+_clients: Dict[Tuple[str, float], gspread.Client] = {}
+# Spreadsheet and worksheet handles per client, keyed by sheet id / (sheet id, tab).
+_handles: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+_cache_lock = threading.Lock()
+
+
+def get_client(credentials_path) -> gspread.Client:
+    """Return the shared authorised client for a service-account file.
+
+    Replacing the file (new mtime) yields a fresh client on the next call.
+    """
+    path = Path(credentials_path).expanduser().resolve()
+    key = (str(path), path.stat().st_mtime)
+    with _cache_lock:
+        client = _clients.get(key)
+        if client is None:
+            for stale in [cached for cached in _clients if cached[0] == key[0]]:
+                del _clients[stale]
+            client = gspread.service_account(filename=str(path))
+            _clients[key] = client
+    return client
+
+
+def clear_client_cache():
+    """Forget cached clients and handles (e.g. after rotating credentials)."""
+    with _cache_lock:
+        _clients.clear()
+        _handles.clear()
+
+
+def _cached_handles(client) -> dict:
+    with _cache_lock:
+        handles = _handles.get(client)
+        if handles is None:
+            handles = _handles[client] = {}
+        return handles
+
+
+def _request_budget(credentials_key: str, requests_per_minute: float) -> TokenBucket:
+    """Return the bucket shared by every exporter using ``credentials_key``.
+
+    Sites may configure different ``requests_per_minute`` for the same credentials;
+    the quota is one, so the bucket keeps the lowest rate asked for.
+    """
+    rate = requests_per_minute / 60
+    with _budget_lock:
+        budget = _request_budgets.get(credentials_key)
+        if budget is None:
+            budget = _request_budgets[credentials_key] = TokenBucket(rate, burst=1)
+        elif rate < budget.rate:
+            budget.rate = rate
+        return budget
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+def _unsent(exc: Exception) -> bool:
+    """Return True when ``exc`` proves the request never reached the server."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    if not isinstance(exc, requests.ConnectionError):
+        return False
+    reason = exc.args[0] if exc.args else None
+    return isinstance(getattr(reason, 'reason', reason), NewConnectionError)
 
 
 class SheetsExporter:
     """Export processed rows to Google Sheets when configured."""
 
-    def __init__(self, config, logger):
+    def __init__(
+        self,
+        config,
+        logger,
+        index: Optional[SheetIndex] = None,
+        client=None,
+        sheet_id: Optional[str] = None,
+    ):
+        """``client`` replaces the gspread service-account client, e.g. with
+        :class:`~src.core.sheets_fake.FakeSheetsClient` for offline tests and benchmarks;
+        ``sheet_id`` overrides ``GOOGLE_SHEETS_ID``.
+        """
         self.config = config
         self.logger = logger
         self.gc: Optional[gspread.Client] = None
         self.sheet_id: Optional[str] = None
+        output_cfg = config.get('output', {}) or {}
+        self.sheet_mode = output_cfg.get('sheet_mode', 'append')
+        if self.sheet_mode not in SHEET_MODES:
+            raise ValueError(f"output.sheet_mode must be one of {', '.join(SHEET_MODES)}")
+        if self.sheet_mode == 'upsert':
+            columns = output_cfg.get('columns') or []
+            if not all(key in columns for key in config.get('dedupe_keys') or []):
+                raise ValueError('output.sheet_mode upsert requires output.columns to include every dedupe key')
+        self._index = index
+        self.complete = False
+        # After export(): leading rows known to be in the sheet, and the failure reason.
+        self.rows_confirmed = 0
+        self.last_error: Optional[str] = None
+        sheets_cfg = output_cfg.get('sheets', {}) or {}
+        self.chunk_rows = int(sheets_cfg.get('chunk_rows', DEFAULT_CHUNK_ROWS))
+        self.max_retries = int(sheets_cfg.get('max_retries', DEFAULT_MAX_RETRIES))
+        self.max_backoff = float(sheets_cfg.get('max_backoff', DEFAULT_MAX_BACKOFF))
+        requests_per_minute = float(
+            sheets_cfg.get('requests_per_minute', DEFAULT_REQUESTS_PER_MINUTE)
+        )
+        self.chunks_written = 0
+        self._sleep: Callable[[float], None] = time.sleep
 
         credentials_path = (
             os.getenv('GOOGLE_SHEETS_CREDENTIALS_PATH')
@@ -21,62 +162,302 @@ class SheetsExporter:
             or 'service_account.json'
         )
 
-        self.sheet_id = os.getenv('GOOGLE_SHEETS_ID') or os.getenv('SHEET_ID')
+        self.sheet_id = sheet_id or os.getenv('GOOGLE_SHEETS_ID') or os.getenv('SHEET_ID')
 
         resolved_credentials = Path(credentials_path).expanduser()
+        self._budget: Optional[TokenBucket] = None
 
         if not self.sheet_id:
             self.logger.info('Google Sheets ID not provided; skipping Sheets export')
             return
 
+        if client is not None:
+            # An injected client does not draw on the service account's quota.
+            self.gc = client
+            self._budget = TokenBucket(requests_per_minute / 60, burst=1)
+            return
+
         if not resolved_credentials.exists():
             self.logger.info(
                 f"Google Sheets credentials file not found at {resolved_credentials}; skipping export"
             )
             return
 
+        self._budget = _request_budget(str(resolved_credentials), requests_per_minute)
         try:
-            self.gc = gspread.service_account(filename=str(resolved_credentials))
+            self.gc = get_client(resolved_credentials)
         except Exception as exc:  # pragma: no cover - defensive logging
             self.logger.error(f'Failed to initialise Google Sheets client: {exc}')
             self.gc = None
 
-    def export(self, data: Iterable[dict]):
+    def export(self, data: Iterable[dict], start_chunk: int = 0) -> int:
+        """Write rows in ``output.sheets.chunk_rows`` chunks; returns rows written.
+
+        Every request waits for the shared per-minute budget and is retried with
+        exponential backoff (honouring ``Retry-After``) on quota and server errors.
+        After a permanent failure ``complete`` is False and, in append mode,
+        ``chunks_written`` tells the caller where to resume via ``start_chunk``.
+        Upsert mode (``output.sheet_mode: upsert``) needs no resume point: rows that
+        already landed are found in the index and updated rather than appended again.
+        """
+        self.chunks_written = start_chunk
+        self.rows_confirmed = 0
+        self.complete = False
+        self.append_uncertain = False
+        self.last_error = None
         if not self.gc or not self.sheet_id:
             self.logger.info('Sheets exporter not configured, skipping')
-            return
+            return 0
 
         sheet_tab = self.config.get('output', {}).get('sheet_tab')
         if not sheet_tab:
-            self.logger.error('output.sheet_tab missing; unable to export to Google Sheets')
-            return
-        columns: Optional[List[str]] = self.config.get('output', {}).get('columns')
+            self._fail('output.sheet_tab missing; unable to export to Google Sheets')
+            return 0
+        columns: Optional[List[str]] = resolve_output_columns(self.config)
 
         try:
-            sheet = self.gc.open_by_key(self.sheet_id).worksheet(sheet_tab)
-        except Exception as exc:  # pragma: no cover - requires live Sheets
-            self.logger.error(f'Failed to open Google Sheet: {exc}')
-            return
+            sheet = self._worksheet(sheet_tab)
+        except Exception as exc:
+            self._fail(f'Failed to open Google Sheet: {exc}')
+            return 0
 
         rows = self._prepare_rows(data, columns)
         if not rows:
             self.logger.info('No rows to export to Google Sheets')
-            return
+            return 0
 
-        try:
-            sheet.append_rows(rows)
-        except Exception as exc:  # pragma: no cover - requires live Sheets
-            self.logger.error(f'Failed to append rows to Google Sheets: {exc}')
-            return
+        if self.sheet_mode == 'upsert':
+            rows_written = self._upsert(sheet, sheet_tab, rows, columns)
+            # Re-sending upserted rows is harmless, so only a full success counts.
+            self.rows_confirmed = len(rows) if self.complete else 0
+        else:
+            rows_written = self._append_chunks(sheet, rows, start_chunk)
+            self.rows_confirmed = min(self.chunks_written * self.chunk_rows, len(rows))
+        if self.complete:
+            self.logger.info(f'Exported {rows_written} rows to Google Sheets tab {sheet_tab}')
+        else:
+            self._forget_worksheet(sheet_tab)
+        return rows_written
+
+    def _fail(self, message):
+        self.last_error = message
+        self.logger.error(message)
+
+    def _worksheet(self, sheet_tab):
+        # Handles are shared by every exporter using this client, so repeated exports
+        # (pipelined batches, many sites per process) skip the metadata fetches.
+        handles = _cached_handles(self.gc)
+        sheet = handles.get((self.sheet_id, sheet_tab))
+        if sheet is None:
+            spreadsheet = handles.get(self.sheet_id)
+            if spreadsheet is None:
+                spreadsheet = self._call(self.gc.open_by_key, self.sheet_id, throttle=False)
+                handles[self.sheet_id] = spreadsheet
+            sheet = self._call(spreadsheet.worksheet, sheet_tab, throttle=False)
+            handles[(self.sheet_id, sheet_tab)] = sheet
+        return sheet
+
+    def _forget_worksheet(self, sheet_tab):
+        # A tab that was renamed or deleted fails permanently; re-open it next time.
+        _cached_handles(self.gc).pop((self.sheet_id, sheet_tab), None)
+
+    def _append_chunks(self, sheet, rows, start_chunk=0, on_chunk=None):
+        """Append ``rows`` chunk by chunk and return the number of rows written.
+
+        Stops at the first chunk that fails for good, leaving ``complete`` False.
+        """
+        chunks = [rows[i:i + self.chunk_rows] for i in range(0, len(rows), self.chunk_rows)]
+        rows_written = 0
+        for index in range(start_chunk, len(chunks)):
+            try:
+                response = self._call(sheet.append_rows, chunks[index], resend=False)
+            except Exception as exc:
+                self.append_uncertain = self._may_have_landed(exc)
+                landed = ' (the chunk may have landed; check the tab before resuming)' if self.append_uncertain else ''
+                self._fail(
+                    f'Failed to append rows to Google Sheets at chunk {index + 1}/{len(chunks)} '
+                    f'({rows_written} rows written this run){landed}: {exc}'
+                )
+                return rows_written
+            if on_chunk is not None:
+                on_chunk(index, response)
+            self.chunks_written = index + 1
+            rows_written += len(chunks[index])
+        self.complete = True
+        return rows_written
+
+    @property
+    def index(self) -> SheetIndex:
+        if self._index is None:
+            self._index = SheetIndex(resolve_dedupe_db_path(self.config))
+        return self._index
+
+    def _upsert(self, sheet, sheet_tab, rows, columns):
+        """Update changed cells of known rows in one ``batch_update`` and append the rest.
+
+        Row positions come from the local :class:`SheetIndex`, bootstrapped with a single
+        read of the key columns the first time a tab is upserted. Every chunk that
+        lands is recorded in the index straight away, so re-running an interrupted
+        export updates those rows instead of appending them twice.
+        """
+        key_positions = [columns.index(key) for key in self.config['dedupe_keys']]
+        index = self.index
+        if not index.is_bootstrapped(self.sheet_id, sheet_tab):
+            try:
+                self._bootstrap_index(sheet, sheet_tab, key_positions)
+            except Exception as exc:
+                self._fail(f'Failed to read Google Sheet keys for upsert: {exc}')
+                return 0
+
+        # Later duplicates win, matching what sequential appends would have left behind.
+        by_key = {tuple(row[position] for position in key_positions): row for row in rows}
+        known = index.lookup(self.sheet_id, sheet_tab, list(by_key))
+
+        updates = []
+        updated = []
+        appended_keys = []
+        appends = []
+        for key, row in by_key.items():
+            if key not in known:
+                appended_keys.append(key)
+                appends.append(row)
+                continue
+            row_number, previous = known[key]
+            cells = [
+                {'range': gspread.utils.rowcol_to_a1(row_number, column + 1), 'values': [[value]]}
+                for column, value in enumerate(row)
+                if previous is None or column >= len(previous) or previous[column] != value
+            ]
+            if cells:
+                updates.extend(cells)
+                updated.append((key, row_number, row))
+
+        if updates:
+            try:
+                self._call(sheet.batch_update, updates)
+            except Exception as exc:
+                self._fail(f'Failed to update rows in Google Sheets: {exc}')
+                return 0
+            index.record(self.sheet_id, sheet_tab, updated)
 
-        self.logger.info(f'Exported {len(rows)} rows to Google Sheets tab {sheet_tab}')
+        def record_chunk(chunk_index, response):
+            start = chunk_index * self.chunk_rows
+            chunk_keys = appended_keys[start:start + self.chunk_rows]
+            first_row = self._first_updated_row(response)
+            if first_row is None:
+                # Without the target row we cannot keep the mirror accurate; start over
+                # with a fresh bootstrap on the next run.
+                self.logger.error('Sheets append response had no updatedRange; resetting upsert index')
+                index.reset(self.sheet_id, sheet_tab)
+                return
+            index.record(
+                self.sheet_id,
+                sheet_tab,
+                (
+                    (key, first_row + offset, appends[start + offset])
+                    for offset, key in enumerate(chunk_keys)
+                ),
+            )
+
+        if appends:
+            appended = self._append_chunks(sheet, appends, on_chunk=record_chunk)
+        else:
+            appended = 0
+            self.complete = True
+        if not self.complete:
+            if self.append_uncertain:
+                # Rows of the failed chunk may be on the sheet without being in the index;
+                # bootstrap again next run so they are found and updated, not re-appended.
+                index.reset(self.sheet_id, sheet_tab)
+            return len(updated) + appended
+        self.logger.info(
+            f'Upserted Google Sheets tab {sheet_tab}: {len(updated)} rows updated '
+            f'({len(updates)} cells), {appended} rows appended'
+        )
+        return len(updated) + appended
+
+    def _bootstrap_index(self, sheet, sheet_tab, key_positions):
+        letters = [
+            re.sub(r'\d+', '', gspread.utils.rowcol_to_a1(1, position + 1))
+            for position in key_positions
+        ]
+        value_ranges = self._call(
+            sheet.batch_get, [f'{letter}:{letter}' for letter in letters], throttle=False
+        )
+        columns = [[row[0] if row else '' for row in value_range] for value_range in value_ranges]
+        height = max((len(column) for column in columns), default=0)
+        header = tuple(self.config['dedupe_keys'])
+        entries = []
+        for row_index in range(height):
+            key = tuple(column[row_index] if row_index < len(column) else '' for column in columns)
+            if not any(key) or key == header:
+                continue
+            entries.append((key, row_index + 1))
+        self.index.bootstrap(self.sheet_id, sheet_tab, entries)
+        self.logger.info(f'Bootstrapped upsert index for tab {sheet_tab} with {len(entries)} rows')
+
+    @staticmethod
+    def _first_updated_row(response) -> Optional[int]:
+        updated_range = ((response or {}).get('updates') or {}).get('updatedRange') or ''
+        match = _UPDATED_RANGE_START.search(updated_range)
+        return int(match.group(1)) if match else None
+
+    def _call(self, func, *args, throttle=True, resend=True):
+        # Only writes draw on the request budget; reads have their own, larger quota
+        # and are still retried on 429s below. ``resend=False`` marks calls that are not
+        # safe to repeat (appends), which are retried only when they surely did not apply.
+        for attempt in range(self.max_retries + 1):
+            if throttle:
+                self._budget.acquire()
+            try:
+                return func(*args)
+            except Exception as exc:
+                delay = self._retry_delay(exc, attempt, resend)
+                if delay is None or attempt >= self.max_retries:
+                    raise
+                self.logger.info(
+                    f'Sheets request failed ({exc}); retrying in {delay:.1f}s '
+                    f'(attempt {attempt + 1}/{self.max_retries})'
+                )
+                self._sleep(delay)
+
+    def _retry_delay(self, exc: Exception, attempt: int, resend: bool = True) -> Optional[float]:
+        """Return seconds to wait before retrying ``exc``, or None when it is permanent.
+
+        With ``resend`` False only failures that prove nothing was written are retried:
+        a 429 or a connection that was never opened. A 5xx or a timeout may follow a
+        write that went through, and repeating an append would duplicate its rows.
+        """
+        response = getattr(exc, 'response', None)
+        status = getattr(response, 'status_code', None)
+        if resend:
+            transient = isinstance(exc, (requests.ConnectionError, requests.Timeout))
+            retryable = status in RETRYABLE_STATUS_CODES or transient
+        else:
+            retryable = status == 429 or _unsent(exc)
+        if not retryable:
+            return None
+
+        headers = getattr(response, 'headers', None) or {}
+        retry_after = _parse_retry_after(headers.get('Retry-After'))
+        if retry_after is not None:
+            # Honour the server's hint, but never let a bad header stall the export.
+            return min(retry_after, self.max_backoff)
+        return min(self.max_backoff, 2 ** attempt) + random.uniform(0, 1)
+
+    @staticmethod
+    def _may_have_landed(exc: Exception) -> bool:
+        """Return True when a failed append might still have been applied."""
+        status = getattr(getattr(exc, 'response', None), 'status_code', None)
+        if status is not None:
+            return status >= 500
+        return isinstance(exc, (requests.ConnectionError, requests.Timeout)) and not _unsent(exc)
 
     @staticmethod
     def _prepare_rows(data: Iterable[dict], columns: Optional[List[str]]) -> List[List[str]]:
+        # Missing values become empty cells, as they do in the CSV sink.
         prepared_rows: List[List[str]] = []
         for item in data:
-            if columns:
-                prepared_rows.append([str(item.get(column, '')) for column in columns])
-            else:
-                prepared_rows.append([str(value) for value in item.values()])
+            values = row_values(item, columns) if columns else item.values()
+            prepared_rows.append(['' if value is None else str(value) for value in values])
         return prepared_rows
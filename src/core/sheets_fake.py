@@ -0,0 +1,195 @@
+"""In-process stand-in for the gspread client used by :class:`SheetsExporter`.
+
+Lets tests and benchmarks exercise chunking, quota handling, retries and upserts
+without network access. Only the calls the exporter makes are implemented.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+
+import gspread
+from gspread.utils import a1_to_rowcol, rowcol_to_a1
+
+QUOTA_WINDOW_SECONDS = 60.0
+_COLUMN_RANGE = re.compile(r"^([A-Z]+):\1$")
+
+
+class FakeResponse:
+    """Just enough of ``requests.Response`` for ``gspread.exceptions.APIError``."""
+
+    def __init__(self, status_code, message, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._payload = {"error": {"code": status_code, "message": message, "status": "FAKE"}}
+        self.text = json.dumps(self._payload)
+
+    def json(self):
+        return self._payload
+
+
+def api_error(status_code, message="fake Sheets error", retry_after=None):
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+    return gspread.exceptions.APIError(FakeResponse(status_code, message, headers))
+
+
+class FakeSheetsClient:
+    """Fake ``gspread.Client`` holding spreadsheets in memory.
+
+    ``latency`` seconds are slept on every request. ``quota_per_minute`` enforces a
+    sliding one-minute window and answers excess requests with a 429 carrying
+    ``Retry-After``. ``failure_rate`` makes that fraction of requests fail with a 503.
+    ``fail_next`` queues specific errors. ``clock`` and ``sleep`` can be replaced to
+    run quota scenarios without waiting.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        quota_per_minute=None,
+        failure_rate=0.0,
+        seed=None,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.failure_rate = failure_rate
+        self.clock = clock
+        self.sleep = sleep
+        self.requests = []
+        self._random = random.Random(seed)
+        self._window = deque()
+        self._scripted = deque()
+        self._spreadsheets = {}
+        self._lock = threading.Lock()
+
+    def open_by_key(self, key):
+        self._request("open_by_key")
+        return self._spreadsheets.setdefault(key, FakeSpreadsheet(self, key))
+
+    def fail_next(self, status_code=503, times=1, retry_after=None, method=None, after=0):
+        """Fail ``times`` requests (to ``method`` only, when given) after letting
+        ``after`` matching requests through."""
+        for _ in range(times):
+            self._scripted.append([method, after, api_error(status_code, retry_after=retry_after)])
+
+    def worksheet_rows(self, key, title):
+        """Return a worksheet's cells without counting a request or touching the quota."""
+        spreadsheet = self._spreadsheets.setdefault(key, FakeSpreadsheet(self, key))
+        worksheet = spreadsheet._worksheets.setdefault(title, FakeWorksheet(self, title))
+        return worksheet.rows
+
+    def request_count(self, method=None):
+        return sum(1 for name in self.requests if method is None or name == method)
+
+    def _request(self, method):
+        with self._lock:
+            self.requests.append(method)
+            error = self._scripted_error(method)
+            if error is None:
+                error = self._quota_error()
+            if error is None and self.failure_rate and self._random.random() < self.failure_rate:
+                error = api_error(503, "fake backend unavailable")
+        if self.latency:
+            self.sleep(self.latency)
+        if error is not None:
+            raise error
+
+    def _scripted_error(self, method):
+        skipped = False
+        for index, entry in enumerate(self._scripted):
+            target, after, error = entry
+            if target is not None and target != method:
+                continue
+            if after:
+                entry[1] -= 1
+                skipped = True
+                continue
+            if skipped:
+                break
+            del self._scripted[index]
+            return error
+        return None
+
+    def _quota_error(self):
+        if not self.quota_per_minute:
+            return None
+        now = self.clock()
+        while self._window and self._window[0] <= now - QUOTA_WINDOW_SECONDS:
+            self._window.popleft()
+        if len(self._window) >= self.quota_per_minute:
+            retry_after = max(1, int(self._window[0] + QUOTA_WINDOW_SECONDS - now + 0.999))
+            return api_error(429, "Quota exceeded", retry_after=retry_after)
+        self._window.append(now)
+        return None
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, key):
+        self.client = client
+        self.id = key
+        self._worksheets = {}
+
+    def worksheet(self, title):
+        self.client._request("worksheet")
+        return self._worksheets.setdefault(title, FakeWorksheet(self.client, title))
+
+
+class FakeWorksheet:
+    def __init__(self, client, title, rows=None):
+        self.client = client
+        self.title = title
+        self.rows = [list(row) for row in rows or []]
+
+    def append_rows(self, values, **_kwargs):
+        self.client._request("append_rows")
+        values = [[str(value) for value in row] for row in values]
+        start = len(self.rows) + 1
+        self.rows.extend(values)
+        width = max((len(row) for row in values), default=1)
+        updated_range = f"'{self.title}'!A{start}:{rowcol_to_a1(len(self.rows), width)}"
+        return {"updates": {"updatedRange": updated_range, "updatedRows": len(values)}}
+
+    def batch_update(self, data, **_kwargs):
+        self.client._request("batch_update")
+        cells = 0
+        for entry in data:
+            top, left = a1_to_rowcol(entry["range"].split(":")[0])
+            for row_offset, row in enumerate(entry["values"]):
+                for col_offset, value in enumerate(row):
+                    self._set(top + row_offset, left + col_offset, str(value))
+                    cells += 1
+        return {"totalUpdatedCells": cells}
+
+    def batch_get(self, ranges, **_kwargs):
+        self.client._request("batch_get")
+        results = []
+        for cell_range in ranges:
+            match = _COLUMN_RANGE.match(cell_range)
+            if not match:
+                raise ValueError(f"FakeWorksheet.batch_get only supports whole columns, got {cell_range}")
+            _, column = a1_to_rowcol(f"{match.group(1)}1")
+            values = [
+                [row[column - 1]] if len(row) >= column and row[column - 1] != "" else []
+                for row in self.rows
+            ]
+            # Like the API, trailing empty cells are not returned.
+            while values and not values[-1]:
+                values.pop()
+            results.append(values)
+        return results
+
+    def get_all_values(self, **_kwargs):
+        self.client._request("get_all_values")
+        return [list(row) for row in self.rows]
+
+    def _set(self, row, column, value):
+        while len(self.rows) < row:
+            self.rows.append([])
+        target = self.rows[row - 1]
+        while len(target) < column:
+            target.append("")
+        target[column - 1] = value
@@ -0,0 +1,445 @@
+import csv
+import gzip
+import importlib
+import io
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from .records import DEFAULT_CHANGE_COLUMN, Record
+from .transforms import TransformPipeline
+
+OUTPUT_MODES = ("overwrite", "append")
+OUTPUT_ROTATIONS = ("none", "run", "size")
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def resolve_output_columns(config, data=None):
+    """Return the exported column order, or None when it cannot be known yet.
+
+    Uses ``output.columns`` when configured, otherwise the keys of the first row. With
+    ``delta_export`` enabled the change-type column is always included.
+    """
+    output_cfg = config.get('output', {}) or {}
+    columns = output_cfg.get('columns')
+    if columns is not None:
+        if not isinstance(columns, list) or not all(isinstance(col, str) for col in columns):
+            raise ValueError('output.columns must be a list of column names when provided')
+        columns = list(columns)
+    elif data:
+        columns = list(data[0].keys())
+    else:
+        return None
+
+    if config.get('delta_export'):
+        change_column = output_cfg.get('change_column', DEFAULT_CHANGE_COLUMN)
+        if change_column not in columns:
+            columns.append(change_column)
+    return columns
+
+
+def row_values(row, columns, default=""):
+    """Return ``row``'s values for ``columns``, using the slot fast path for records."""
+    if isinstance(row, Record):
+        return row.values_for(columns, default)
+    return [row.get(column, default) for column in columns]
+
+
+def _require(module, extra):
+    try:
+        return importlib.import_module(module)
+    except ImportError as exc:
+        raise ValueError(
+            f"This output setting requires the optional '{module}' package; "
+            f"install it with: pip install 'web-to-sheets[{extra}]'"
+        ) from exc
+
+
+def _open_text(path, mode, compression):
+    """Open ``path`` in text mode ('r', 'w' or 'a'), transparently (de)compressing."""
+    if compression == 'gzip':
+        return gzip.open(path, f"{mode}t", newline="", encoding="utf-8")
+    if compression == 'zstd':
+        zstandard = _require('zstandard', 'zstd')
+        return zstandard.open(path, f"{mode}t", newline="", encoding="utf-8")
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+def _compressing_writer(raw, compression):
+    """Wrap the binary file ``raw`` so bytes written to it are compressed as one self-contained stream."""
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb')
+    if compression == 'zstd':
+        zstandard = _require('zstandard', 'zstd')
+        return zstandard.ZstdCompressor().stream_writer(raw)
+    return raw
+
+
+class FileSink:
+    """Base class for sinks that stream rows into ``<csv_dir>/<name><suffix>``.
+
+    Rows are written in batches to a temporary file in the output directory and the
+    file is moved into place with ``os.replace`` on ``close()``, so readers only ever
+    see complete files.
+
+    ``output.csv_mode`` selects ``overwrite`` (default) or ``append``; appending keeps
+    earlier runs' rows and writes any header only when the file is new. Appended rows
+    are staged in the temporary file too and added to the end of the live file on
+    ``close()`` (as a new gzip member or zstd frame when compressed), so a run costs
+    its own rows rather than a copy of the file's history.
+    ``output.csv_rotate`` selects ``none`` (default), ``run`` (one
+    ``<name>-<run_id><suffix>`` per run) or ``size``: once the live file reaches
+    ``output.csv_max_bytes`` it is rotated out to ``<name>-<run_id>-<seq><suffix>``
+    and a fresh live file is started. Sizes are bytes on disk, after compression,
+    so an existing live file is measured with a ``stat`` rather than decoded.
+    """
+
+    extension = ""
+    supports_append = True
+    default_batch_rows = 500
+
+    def __init__(self, config, logger, run_id=None):
+        output_cfg = config.get('output', {}) or {}
+        self.config = config
+        self.logger = logger
+        self.run_id = run_id or uuid.uuid4().hex
+        self.directory = Path(output_cfg.get('csv_dir') or '.')
+        self.name = config['name']
+        self.mode = output_cfg.get('csv_mode', 'overwrite')
+        self.rotate = output_cfg.get('csv_rotate', 'none')
+        self.max_bytes = output_cfg.get('csv_max_bytes')
+        self.compression = output_cfg.get('compression', 'none')
+        self.batch_rows = output_cfg.get('batch_rows') or self.default_batch_rows
+        if self.mode not in OUTPUT_MODES:
+            raise ValueError(f"output.csv_mode must be one of {', '.join(OUTPUT_MODES)}")
+        if self.mode == 'append' and not self.supports_append:
+            raise ValueError(f"output.format {output_cfg.get('format')} does not support append mode")
+        if self.rotate not in OUTPUT_ROTATIONS:
+            raise ValueError(f"output.csv_rotate must be one of {', '.join(OUTPUT_ROTATIONS)}")
+        if self.rotate == 'size' and not self.max_bytes:
+            raise ValueError('output.csv_max_bytes is required when output.csv_rotate is size')
+        if self.compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(
+                f"output.compression must be one of {', '.join(COMPRESSION_SUFFIXES)}"
+            )
+
+        self.columns = resolve_output_columns(config)
+        self.rows_written = 0
+        self.paths = []
+        self._tmp_path = None
+        self._segment_open = False
+        self._segment_appends = False
+        self._segment_bytes = 0
+        self._sequence = 0
+
+    @property
+    def suffix(self):
+        return self.extension + COMPRESSION_SUFFIXES[self.compression]
+
+    @property
+    def target_path(self):
+        if self.rotate == 'run':
+            return self.directory / f"{self.name}-{self.run_id}{self.suffix}"
+        return self.directory / f"{self.name}{self.suffix}"
+
+    def write(self, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_rows:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+
+    def close(self):
+        if not self._segment_open:
+            return
+        self._close_stream()
+        self._publish_segment()
+        self.paths.append(self.target_path)
+        self._reset_segment()
+        self.logger.info(f"Output written: {self.target_path}")
+
+    def abort(self):
+        """Drop the in-progress file, leaving previously published files untouched."""
+        if not self._segment_open:
+            return
+        self._close_stream()
+        self._tmp_path.unlink(missing_ok=True)
+        self._reset_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, _exc, _tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    # Format hooks -------------------------------------------------------------
+
+    def _open_stream(self, path, append):
+        raise NotImplementedError
+
+    def _write_rows(self, rows):
+        """Write ``rows`` to the open stream and return the number of bytes added."""
+        raise NotImplementedError
+
+    def _close_stream(self):
+        raise NotImplementedError
+
+    def _check_existing(self, path):
+        """Validate an existing file before appending to it."""
+
+    def _existing_bytes(self, path):
+        """Size of an existing live file, as counted against ``csv_max_bytes``."""
+        return path.stat().st_size
+
+    # Segment handling ---------------------------------------------------------
+
+    def _write_batch(self, rows):
+        if not self._segment_open:
+            if self.columns is None:
+                self.columns = resolve_output_columns(self.config, rows)
+            self._open_segment(resume_existing=not self.paths)
+        self._segment_bytes += self._write_rows(rows)
+        self.rows_written += len(rows)
+        if self.rotate == 'size' and self._segment_bytes >= self.max_bytes:
+            self._rotate_segment()
+
+    def _open_segment(self, resume_existing):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.target_path
+        self._tmp_path = target.with_name(f".{target.name}.{self.run_id}.tmp")
+
+        append = (
+            resume_existing
+            and self.mode == 'append'
+            and self.rotate != 'run'
+            and target.exists()
+            and target.stat().st_size > 0
+        )
+        existing_bytes = self._existing_bytes(target) if append and self.rotate == 'size' else 0
+        if append and self.rotate == 'size' and existing_bytes >= self.max_bytes:
+            self._publish_rotated(target)
+            append = False
+
+        if append:
+            self._check_existing(target)
+        self._segment_bytes = existing_bytes if append else 0
+        # The temporary file only ever holds this run's rows; see _publish_segment.
+        self._open_stream(self._tmp_path, append)
+        self._segment_appends = append
+        self._segment_open = True
+
+    def _publish_segment(self):
+        """Move the finished temporary file into place, or add it to the end of the live file."""
+        if not self._segment_appends:
+            os.replace(self._tmp_path, self.target_path)
+            return
+        # Concatenated gzip members and zstd frames decode as one stream.
+        with open(self._tmp_path, 'rb') as source, open(self.target_path, 'ab') as target:
+            shutil.copyfileobj(source, target)
+        self._tmp_path.unlink()
+
+    def _rotate_segment(self):
+        self._close_stream()
+        if self._segment_appends:
+            self._publish_segment()
+            self._publish_rotated(self.target_path)
+        else:
+            self._publish_rotated(self._tmp_path)
+        self._reset_segment()
+        # Start the next live segment straight away so close() never leaves the
+        # pre-rotation live file (whose rows now live in the rotated file) in place.
+        self._open_segment(resume_existing=False)
+
+    def _publish_rotated(self, source):
+        self._sequence += 1
+        rotated = self.directory / f"{self.name}-{self.run_id}-{self._sequence:03d}{self.suffix}"
+        os.replace(source, rotated)
+        self.paths.append(rotated)
+        self.logger.info(f"Output rotated: {rotated}")
+
+    def _reset_segment(self):
+        self._segment_open = False
+        self._segment_appends = False
+        self._tmp_path = None
+        self._segment_bytes = 0
+
+
+class _TextSink(FileSink):
+    def _open_stream(self, path, append):
+        # Always a fresh file: appended rows are added to the live file on close.
+        self._raw = open(path, "wb")
+        self._handle = _compressing_writer(self._raw, self.compression)
+        if not append:
+            self._segment_bytes += self._write_header()
+
+    def _write_header(self):
+        return 0
+
+    def _write_text(self, text):
+        """Write ``text`` and return the bytes it added on disk."""
+        before = self._raw.tell()
+        self._handle.write(text.encode("utf-8"))
+        if self._handle is not self._raw:
+            # End the compressor's block so the file size tracks what has been written.
+            self._handle.flush()
+        return self._raw.tell() - before
+
+    def _close_stream(self):
+        self._handle.close()
+        self._raw.close()
+        self._handle = self._raw = None
+
+
+class CsvSink(_TextSink):
+    extension = ".csv"
+
+    def _write_header(self):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(self.columns)
+        return self._write_text(buffer.getvalue())
+
+    def _write_rows(self, rows):
+        columns = self.columns
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(row_values(row, columns) for row in rows)
+        return self._write_text(buffer.getvalue())
+
+    def _check_existing(self, path):
+        with _open_text(path, "r", self.compression) as handle:
+            header = next(csv.reader(handle), [])
+        if header != self.columns:
+            raise ValueError(
+                f"Cannot append to {path}: existing header {header} does not match "
+                f"output columns {self.columns}"
+            )
+
+
+class JsonlSink(_TextSink):
+    extension = ".jsonl"
+
+    def _write_rows(self, rows):
+        columns = self.columns
+        text = "".join(
+            json.dumps(
+                dict(zip(columns, row_values(row, columns, None), strict=True)),
+                ensure_ascii=False,
+                default=str,
+            )
+            + "\n"
+            for row in rows
+        )
+        return self._write_text(text)
+
+
+class ParquetSink(FileSink):
+    """Write row groups of ``output.batch_rows`` rows through optional pyarrow.
+
+    The schema is fixed up front rather than inferred from the first batch, so later
+    batches can never conflict with it: columns whose ``transforms`` end in an ``int``
+    or ``float`` cast are int64/float64, and every other column is a string column
+    holding each value's text, as the CSV sink would write it.
+    """
+
+    extension = ".parquet"
+    supports_append = False
+    default_batch_rows = 10000
+    _codecs = {"none": "snappy", "gzip": "gzip", "zstd": "zstd"}
+
+    def __init__(self, config, logger, run_id=None):
+        super().__init__(config, logger, run_id=run_id)
+        self._pa = _require('pyarrow', 'parquet')
+        self._pq = _require('pyarrow.parquet', 'parquet')
+        self._schema = None
+        self._writer = None
+        self._path = None
+        self._pending = []
+        self._numeric = {
+            transform.column: transform.numeric
+            for transform in TransformPipeline.from_config(config).columns
+            if transform.numeric
+        }
+
+    @property
+    def suffix(self):
+        # Parquet compresses column chunks internally, so the file name never changes.
+        return self.extension
+
+    def write(self, rows):
+        # Buffer across write() calls so every row group holds a full batch.
+        for row in rows:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_rows:
+                self._flush_pending()
+
+    def close(self):
+        self._flush_pending()
+        super().close()
+
+    def abort(self):
+        self._pending = []
+        super().abort()
+
+    def _flush_pending(self):
+        if self._pending:
+            rows, self._pending = self._pending, []
+            self._write_batch(rows)
+
+    def _open_stream(self, path, append):
+        self._path = path
+        self._writer = None
+
+    def _write_rows(self, rows):
+        pa = self._pa
+        columns = self.columns
+        values = [row_values(row, columns, None) for row in rows]
+        if self._schema is None:
+            types = {"int": pa.int64(), "float": pa.float64()}
+            self._schema = pa.schema([
+                pa.field(column, types.get(self._numeric.get(column), pa.string())) for column in columns
+            ])
+        data = {}
+        for index, column in enumerate(columns):
+            cells = [row[index] for row in values]
+            if column not in self._numeric:
+                cells = [cell if cell is None or isinstance(cell, str) else str(cell) for cell in cells]
+            data[column] = cells
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(
+                str(self._path), self._schema, compression=self._codecs[self.compression]
+            )
+        before = self._path.stat().st_size
+        self._writer.write_table(pa.table(data, schema=self._schema))
+        return self._path.stat().st_size - before
+
+    def _close_stream(self):
+        if self._writer is not None:
+            self._writer.close()
+        else:
+            # A freshly rotated segment with no rows still needs a valid (empty) file.
+            self._pq.write_table(self._schema.empty_table(), str(self._path))
+        self._writer = None
+
+
+SINKS = {
+    "csv": CsvSink,
+    "jsonl": JsonlSink,
+    "parquet": ParquetSink,
+}
+
+
+def build_sink(config, logger, run_id=None):
+    """Create the file sink selected by ``output.format`` (default ``csv``)."""
+    output_format = (config.get('output', {}) or {}).get('format', 'csv')
+    try:
+        sink_cls = SINKS[output_format]
+    except KeyError:
+        raise ValueError(f"output.format must be one of {', '.join(SINKS)}") from None
+    return sink_cls(config, logger, run_id=run_id)
@@ -0,0 +1,233 @@
+"""Sitemap discovery for sites with ``discovery: sitemap``."""
+import gzip
+import io
+import sqlite3
+import xml.etree.ElementTree as ET
+from contextlib import closing
+from pathlib import Path
+
+from .database import DEFAULT_BUSY_TIMEOUT
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Sitemap indexes may not nest deeper than this (the protocol itself allows one level).
+MAX_SITEMAP_DEPTH = 3
+# Entries are looked up in the lastmod table this many at a time.
+LOOKUP_BATCH = 500
+# SQLite caps bound parameters per statement; stay well below the default limit.
+_SQL_CHUNK = 500
+
+
+def discovery_options(value):
+    """Normalise a config's ``discovery`` value; None when discovery is off.
+
+    Accepts ``sitemap`` or ``{type: sitemap, incremental: bool}``. Raises ValueError
+    for anything else.
+    """
+    if value is None:
+        return None
+    if value == "sitemap":
+        value = {"type": "sitemap"}
+    if not isinstance(value, dict) or value.get("type") != "sitemap":
+        raise ValueError("discovery must be 'sitemap' or a mapping with type: sitemap")
+    unknown = set(value) - {"type", "incremental"}
+    if unknown:
+        raise ValueError(f"discovery has unknown keys: {', '.join(sorted(map(str, unknown)))}")
+    incremental = value.get("incremental", True)
+    if not isinstance(incremental, bool):
+        raise ValueError("discovery.incremental must be a boolean")
+    return {"type": "sitemap", "incremental": incremental}
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def open_sitemap_stream(stream):
+    """Wrap a binary stream, transparently gunzipping ``.xml.gz`` sitemaps."""
+    buffered = stream if hasattr(stream, "peek") else io.BufferedReader(stream)
+    if buffered.peek(2)[:2] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=buffered)
+    return buffered
+
+
+def iter_sitemap_entries(stream):
+    """Yield ``(kind, loc, lastmod)`` for each entry of a sitemap or sitemap index.
+
+    ``kind`` is ``"url"`` or ``"sitemap"``. The document is parsed incrementally and
+    each entry is discarded once yielded, so memory stays flat for 50k-URL sitemaps.
+    """
+    root = None
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if root is None:
+            root = element
+            continue
+        if event != "end":
+            continue
+        kind = _local_name(element.tag)
+        if kind not in ("url", "sitemap"):
+            continue
+        loc = lastmod = None
+        for child in element:
+            name = _local_name(child.tag)
+            if name == "loc":
+                loc = (child.text or "").strip() or None
+            elif name == "lastmod":
+                lastmod = (child.text or "").strip() or None
+        root.clear()
+        if loc:
+            yield kind, loc, lastmod
+
+
+class SitemapLastmods:
+    """Last crawled ``lastmod`` per site and sitemap URL, stored in the dedupe database."""
+
+    def __init__(self, db_path="dedupe.db", busy_timeout=DEFAULT_BUSY_TIMEOUT):
+        self.db_path = Path(db_path).expanduser()
+        self.busy_timeout = busy_timeout
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(str(self.db_path), timeout=self.busy_timeout)
+
+    def init_db(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sitemap_lastmod (
+                    site TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    lastmod TEXT NOT NULL,
+                    PRIMARY KEY (site, url)
+                ) WITHOUT ROWID
+            """)
+
+    def lookup(self, site, urls):
+        """Return ``{url: lastmod}`` for the given URLs that have been recorded."""
+        urls = list(urls)
+        found = {}
+        with closing(self._connect()) as conn:
+            for start in range(0, len(urls), _SQL_CHUNK):
+                chunk = urls[start:start + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(
+                    conn.execute(
+                        f"SELECT url, lastmod FROM sitemap_lastmod WHERE site = ? AND url IN ({placeholders})",
+                        (site, *chunk),
+                    )
+                )
+        return found
+
+    def record(self, site, entries):
+        """Store ``(url, lastmod)`` pairs after a successful crawl."""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sitemap_lastmod (site, url, lastmod) VALUES (?, ?, ?)",
+                ((site, url, lastmod) for url, lastmod in entries),
+            )
+
+
+class SitemapDiscovery:
+    """Turn a site's sitemap URLs into the page URLs to crawl.
+
+    Sitemap indexes are followed and gzipped sitemaps decoded while streaming. Pages
+    outside ``allowed_domains`` or blocked by robots.txt are dropped quietly. With a
+    ``lastmods`` store, pages (and whole child sitemaps) whose ``lastmod`` matches the
+    last successful crawl are skipped; :meth:`commit` records the new values once the
+    run has succeeded, leaving out pages that failed to scrape.
+    """
+
+    def __init__(self, scraper, site, lastmods=None):
+        self.scraper = scraper
+        self.logger = scraper.logger
+        self.site = site
+        self.lastmods = lastmods
+        self.stats = {"listed": 0, "changed": 0, "unchanged": 0, "filtered": 0, "sitemaps_unchanged": 0}
+        self._visited = set()
+        self._failed = []
+        # url -> (lastmod, sitemap it came from), for pages and child sitemaps crawled this run.
+        self._pages = {}
+        self._sitemaps = {}
+
+    def iter_urls(self, sitemap_urls):
+        for sitemap_url in sitemap_urls:
+            yield from self._walk(sitemap_url, 0)
+        stats = self.stats
+        self.logger.info(
+            f"Sitemap discovery: {stats['listed']} URL(s) listed, {stats['changed']} new or changed, "
+            f"{stats['unchanged']} unchanged, {stats['filtered']} filtered by allowed_domains/robots, "
+            f"{stats['sitemaps_unchanged']} unchanged sitemap(s) skipped"
+        )
+        if self._failed and not stats["listed"]:
+            raise RuntimeError(f"All sitemaps failed to load: {', '.join(self._failed[:5])}")
+
+    def up_to_date(self):
+        return not self._failed and self.stats["changed"] == 0
+
+    def _walk(self, sitemap_url, depth):
+        if sitemap_url in self._visited:
+            return
+        self._visited.add(sitemap_url)
+        if not self.scraper._is_url_allowed(sitemap_url):
+            return
+        # Read the whole sitemap (at most 50k entries by the protocol) and close its
+        # response before yielding anything: pages are crawled while this generator is
+        # suspended, and a connection held open across the crawl would stall or time out.
+        try:
+            with closing(self.scraper.open_stream(sitemap_url)) as raw:
+                entries = list(iter_sitemap_entries(open_sitemap_stream(raw)))
+            known = {}
+            if self.lastmods is not None:
+                for start in range(0, len(entries), LOOKUP_BATCH):
+                    batch = entries[start:start + LOOKUP_BATCH]
+                    known.update(self.lastmods.lookup(self.site, (loc for _, loc, _ in batch)))
+        except Exception as exc:
+            self.logger.error(f"Failed to read sitemap {sitemap_url}: {exc}")
+            self._failed.append(sitemap_url)
+            self._invalidate(sitemap_url)
+            return
+        for kind, loc, lastmod in entries:
+            unchanged = lastmod is not None and known.get(loc) == lastmod
+            if kind == "sitemap":
+                if unchanged:
+                    self.stats["sitemaps_unchanged"] += 1
+                elif depth + 1 >= MAX_SITEMAP_DEPTH:
+                    self.logger.error(f"Sitemap nested too deeply; skipping {loc}")
+                else:
+                    self._sitemaps[loc] = (lastmod, sitemap_url)
+                    yield from self._walk(loc, depth + 1)
+                continue
+            self.stats["listed"] += 1
+            if not self.scraper._is_url_allowed(loc, quiet=True):
+                self.stats["filtered"] += 1
+            elif unchanged:
+                self.stats["unchanged"] += 1
+            else:
+                self.stats["changed"] += 1
+                self._pages[loc] = (lastmod, sitemap_url)
+                yield loc
+
+    def _invalidate(self, sitemap_url):
+        # A sitemap with a failed page or child must be walked again next run.
+        while sitemap_url is not None:
+            entry = self._sitemaps.pop(sitemap_url, None)
+            sitemap_url = entry[1] if entry else None
+
+    def mark_failed(self, url):
+        entry = self._pages.pop(url, None)
+        if entry is not None:
+            self._invalidate(entry[1])
+
+    def commit(self):
+        """Record the lastmod of every page and sitemap crawled successfully this run."""
+        if self.lastmods is None:
+            return 0
+        entries = [
+            (url, lastmod)
+            for pending in (self._pages, self._sitemaps)
+            for url, (lastmod, _) in pending.items()
+            if lastmod is not None
+        ]
+        if entries:
+            self.lastmods.record(self.site, entries)
+        return len(entries)
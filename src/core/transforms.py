@@ -0,0 +1,225 @@
+import re
+from datetime import datetime
+
+# Batches smaller than this are cheaper to cast value by value than to round-trip
+# through a NumPy array.
+NUMPY_MIN_BATCH = 256
+_WHITESPACE = re.compile(r"\s+")
+_numpy = None
+
+
+def _load_numpy():
+    """Import NumPy on first use; it is optional and slow to import."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - optional dependency
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def _strip(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def _collapse_whitespace(value):
+    return _WHITESPACE.sub(" ", value).strip() if isinstance(value, str) else value
+
+
+def _lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+def _upper(value):
+    return value.upper() if isinstance(value, str) else value
+
+
+def _cast(cast):
+    def convert(value):
+        if value is None or value == "":
+            return None
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            return None
+
+    return convert
+
+
+def _regex(pattern):
+    compiled = re.compile(pattern)
+
+    def extract(value):
+        if not isinstance(value, str):
+            return value
+        match = compiled.search(value)
+        if match is None:
+            return None
+        return match.group(1) if compiled.groups else match.group(0)
+
+    return extract
+
+
+def _replace(args):
+    if not isinstance(args, list) or len(args) != 2 or not all(isinstance(a, str) for a in args):
+        raise ValueError("replace expects [old, new]")
+    old, new = args
+
+    def replace(value):
+        return value.replace(old, new) if isinstance(value, str) else value
+
+    return replace
+
+
+def _date(fmt, as_datetime=False):
+    if not isinstance(fmt, str) or not fmt:
+        raise ValueError("date/datetime expect a strptime format string")
+
+    def parse(value):
+        if not isinstance(value, str) or not value:
+            return None
+        try:
+            parsed = datetime.strptime(value, fmt)
+        except ValueError:
+            return None
+        return parsed.isoformat() if as_datetime else parsed.date().isoformat()
+
+    return parse
+
+
+def _default(fallback):
+    def apply_default(value):
+        return fallback if value is None or value == "" else value
+
+    return apply_default
+
+
+def _int(value):
+    # Integers and integer strings convert exactly, however large (IDs above 2**53 must
+    # not collide). Accept "12.0" the way a spreadsheet would, but never round "12.5".
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    number = float(value)
+    if not number.is_integer():
+        raise ValueError(value)
+    return int(number)
+
+
+SIMPLE_OPS = {
+    "strip": _strip,
+    "collapse_whitespace": _collapse_whitespace,
+    "lower": _lower,
+    "upper": _upper,
+    "int": _cast(_int),
+    "float": _cast(float),
+}
+PARAM_OPS = {
+    "regex": _regex,
+    "replace": _replace,
+    "date": _date,
+    "datetime": lambda fmt: _date(fmt, as_datetime=True),
+    "default": _default,
+}
+NUMERIC_OPS = ("int", "float")
+
+
+def _compile_op(column, spec):
+    if isinstance(spec, str):
+        if spec not in SIMPLE_OPS:
+            raise ValueError(f"transforms.{column}: unknown transform '{spec}'")
+        return spec, SIMPLE_OPS[spec]
+    if isinstance(spec, dict) and len(spec) == 1:
+        ((name, arg),) = spec.items()
+        if name not in PARAM_OPS:
+            raise ValueError(f"transforms.{column}: unknown transform '{name}'")
+        try:
+            return name, PARAM_OPS[name](arg)
+        except (re.error, TypeError, ValueError) as exc:
+            raise ValueError(f"transforms.{column}.{name}: {exc}") from exc
+    raise ValueError(
+        f"transforms.{column}: entries must be a transform name or a single-key mapping"
+    )
+
+
+class ColumnTransform:
+    def __init__(self, column, specs):
+        if not isinstance(specs, list) or not specs:
+            raise ValueError(f"transforms.{column} must be a non-empty list of transforms")
+        compiled = [_compile_op(column, spec) for spec in specs]
+        self.column = column
+        # A trailing int/float cast can run vectorised over the whole column.
+        self.numeric = compiled[-1][0] if compiled[-1][0] in NUMERIC_OPS else None
+        self.steps = [func for _, func in (compiled[:-1] if self.numeric else compiled)]
+        self.cast = compiled[-1][1] if self.numeric else None
+
+    def apply(self, items):
+        column = self.column
+        present = [item for item in items if column in item]
+        if not present:
+            return
+        values = [item[column] for item in present]
+        for step in self.steps:
+            values = [step(value) for value in values]
+        if self.numeric:
+            values = self._cast_values(values)
+        for item, value in zip(present, values, strict=True):
+            item[column] = value
+
+    def _cast_values(self, values):
+        numpy = _load_numpy() if len(values) >= NUMPY_MIN_BATCH else None
+        if numpy is not None:
+            vectorised = self._numpy_cast(numpy, values)
+            if vectorised is not None:
+                return vectorised
+        return [self.cast(value) for value in values]
+
+    def _numpy_cast(self, numpy, values):
+        if any(value is None or value == "" or isinstance(value, bool) for value in values):
+            return None
+        if self.numeric == "int" and not all(isinstance(value, (str, int)) for value in values):
+            # int64 truncates 1.5 to 1 where _int rejects it, so floats go row by row.
+            return None
+        dtype = numpy.int64 if self.numeric == "int" else numpy.float64
+        try:
+            array = numpy.asarray(values, dtype=dtype)
+        except (TypeError, ValueError, OverflowError):
+            # Mixed or malformed values: let the per-value path decide row by row.
+            return None
+        if array.ndim != 1:
+            return None
+        return array.tolist()
+
+
+class TransformPipeline:
+    """Per-column casts and cleanups from a site's ``transforms:`` section.
+
+    Compiled once per run and applied in place to whole batches of records, so dedupe
+    keys, fingerprints and every sink see normalised values.
+    """
+
+    def __init__(self, spec=None):
+        spec = spec or {}
+        if not isinstance(spec, dict):
+            raise ValueError("transforms must be a mapping of field names to transform lists")
+        self.columns = [ColumnTransform(column, specs) for column, specs in spec.items()]
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get('transforms'))
+
+    def __bool__(self):
+        return bool(self.columns)
+
+    def apply(self, items):
+        for column in self.columns:
+            column.apply(items)
+        return items
@@ -0,0 +1,211 @@
+"""Lazy URL sources for a site's ``urls`` list."""
+import re
+from pathlib import Path
+from urllib.parse import urlsplit
+
+URL_SCHEMES = ("http://", "https://", "file://")
+# Shell-style numeric range: {1..500}, {001..500} (zero padded) or {0..100..10} (step).
+_RANGE = re.compile(r"\{(-?\d+)\.\.(-?\d+)(?:\.\.(\d+))?\}")
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+def has_url_scheme(url):
+    return url.startswith(URL_SCHEMES)
+
+
+def _lazy_product(axes):
+    """Like :func:`itertools.product`, which copies every axis up front, but lazy: ranges are re-iterated."""
+    if not axes:
+        yield ()
+        return
+    for value in axes[0]:
+        for rest in _lazy_product(axes[1:]):
+            yield (value, *rest)
+
+
+class NumberRange:
+    """Inclusive integer range written as ``{start..end}`` or ``{start..end..step}``."""
+
+    def __init__(self, start, end, step=None):
+        self.first, self.last = int(start), int(end)
+        step = 1 if step is None else int(step)
+        if step < 1:
+            raise ValueError(f"URL range step must be at least 1: {{{start}..{end}..{step}}}")
+        self.step = step if self.first <= self.last else -step
+        padded = any(bound.lstrip("-").startswith("0") and len(bound.lstrip("-")) > 1 for bound in (start, end))
+        self.width = max(len(start), len(end)) if padded else 0
+
+    @classmethod
+    def parse(cls, text):
+        match = _RANGE.fullmatch(text.strip())
+        if not match:
+            raise ValueError(f"Expected a range like {{1..100}}: {text!r}")
+        return cls(*match.groups())
+
+    def __iter__(self):
+        for number in range(self.first, self.last + (1 if self.step > 0 else -1), self.step):
+            yield str(number).zfill(self.width) if self.width else str(number)
+
+
+class RangeTemplate:
+    """A URL string with zero or more ``{a..b}`` ranges; the last range varies fastest."""
+
+    def __init__(self, template):
+        self.template = template
+        self.parts = []
+        self.ranges = []
+        position = 0
+        for match in _RANGE.finditer(template):
+            self.parts.append(template[position:match.start()])
+            self.ranges.append(NumberRange(*match.groups()))
+            position = match.end()
+        self.parts.append(template[position:])
+
+    @property
+    def is_literal(self):
+        return not self.ranges
+
+    def __iter__(self):
+        if self.is_literal:
+            yield self.template
+            return
+        parts = self.parts
+        for values in _lazy_product(self.ranges):
+            yield "".join(part for pair in zip(parts, (*values, ""), strict=True) for part in pair)
+
+    def describe(self):
+        return self.template
+
+
+class ParamTemplate:
+    """``template`` with ``{name}`` placeholders filled from the product of ``params``.
+
+    Each parameter is a list of values or a range string such as ``"{1..500}"``;
+    the last parameter varies fastest.
+    """
+
+    def __init__(self, template, params):
+        if not isinstance(template, str) or not template.strip():
+            raise ValueError("urls template must be a non-empty string")
+        if not isinstance(params, dict) or not params:
+            raise ValueError(f"urls template needs a non-empty params mapping: {template}")
+        self.template = template
+        pieces = _PLACEHOLDER.split(template)
+        self.parts, self.names = pieces[0::2], pieces[1::2]
+        missing = sorted(set(self.names) - set(params))
+        if missing:
+            raise ValueError(f"urls template placeholders have no params: {', '.join(missing)}")
+        unused = sorted(set(map(str, params)) - set(self.names))
+        if unused:
+            raise ValueError(f"urls template params are not used in the template: {', '.join(unused)}")
+        self.params = {}
+        for name, values in params.items():
+            if isinstance(values, str):
+                self.params[name] = NumberRange.parse(values)
+            elif isinstance(values, list) and values and all(
+                isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values
+            ):
+                self.params[name] = [str(value) for value in values]
+            else:
+                raise ValueError(f"urls template param '{name}' must be a non-empty list or a range like '{{1..100}}'")
+
+    def __iter__(self):
+        names = list(self.params)
+        for combination in _lazy_product(list(self.params.values())):
+            values = dict(zip(names, combination, strict=True))
+            fills = [values[name] for name in self.names]
+            yield "".join(part for pair in zip(self.parts, (*fills, ""), strict=True) for part in pair)
+
+    def describe(self):
+        return f"{self.template} over {', '.join(self.params)}"
+
+
+class InvalidUrl(str):
+    """A line of a URLs file that is not a URL; ``reason`` says where and why.
+
+    It is yielded in place rather than raised so one bad line fails like any other
+    URL, without ending the crawl of the rest of the file.
+    """
+
+    def __new__(cls, url, reason):
+        self = super().__new__(cls, url)
+        self.reason = reason
+        return self
+
+
+class UrlFile:
+    """A text file with one URL per line, read lazily; blank lines and ``#`` comments are skipped.
+
+    Lines that are not http(s) or file:// URLs are yielded as :class:`InvalidUrl`.
+    Relative paths are resolved from the working directory, like ``output.csv_dir``.
+    """
+
+    def __init__(self, path):
+        if not isinstance(path, str) or not path.strip():
+            raise ValueError("urls file must be a non-empty path string")
+        self.path = Path(path).expanduser()
+
+    def __iter__(self):
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for line_number, line in enumerate(handle, start=1):
+                url = line.strip()
+                if not url or url.startswith("#"):
+                    continue
+                if not has_url_scheme(url):
+                    yield InvalidUrl(url, f"{self.path}:{line_number}: URL must be http(s) or file://: {url}")
+                    continue
+                yield url
+
+    def describe(self):
+        return f"file {self.path}"
+
+
+def compile_url_source(spec):
+    """Return an iterable URL source for one ``urls`` entry.
+
+    Entries are a URL string (optionally with ``{a..b}`` ranges), ``{file: path}``
+    or ``{template: ..., params: {...}}``. Raises ValueError for malformed entries.
+    """
+    if isinstance(spec, str):
+        if not spec.strip():
+            raise ValueError(f"URL entries must be non-empty strings: {spec}")
+        return RangeTemplate(spec)
+    if isinstance(spec, dict):
+        keys = set(spec)
+        if keys == {"file"}:
+            return UrlFile(spec["file"])
+        if keys == {"template", "params"}:
+            return ParamTemplate(spec["template"], spec["params"])
+    raise ValueError(f"URL entries must be strings, {{file: ...}} or {{template: ..., params: ...}}: {spec}")
+
+
+def check_url_template(template, allowed_domains=None):
+    """Return the problems with a URL or template's scheme and host, without expanding it."""
+    if not has_url_scheme(template):
+        return [f"URL must be http(s) or file://: {template}"]
+    if template.startswith("file://"):
+        return []
+    netloc = urlsplit(template).netloc
+    if not netloc:
+        return [f"URL has no host: {template}"]
+    if "{" in netloc:
+        return [f"URL template host must be fixed, not generated: {template}"]
+    allowed = [domain.split(":", 1)[0].lower() for domain in allowed_domains or []]
+    host = netloc.split(":", 1)[0].lower()
+    if allowed and not any(host == domain or host.endswith(f".{domain}") for domain in allowed):
+        return [f"URL template host is not in allowed_domains: {template}"]
+    return []
+
+
+class UrlSources:
+    """The compiled ``urls`` list: iterating yields every URL in order, lazily."""
+
+    def __init__(self, specs):
+        self.sources = [compile_url_source(spec) for spec in specs or []]
+
+    def __iter__(self):
+        for source in self.sources:
+            yield from source
+
+    def describe(self):
+        return ", ".join(source.describe() for source in self.sources)
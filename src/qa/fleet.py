@@ -0,0 +1,254 @@
+"""Validate a whole directory of site configs quickly enough for a pre-deploy gate.
+
+Configs that already passed with the same content, validator version and (when
+checked) demo fixture are skipped via a small JSON cache; the rest are validated
+across a process pool. Results can be rendered as text, JSON or JUnit XML.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from xml.etree import ElementTree
+
+import yaml
+
+from ..core.config import ScrapePlan
+from ..core.jsonpath import MISSING
+from .validator import SchemaValidator
+
+VALIDATION_CACHE_FILE = "validated.json"
+REPORT_FORMATS = ("text", "json", "junit")
+# Below this many configs to check, starting worker processes costs more than it saves.
+INLINE_LIMIT = 16
+
+
+def _fingerprint(content, check_fixtures):
+    salt = f"{SchemaValidator.VERSION}:{int(check_fixtures)}\n"
+    return hashlib.sha256(salt.encode("utf-8") + content).hexdigest()
+
+
+def _file_stamp(path):
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _result(config_path, errors=None, cached=False):
+    return {
+        "site": Path(config_path).stem,
+        "path": str(config_path),
+        "errors": errors or [],
+        "cached": cached,
+        "fingerprint": None,
+        "fixture": None,
+        "duration": 0.0,
+    }
+
+
+def check_fixture(plan, fixture_path):
+    """Return errors for selectors that find nothing in a site's demo fixture."""
+    from bs4 import BeautifulSoup
+
+    try:
+        text = Path(fixture_path).read_text(encoding="utf-8")
+    except OSError:
+        return [f"demo_fixture not found: {fixture_path}"]
+    if plan.format == "json":
+        try:
+            records = plan.item_selector.items(json.loads(text))
+        except ValueError:
+            return [f"demo_fixture is not valid JSON: {fixture_path}"]
+        if not records:
+            return [f"selectors.item matched nothing in {fixture_path}"]
+        return [
+            f"selectors.{field} matched no item in {fixture_path}"
+            for field, path, _, _ in plan.fields
+            if not any(path.value(record) is not MISSING for record in records)
+        ]
+    containers = BeautifulSoup(text, "html.parser").select(plan.item_selector)
+    if not containers:
+        return [f"selectors.item matched nothing in {fixture_path}"]
+    return [
+        f"selectors.{field} matched no item in {fixture_path}"
+        for field, pattern, _, _ in plan.fields
+        if not any(container.select_one(pattern) is not None for container in containers)
+    ]
+
+
+def validate_site_file(config_path, check_fixtures=False, base_dir=None):
+    """Validate one config file and return a result dict.
+
+    Beyond the schema, selectors are compiled and, with ``check_fixtures``, run
+    against the config's ``demo_fixture`` (resolved against ``base_dir``).
+    """
+    started = time.perf_counter()
+    result = _result(config_path)
+    try:
+        content = Path(config_path).read_bytes()
+    except OSError:
+        result["errors"] = [f"Config file not found: {config_path}"]
+        return result
+    result["fingerprint"] = _fingerprint(content, check_fixtures)
+
+    try:
+        config = yaml.safe_load(content)
+    except yaml.YAMLError as e:
+        result["errors"] = [f"YAML parse error: {e}"]
+        return result
+
+    errors = SchemaValidator().validate_config(config)
+    if not errors:
+        try:
+            plan = ScrapePlan(config)
+        except ValueError as exc:
+            errors = [str(exc)]
+        else:
+            fixture = config.get("demo_fixture")
+            if check_fixtures and fixture:
+                fixture_path = Path(fixture)
+                if not fixture_path.is_absolute() and base_dir is not None:
+                    fixture_path = Path(base_dir) / fixture_path
+                result["fixture"] = [str(fixture_path), _file_stamp(fixture_path)]
+                errors = check_fixture(plan, fixture_path)
+
+    result["errors"] = errors
+    result["duration"] = time.perf_counter() - started
+    return result
+
+
+class ValidationCache:
+    """Fingerprints of configs that last passed validation, kept in a JSON file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                entries = json.load(handle)
+        except (OSError, ValueError):
+            entries = {}
+        self.entries = entries if isinstance(entries, dict) else {}
+
+    def is_fresh(self, config_path, fingerprint):
+        entry = self.entries.get(str(config_path))
+        if not entry or entry.get("fingerprint") != fingerprint:
+            return False
+        fixture = entry.get("fixture")
+        return fixture is None or _file_stamp(fixture[0]) == fixture[1]
+
+    def update(self, result):
+        if result["errors"] or result["fingerprint"] is None:
+            self.entries.pop(result["path"], None)
+        else:
+            self.entries[result["path"]] = {"fingerprint": result["fingerprint"], "fixture": result["fixture"]}
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(self.entries, handle)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            return
+
+
+def validate_configs(config_paths, check_fixtures=False, base_dir=None, jobs=None, cache=None):
+    """Validate ``config_paths`` and return one result per path, in order.
+
+    Paths whose fingerprint matches ``cache`` are reported as cached passes without
+    being parsed. ``jobs`` caps the worker processes (default: CPU count).
+    """
+    config_paths = [str(path) for path in config_paths]
+    results = {}
+    stale = []
+    for config_path in config_paths:
+        if cache is not None:
+            try:
+                fingerprint = _fingerprint(Path(config_path).read_bytes(), check_fixtures)
+            except OSError:
+                fingerprint = None
+            if fingerprint is not None and cache.is_fresh(config_path, fingerprint):
+                results[config_path] = _result(config_path, cached=True)
+                continue
+        stale.append(config_path)
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(stale) > INLINE_LIMIT:
+        workers = min(jobs, len(stale))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            checked = list(
+                pool.map(
+                    validate_site_file,
+                    stale,
+                    repeat(check_fixtures),
+                    repeat(base_dir),
+                    chunksize=max(1, len(stale) // (workers * 4)),
+                )
+            )
+    else:
+        checked = [validate_site_file(config_path, check_fixtures, base_dir) for config_path in stale]
+
+    for config_path, result in zip(stale, checked, strict=True):
+        results[config_path] = result
+        if cache is not None:
+            cache.update(result)
+    if cache is not None and stale:
+        cache.save()
+    return [results[config_path] for config_path in config_paths]
+
+
+def render_report(results, report_format="text"):
+    if report_format == "json":
+        return json.dumps(
+            {
+                "valid": sum(1 for result in results if not result["errors"]),
+                "invalid": sum(1 for result in results if result["errors"]),
+                "cached": sum(1 for result in results if result["cached"]),
+                "sites": [
+                    {
+                        "site": result["site"],
+                        "path": result["path"],
+                        "valid": not result["errors"],
+                        "cached": result["cached"],
+                        "errors": result["errors"],
+                    }
+                    for result in results
+                ],
+            },
+            indent=2,
+        )
+    if report_format == "junit":
+        suite = ElementTree.Element(
+            "testsuite",
+            name="validate-all",
+            tests=str(len(results)),
+            failures=str(sum(1 for result in results if result["errors"])),
+            time=f"{sum(result['duration'] for result in results):.3f}",
+        )
+        for result in results:
+            case = ElementTree.SubElement(
+                suite, "testcase", classname="sites", name=result["site"], time=f"{result['duration']:.3f}"
+            )
+            if result["errors"]:
+                failure = ElementTree.SubElement(
+                    case, "failure", message=f"{len(result['errors'])} validation error(s)"
+                )
+                failure.text = "\n".join(result["errors"])
+        return ElementTree.tostring(suite, encoding="unicode", xml_declaration=True)
+    if report_format != "text":
+        raise ValueError(f"Unknown report format: {report_format}")
+
+    lines = []
+    for result in results:
+        if result["errors"]:
+            lines.append(f"{result['site']}: Invalid")
+            lines.extend(f"- {error}" for error in result["errors"])
+        else:
+            lines.append(f"{result['site']}: Valid")
+    return "\n".join(lines)
@@ -0,0 +1,358 @@
+"""Offline load tests: crawl synthetic listings from a local fixture server through the real pipeline.
+
+``ws loadtest <site>`` turns the site's ``demo_fixture`` into as many paginated
+listing pages as asked for, serves them from 127.0.0.1 with injected latency, 503s
+and 429s, and runs ``run_site`` against that server with Google Sheets replaced by
+:class:`~src.core.sheets_fake.FakeSheetsClient`. Unlike ``--demo``, this exercises
+robots.txt, the rate limiter, retries and pagination.
+"""
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+LISTING_PATH = "/list"
+ROBOTS_TXT = "User-agent: *\nDisallow: /private/\n"
+LOADTEST_SHEET_ID = "loadtest"
+# Stand-ins for the page numbers in the rendered fixture; replaced per request.
+_PAGE = "__ws_page__"
+_NEXT = "__ws_next__"
+
+
+class SyntheticListing:
+    """Paginated listing pages generated from a site's ``demo_fixture``.
+
+    Page ``n`` repeats the fixture's items with every text and link suffixed by ``n``,
+    so rows stay unique across pages and dedupe keeps them all. For ``next_link``
+    sites the fixture's next link points at page ``n + 1`` and is dropped on the last
+    page. Raises ValueError when the fixture cannot be paginated this way.
+    """
+
+    def __init__(self, fixture_html, config, pages):
+        from bs4 import BeautifulSoup
+        from bs4.element import NavigableString
+
+        if config.get("format", "html") != "html":
+            raise ValueError("ws loadtest supports HTML sites only")
+        if pages < 1:
+            raise ValueError("--pages must be at least 1")
+        self.pages = pages
+        pagination = config.get("pagination") or {}
+        self.param = pagination.get("param") if pagination.get("type") == "query_param" else "page"
+
+        soup = BeautifulSoup(fixture_html, "html.parser")
+        items = soup.select((config.get("selectors") or {}).get("item", ""))
+        if not items:
+            raise ValueError("demo_fixture has no elements matching selectors.item")
+        for item in items:
+            for element in [item, *item.find_all(True)]:
+                for name, value in element.attrs.items():
+                    if name not in ("class", "id", "style") and isinstance(value, str) and value:
+                        element[name] = f"{value}#p{_PAGE}"
+            for text in list(item.find_all(string=True)):
+                if text.strip() and type(text) is NavigableString:
+                    text.replace_with(f"{text.rstrip()} [p{_PAGE}]")
+
+        self.template = self.last_template = str(soup)
+        if pagination.get("type") == "next_link":
+            next_link = soup.select_one(pagination.get("next_selector", ""))
+            if next_link is None:
+                raise ValueError("demo_fixture has no element matching pagination.next_selector")
+            next_link["href"] = f"{LISTING_PATH}?page={_NEXT}"
+            self.template = str(soup)
+            next_link.decompose()
+            self.last_template = str(soup)
+
+    def render(self, page):
+        """Return page ``page`` as UTF-8 bytes, or None outside ``1..pages``."""
+        if not 1 <= page <= self.pages:
+            return None
+        template = self.last_template if page == self.pages else self.template
+        return template.replace(_NEXT, str(page + 1)).replace(_PAGE, str(page)).encode("utf-8")
+
+
+class FixtureServer:
+    """Serve a :class:`SyntheticListing` and ``/robots.txt`` on 127.0.0.1 from a background thread.
+
+    Listing requests wait ``latency`` seconds (plus up to ``jitter``), then
+    ``throttle_rate`` of them are answered with 429 and ``Retry-After`` and
+    ``error_rate`` with 503. Counters are kept in :attr:`stats`.
+    """
+
+    def __init__(self, listing, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, seed=None):
+        for name, rate in (("error_rate", error_rate), ("throttle_rate", throttle_rate)):
+            if not 0 <= rate <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
+        if latency < 0 or jitter < 0:
+            raise ValueError("latency and jitter must not be negative")
+        self.listing = listing
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.stats = {"requests": 0, "pages": 0, "throttled": 0, "errors": 0, "not_found": 0, "robots": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._http = None
+
+    def _count(self, key):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats[key] += 1
+
+    def _draw(self):
+        # One draw per request: the first slice of [0, 1) throttles, the next errors.
+        with self._lock:
+            roll = self._random.random()
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if roll < self.throttle_rate:
+            return delay, 429
+        if roll < self.throttle_rate + self.error_rate:
+            return delay, 503
+        return delay, 200
+
+    def start(self):
+        """Start serving and return the base URL."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlsplit(self.path)
+                if parsed.path == "/robots.txt":
+                    server._count("robots")
+                    self._send(200, ROBOTS_TXT.encode("utf-8"), "text/plain")
+                    return
+                body = None
+                if parsed.path == LISTING_PATH:
+                    page = dict(parse_qsl(parsed.query)).get(server.listing.param, "1")
+                    body = server.listing.render(int(page)) if page.isdigit() else None
+                if body is None:
+                    server._count("not_found")
+                    self._send(404, b"not found", "text/plain")
+                    return
+                delay, status = server._draw()
+                if delay:
+                    time.sleep(delay)
+                if status == 429:
+                    server._count("throttled")
+                    self._send(429, b"slow down", "text/plain", {"Retry-After": "1"})
+                elif status == 503:
+                    server._count("errors")
+                    self._send(503, b"unavailable", "text/plain")
+                else:
+                    server._count("pages")
+                    self._send(200, body, "text/html; charset=utf-8")
+
+            def _send(self, status, body, content_type, headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_args):
+                pass
+
+        self._http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._http.daemon_threads = True
+        threading.Thread(target=self._http.serve_forever, name="ws-loadtest-http", daemon=True).start()
+        return f"http://127.0.0.1:{self._http.server_address[1]}"
+
+    def stop(self):
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http = None
+
+
+def timed_session():
+    """Return a ``requests.Session`` that records the duration of every listing request."""
+    import requests
+
+    class TimedSession(requests.Session):
+        def __init__(self):
+            super().__init__()
+            self.latencies = []
+            self._lock = threading.Lock()
+
+        def request(self, method, url, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return super().request(method, url, *args, **kwargs)
+            finally:
+                if urlsplit(url).path == LISTING_PATH:
+                    with self._lock:
+                        self.latencies.append(time.perf_counter() - started)
+
+    return TimedSession()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of ``values``; None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(fraction * len(ordered) + 0.999999) - 1))
+    return ordered[index]
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process and its finished children, or None if unknown."""
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is in bytes on macOS and KiB elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class LoadTestLogger:
+    """Collects a run's log lines instead of writing them, keeping the errors for the report."""
+
+    def __init__(self):
+        self.errors = []
+
+    def info(self, *_args, **_kwargs):
+        pass
+
+    def debug(self, *_args, **_kwargs):
+        pass
+
+    def warning(self, *_args, **_kwargs):
+        pass
+
+    def error(self, message, *_args, **_kwargs):
+        self.errors.append(message)
+
+
+def loadtest_config(config, base_url, pages, workdir, rps=None):
+    """Return ``config`` pointed at the fixture server, with its state kept under ``workdir``."""
+    from ..core.config import CompiledConfig
+
+    pagination = config.get("pagination") or {}
+    pagination_type = pagination.get("type", "none")
+    listing_url = f"{base_url}{LISTING_PATH}"
+    if pagination_type == "query_param":
+        urls = [listing_url]
+        pagination = {"type": "query_param", "param": pagination["param"], "start": 1, "max_pages": pages}
+    elif pagination_type == "next_link":
+        urls = [listing_url]
+        pagination = {"type": "next_link", "next_selector": pagination["next_selector"], "max_pages": pages}
+    else:
+        # Unpaginated sites get one start URL per page instead.
+        urls = [f"{listing_url}?page={{1..{pages}}}"]
+        pagination = {"type": "none"}
+    output = dict(config.get("output") or {})
+    output["csv_dir"] = str(Path(workdir) / "out")
+    changes = {
+        "urls": urls,
+        "pagination": pagination,
+        "allowed_domains": ["127.0.0.1"],
+        "respect_robots": True,
+        "discovery": None,
+        # Detail links in the fixture point at the live site.
+        "follow": None,
+        "dedupe_db_path": str(Path(workdir) / "dedupe.db"),
+        "output": output,
+    }
+    if rps is not None:
+        changes["rate_limit"] = {"rps": rps, "burst": max(1, int(rps))}
+    if isinstance(config, CompiledConfig):
+        return config.replace(**changes)
+    return {**config, **changes}
+
+
+def run_loadtest(
+    config,
+    fixture_html,
+    runner,
+    pages=50,
+    latency=0.05,
+    jitter=0.0,
+    error_rate=0.0,
+    throttle_rate=0.0,
+    rps=None,
+    seed=None,
+):
+    """Serve synthetic pages, run ``runner`` against them and return a report dict.
+
+    ``runner(config, warm, exporter_options, logger)`` runs the site and returns its exit
+    code; the CLI passes a wrapper around ``run_site``.
+    """
+    from ..core.service import WarmState
+    from ..core.sheets_fake import FakeSheetsClient
+
+    listing = SyntheticListing(fixture_html, config, pages)
+    server = FixtureServer(
+        listing, latency=latency, jitter=jitter, error_rate=error_rate, throttle_rate=throttle_rate, seed=seed
+    )
+    session = timed_session()
+
+    class LoadTestState(WarmState):
+        def session(self, site):
+            return session
+
+    client = FakeSheetsClient()
+    logger = LoadTestLogger()
+    base_url = server.start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="ws-loadtest-") as workdir:
+            site_config = loadtest_config(config, base_url, pages, workdir, rps=rps)
+            started = time.perf_counter()
+            exit_code = runner(
+                site_config, LoadTestState(), {"client": client, "sheet_id": LOADTEST_SHEET_ID}, logger
+            )
+            elapsed = time.perf_counter() - started
+    finally:
+        server.stop()
+        session.close()
+
+    sheet_tab = (config.get("output") or {}).get("sheet_tab") or "Sheet1"
+    rows = len(client.worksheet_rows(LOADTEST_SHEET_ID, sheet_tab))
+    latencies = session.latencies
+    return {
+        "exit_code": exit_code,
+        "elapsed_seconds": elapsed,
+        "pages": server.stats["pages"],
+        "rows": rows,
+        "pages_per_second": server.stats["pages"] / elapsed if elapsed else 0.0,
+        "rows_per_second": rows / elapsed if elapsed else 0.0,
+        "fetch_latency": {name: percentile(latencies, fraction) for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))},
+        "requests": len(latencies),
+        "server": dict(server.stats),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "errors": logger.errors,
+    }
+
+
+def format_report(site, report):
+    def millis(value):
+        return "n/a" if value is None else f"{value * 1000:.1f} ms"
+
+    latency = report["fetch_latency"]
+    server = report["server"]
+    rss = report["peak_rss_bytes"]
+    lines = [
+        f"Load test: {site} (exit code {report['exit_code']})",
+        f"  elapsed:        {report['elapsed_seconds']:.2f} s",
+        f"  pages:          {report['pages']} ({report['pages_per_second']:.1f}/s)",
+        f"  rows exported:  {report['rows']} ({report['rows_per_second']:.1f}/s)",
+        f"  fetch latency:  p50 {millis(latency['p50'])}, p95 {millis(latency['p95'])}, p99 {millis(latency['p99'])}"
+        f" over {report['requests']} request(s)",
+        f"  injected:       {server['throttled']} x 429, {server['errors']} x 503",
+        f"  robots.txt:     fetched {server['robots']} time(s)",
+        f"  peak RSS:       {'n/a' if rss is None else f'{rss / (1024 * 1024):.1f} MiB'}",
+    ]
+    if report["errors"]:
+        lines.append(f"  errors logged:  {len(report['errors'])}, first: {report['errors'][0]}")
+    return "\n".join(lines)
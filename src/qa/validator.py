@@ -2,8 +2,24 @@ import os
 
 import yaml
 
+from ..core.follow import follow_options
+from ..core.jsonpath import JsonPath
+from ..core.schedule import Schedule
+from ..core.sitemap import discovery_options
+from ..core.transforms import TransformPipeline
+from ..core.urls import (
+    ParamTemplate,
+    RangeTemplate,
+    check_url_template,
+    compile_url_source,
+    has_url_scheme,
+)
+
 
 class SchemaValidator:
+    # Bump whenever a rule changes so cached compiled configs are re-validated.
+    VERSION = 7
+
     def __init__(self):
         self.errors = []
 
@@ -22,6 +38,12 @@ class SchemaValidator:
             self.errors.append(f"YAML parse error: {e}")
             return list(self.errors)
 
+        return self.validate_config(config)
+
+    def validate_config(self, config):
+        """Validate an already parsed config mapping and return the list of errors."""
+        self.errors = []
+
         if not isinstance(config, dict):
             self.errors.append("Config must be a mapping of keys to values")
             return list(self.errors)
@@ -38,6 +60,10 @@ class SchemaValidator:
         if "urls" in config and (not isinstance(config["urls"], list) or len(config["urls"]) < 1):
             self.errors.append("urls must be a non-empty list")
 
+        page_format = config.get("format", "html")
+        if page_format not in ("html", "json"):
+            self.errors.append("format must be html or json")
+
         selectors = config.get("selectors")
         selector_map = selectors if isinstance(selectors, dict) else None
         if selectors is not None:
@@ -53,9 +79,38 @@ class SchemaValidator:
                     self.errors.append("selectors keys must be non-empty strings")
                 if any(not isinstance(v, str) or not v.strip() for v in selectors.values()):
                     self.errors.append("selectors values must be non-empty CSS selector strings")
+                elif page_format == "json":
+                    for field, path in selectors.items():
+                        try:
+                            JsonPath(path)
+                        except ValueError as exc:
+                            self.errors.append(f"selectors.{field}: {exc}")
                 if "dedupe_keys" in config and not all(k in selectors for k in config["dedupe_keys"]):
                     self.errors.append("dedupe_keys must reference existing selector fields")
 
+        try:
+            follow = follow_options(config.get("follow"))
+        except ValueError as exc:
+            self.errors.append(str(exc))
+            follow = None
+        if follow is not None and selector_map is not None:
+            if follow["field"] not in selector_map or follow["field"] == "item":
+                self.errors.append("follow.field must reference a selector field")
+            if any(field in selector_map for field in follow["selectors"]):
+                self.errors.append("follow.selectors must not reuse a selector field name")
+            # Detail-page fields can be transformed and exported like listing fields.
+            selector_map = {**selector_map, **follow["selectors"]}
+
+        transforms = config.get("transforms")
+        if transforms is not None:
+            try:
+                TransformPipeline(transforms)
+            except ValueError as exc:
+                self.errors.append(str(exc))
+            else:
+                if selector_map and any(field not in selector_map for field in transforms):
+                    self.errors.append("transforms must reference selector field names")
+
         dedupe_keys = config.get("dedupe_keys")
         if dedupe_keys is not None:
             if not isinstance(dedupe_keys, list) or not dedupe_keys:
@@ -67,14 +122,32 @@ class SchemaValidator:
         if min_rows is not None and (not isinstance(min_rows, int) or min_rows < 0):
             self.errors.append("min_rows must be a non-negative integer")
 
+        dedupe_ttl_days = config.get("dedupe_ttl_days")
+        if dedupe_ttl_days is not None and (
+            isinstance(dedupe_ttl_days, bool)
+            or not isinstance(dedupe_ttl_days, (int, float))
+            or dedupe_ttl_days <= 0
+        ):
+            self.errors.append("dedupe_ttl_days must be a positive number when provided")
+
+        parse_workers = config.get("parse_workers")
+        if parse_workers is not None and (
+            isinstance(parse_workers, bool) or not isinstance(parse_workers, int) or parse_workers < 1
+        ):
+            self.errors.append("parse_workers must be an integer >= 1 when provided")
+
+        delta_export = config.get("delta_export")
+        if delta_export is not None and not isinstance(delta_export, bool):
+            self.errors.append("delta_export must be a boolean when provided")
+
         pagination = config.get("pagination")
         if pagination is not None:
             if not isinstance(pagination, dict):
                 self.errors.append("pagination must be a mapping with pagination settings")
             else:
                 pagination_type = pagination.get("type")
-                if pagination_type not in ["query_param", "next_link", "none"]:
-                    self.errors.append("pagination.type must be query_param, next_link, or none")
+                if pagination_type not in ["query_param", "next_link", "cursor", "none"]:
+                    self.errors.append("pagination.type must be query_param, next_link, cursor, or none")
                 if pagination_type == "query_param":
                     param = pagination.get("param")
                     if not isinstance(param, str) or not param.strip():
@@ -95,9 +168,38 @@ class SchemaValidator:
                         or not pagination["next_selector"].strip()
                     ):
                         self.errors.append("pagination.next_selector must be a non-empty string")
+                    elif page_format == "json":
+                        try:
+                            JsonPath(pagination["next_selector"])
+                        except ValueError as exc:
+                            self.errors.append(f"pagination.next_selector: {exc}")
                     max_pages = pagination.get("max_pages")
                     if max_pages is not None and (not isinstance(max_pages, int) or max_pages < 1):
                         self.errors.append("pagination.max_pages must be an integer >= 1 when provided")
+                elif pagination_type == "cursor":
+                    if page_format != "json":
+                        self.errors.append("pagination cursor requires format: json")
+                    param = pagination.get("param")
+                    if not isinstance(param, str) or not param.strip():
+                        self.errors.append("pagination cursor requires a non-empty param")
+                    cursor_path = pagination.get("cursor_path")
+                    if not isinstance(cursor_path, str) or not cursor_path.strip():
+                        self.errors.append("pagination cursor requires a non-empty cursor_path")
+                    else:
+                        try:
+                            JsonPath(cursor_path)
+                        except ValueError as exc:
+                            self.errors.append(f"pagination.cursor_path: {exc}")
+                    max_pages = pagination.get("max_pages")
+                    if max_pages is not None and (not isinstance(max_pages, int) or max_pages < 1):
+                        self.errors.append("pagination.max_pages must be an integer >= 1 when provided")
+                stop_when_seen = pagination.get("stop_when_seen")
+                if stop_when_seen is not None and not isinstance(stop_when_seen, bool) and (
+                    not isinstance(stop_when_seen, int) or stop_when_seen < 1
+                ):
+                    self.errors.append(
+                        "pagination.stop_when_seen must be a boolean or an integer >= 1 when provided"
+                    )
 
         rate_limit = config.get("rate_limit")
         if rate_limit is not None:
@@ -127,17 +229,93 @@ class SchemaValidator:
             csv_dir = config["output"].get("csv_dir")
             if csv_dir is not None and not isinstance(csv_dir, str):
                 self.errors.append("output.csv_dir must be a string path when provided")
+            csv_mode = config["output"].get("csv_mode", "overwrite")
+            csv_rotate = config["output"].get("csv_rotate", "none")
+            if csv_mode not in ("overwrite", "append"):
+                self.errors.append("output.csv_mode must be overwrite or append")
+            if csv_rotate not in ("none", "run", "size"):
+                self.errors.append("output.csv_rotate must be none, run, or size")
+            elif csv_rotate == "run" and csv_mode == "append":
+                self.errors.append("output.csv_mode append cannot be combined with csv_rotate run")
+            output_format = config["output"].get("format", "csv")
+            if output_format not in ("csv", "jsonl", "parquet"):
+                self.errors.append("output.format must be csv, jsonl, or parquet")
+            elif output_format == "parquet" and csv_mode == "append":
+                self.errors.append("output.format parquet does not support csv_mode append")
+            compression = config["output"].get("compression", "none")
+            if compression not in ("none", "gzip", "zstd"):
+                self.errors.append("output.compression must be none, gzip, or zstd")
+            batch_rows = config["output"].get("batch_rows")
+            if batch_rows is not None and (
+                isinstance(batch_rows, bool) or not isinstance(batch_rows, int) or batch_rows < 1
+            ):
+                self.errors.append("output.batch_rows must be an integer >= 1 when provided")
+            csv_max_bytes = config["output"].get("csv_max_bytes")
+            if csv_rotate == "size" and csv_max_bytes is None:
+                self.errors.append("output.csv_max_bytes is required when csv_rotate is size")
+            if csv_max_bytes is not None and (
+                isinstance(csv_max_bytes, bool) or not isinstance(csv_max_bytes, int) or csv_max_bytes < 1
+            ):
+                self.errors.append("output.csv_max_bytes must be an integer >= 1 when provided")
             sheet_tab = config["output"].get("sheet_tab")
             if sheet_tab is not None and (not isinstance(sheet_tab, str) or not sheet_tab.strip()):
                 self.errors.append("output.sheet_tab must be a non-empty string when provided")
+            sheet_mode = config["output"].get("sheet_mode", "append")
+            if sheet_mode not in ("append", "upsert"):
+                self.errors.append("output.sheet_mode must be one of append, upsert")
+            elif sheet_mode == "upsert":
+                if not config.get("delta_export"):
+                    self.errors.append("output.sheet_mode upsert requires delta_export: true")
+                upsert_columns = config["output"].get("columns")
+                if not isinstance(upsert_columns, list) or not all(
+                    key in upsert_columns for key in config.get("dedupe_keys") or []
+                ):
+                    self.errors.append("output.sheet_mode upsert requires output.columns to include every dedupe key")
+            sheets = config["output"].get("sheets")
+            if sheets is not None:
+                if not isinstance(sheets, dict):
+                    self.errors.append("output.sheets must be a mapping when provided")
+                else:
+                    for key in ("chunk_rows", "max_retries"):
+                        value = sheets.get(key)
+                        minimum = 1 if key == "chunk_rows" else 0
+                        if value is not None and (
+                            isinstance(value, bool) or not isinstance(value, int) or value < minimum
+                        ):
+                            self.errors.append(f"output.sheets.{key} must be an integer >= {minimum}")
+                    pipeline = sheets.get("pipeline")
+                    if pipeline is not None and not isinstance(pipeline, bool):
+                        self.errors.append("output.sheets.pipeline must be a boolean")
+                    queue_batches = sheets.get("queue_batches")
+                    if queue_batches is not None and (
+                        isinstance(queue_batches, bool) or not isinstance(queue_batches, int) or queue_batches < 1
+                    ):
+                        self.errors.append("output.sheets.queue_batches must be an integer >= 1")
+                    for key in ("requests_per_minute", "max_backoff"):
+                        value = sheets.get(key)
+                        if value is not None and (
+                            isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0
+                        ):
+                            self.errors.append(f"output.sheets.{key} must be a positive number")
+            change_column = config["output"].get("change_column")
+            if config.get("delta_export") and change_column is None:
+                change_column = "change_type"
             columns = config["output"].get("columns")
             if columns is not None:
                 if not isinstance(columns, list) or not all(isinstance(column, str) for column in columns):
                     self.errors.append("output.columns must be a list of strings when provided")
                 elif len(set(columns)) != len(columns):
                     self.errors.append("output.columns must not contain duplicates")
-                elif selector_map and any(column not in selector_map for column in columns):
+                elif selector_map and any(
+                    column not in selector_map and column != change_column for column in columns
+                ):
                     self.errors.append("output.columns must reference selector field names")
+            if change_column is not None and (
+                not isinstance(change_column, str) or not change_column.strip()
+            ):
+                self.errors.append("output.change_column must be a non-empty string when provided")
+            elif selector_map and change_column in selector_map:
+                self.errors.append("output.change_column must not reuse a selector field name")
 
         demo_fixture = config.get("demo_fixture")
         if demo_fixture is not None and not isinstance(demo_fixture, str):
@@ -148,22 +326,36 @@ class SchemaValidator:
             if not isinstance(allowed_domains, list) or not all(isinstance(d, str) for d in allowed_domains):
                 self.errors.append("allowed_domains must be a list of domain strings")
 
+        try:
+            discovery_options(config.get("discovery"))
+        except ValueError as exc:
+            self.errors.append(str(exc))
+
+        schedule = config.get("schedule")
+        if schedule is not None:
+            try:
+                Schedule.from_config(schedule)
+            except ValueError as exc:
+                self.errors.append(str(exc))
+
         respect_robots = config.get("respect_robots")
         if respect_robots is not None and not isinstance(respect_robots, bool):
             self.errors.append("respect_robots must be a boolean when provided")
 
-        # URLs must be http(s) or file://
+        # URLs must be http(s) or file://; generated URLs are checked by template, unexpanded
         if "urls" in config and isinstance(config["urls"], list):
-            for url in config["urls"]:
-                if not isinstance(url, str) or not url.strip():
-                    self.errors.append(f"URL entries must be non-empty strings: {url}")
+            domains = allowed_domains if isinstance(allowed_domains, list) else None
+            for spec in config["urls"]:
+                try:
+                    source = compile_url_source(spec)
+                except ValueError as exc:
+                    self.errors.append(str(exc))
                     continue
-                if not (
-                    url.startswith("http://")
-                    or url.startswith("https://")
-                    or url.startswith("file://")
-                ):
-                    self.errors.append(f"URL must be http(s) or file://: {url}")
+                if isinstance(source, RangeTemplate) and source.is_literal:
+                    if not has_url_scheme(spec):
+                        self.errors.append(f"URL must be http(s) or file://: {spec}")
+                elif isinstance(source, (RangeTemplate, ParamTemplate)):
+                    self.errors.extend(check_url_template(source.template, domains))
 
         return list(self.errors)
 
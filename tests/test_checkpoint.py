@@ -0,0 +1,108 @@
+from src import cli
+from src.core.checkpoint import CrawlCheckpoint, crawl_fingerprint
+from src.core.scraper import Scraper
+
+
+class StubLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, message, *_args, **_kwargs):
+        self.messages.append(message)
+
+    def error(self, message, *_args, **_kwargs):
+        self.messages.append(message)
+
+    def debug(self, *_args, **_kwargs):
+        pass
+
+
+def _write_pages(pages_dir, count):
+    pages_dir.mkdir(exist_ok=True)
+    for page in range(1, count + 1):
+        next_link = f"<a class='next' href='page{page + 1}.html'>next</a>" if page < count else ""
+        rows = "".join(
+            f"<div class='row'><span class='id'>p{page}-{row}</span></div>" for row in range(2)
+        )
+        (pages_dir / f"page{page}.html").write_text(f"<html><body>{rows}{next_link}</body></html>")
+
+
+def _site_config(pages_dir, db_path):
+    return {
+        "name": "example",
+        "urls": [(pages_dir / "page1.html").as_uri()],
+        "selectors": {"item": ".row", "id": ".id"},
+        "pagination": {"type": "next_link", "next_selector": "a.next", "max_pages": 10},
+        "rate_limit": {"rps": 1000, "burst": 1000},
+        "dedupe_keys": ["id"],
+        "output": {"sheet_tab": "Data", "columns": ["id"], "csv_dir": str(db_path.parent / "out")},
+        "min_rows": 1,
+        "dedupe_db_path": str(db_path),
+    }
+
+
+def test_checkpoint_round_trip_and_clear(tmp_path):
+    checkpoint = CrawlCheckpoint(tmp_path / "dedupe.db")
+    checkpoint.start("example", "run-1", "hash")
+    checkpoint.save_page("example", {"url_index": 0, "next_url": "b"}, [{"id": "1"}])
+    checkpoint.save_page("example", {"url_index": 0, "next_url": "c"}, [{"id": "2"}, {"id": "3"}])
+
+    saved = CrawlCheckpoint(tmp_path / "dedupe.db").load("example")
+    assert saved["run_id"] == "run-1" and saved["config_hash"] == "hash"
+    assert saved["position"] == {"url_index": 0, "next_url": "c"}
+    assert saved["pages_done"] == 2
+    assert saved["items"] == [{"id": "1"}, {"id": "2"}, {"id": "3"}]
+
+    checkpoint.start("example", "run-2", "hash")
+    assert checkpoint.load("example")["items"] == []
+    checkpoint.clear("example")
+    assert checkpoint.load("example") is None
+
+
+def test_scraper_resumes_after_checkpointed_position(tmp_path):
+    pages_dir = tmp_path / "pages"
+    _write_pages(pages_dir, 3)
+    config = _site_config(pages_dir, tmp_path / "dedupe.db")
+    positions = []
+    scraper = Scraper(config, StubLogger(), on_page=lambda position, items: positions.append(position))
+
+    full = scraper.scrape()
+    assert [item["id"] for item in full] == ["p1-0", "p1-1", "p2-0", "p2-1", "p3-0", "p3-1"]
+    assert positions[0]["next_url"] == (pages_dir / "page2.html").as_uri()
+    assert positions[-1]["next_url"] is None
+
+    resumed = Scraper(config, StubLogger()).scrape(resume=positions[0])
+    assert [item["id"] for item in resumed] == ["p2-0", "p2-1", "p3-0", "p3-1"]
+    assert Scraper(config, StubLogger()).scrape(resume=positions[-1]) == []
+
+
+def test_interrupted_run_resumes_without_refetching_pages(tmp_path, monkeypatch):
+    from src.core import sheets as sheets_module
+    from src.core.sheets import SheetsExporter
+    from src.core.sheets_fake import FakeSheetsClient
+
+    monkeypatch.delenv("SLACK_WEBHOOK_URL", raising=False)
+    pages_dir = tmp_path / "pages"
+    _write_pages(pages_dir, 3)
+    db_path = tmp_path / "dedupe.db"
+    config = _site_config(pages_dir, db_path)
+    client = FakeSheetsClient()
+    monkeypatch.setattr(
+        sheets_module, "SheetsExporter", lambda config, logger: SheetsExporter(config, logger, client=client, sheet_id="s")
+    )
+
+    # The third page is unreachable, so the first run fails after checkpointing two pages.
+    third_page = (pages_dir / "page3.html").read_text()
+    (pages_dir / "page3.html").unlink()
+    assert cli.run_site("example", config=config, logger=StubLogger()) == cli.EXIT_RUNTIME
+    saved = CrawlCheckpoint(db_path).load("example")
+    assert saved["pages_done"] == 2
+    assert saved["config_hash"] == crawl_fingerprint(config)
+
+    (pages_dir / "page3.html").write_text(third_page)
+    (pages_dir / "page1.html").unlink()
+    logger = StubLogger()
+    assert cli.run_site("example", config=config, logger=logger, resume=True) == cli.EXIT_OK
+    assert any("Resuming crawl after 2 page(s)" in message for message in logger.messages)
+    assert client.worksheet_rows("s", "Data") == [["p1-0"], ["p1-1"], ["p2-0"], ["p2-1"], ["p3-0"], ["p3-1"]]
+    assert CrawlCheckpoint(db_path).load("example") is None
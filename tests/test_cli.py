@@ -1,4 +1,22 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
 from src import cli
+from src.core.database import DedupeDB
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+# `ws version` and `ws list-sites` run thousands of times a day from schedulers.
+CLI_IMPORT_BUDGET_MS = 150
+HEAVY_MODULES = ("requests", "bs4", "soupsieve", "gspread", "google", "yaml", "sqlite3")
+
+
+@pytest.fixture(autouse=True)
+def _isolated_config_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("WS_CONFIG_CACHE_DIR", str(tmp_path / "config-cache"))
 
 
 def test_main_without_command_returns_non_zero(capsys):
@@ -9,6 +27,41 @@ def test_main_without_command_returns_non_zero(capsys):
     assert "usage:" in captured.out
 
 
+def _import_profile(argv):
+    """Run the CLI under ``-X importtime``; return the imported modules and the import time
+    in milliseconds spent from ``src`` onwards."""
+    script = f"import src.cli; src.cli.main({argv!r})"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    total_us = 0
+    counting = False
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.append(name.strip())
+        top_level = not name.startswith("  ")
+        counting = counting or (top_level and name.strip().startswith("src"))
+        if counting and top_level:
+            total_us += int(cumulative)
+    return modules, total_us / 1000
+
+
+@pytest.mark.parametrize("argv", [["version"], ["list-sites"]])
+def test_light_commands_skip_heavy_imports(argv):
+    modules, import_ms = _import_profile(argv)
+
+    heavy = sorted({name for name in modules if name.split(".")[0] in HEAVY_MODULES})
+    assert heavy == []
+    assert import_ms < CLI_IMPORT_BUDGET_MS
+
+
 def test_list_sites_works_outside_repo_root(monkeypatch, tmp_path, capsys):
     monkeypatch.chdir(tmp_path)
     exit_code = cli.main(["list-sites"])
@@ -26,8 +79,153 @@ def test_validate_all_reports_success(capsys):
     assert "quotes: Valid" in captured.out
 
 
+def test_validate_all_json_report_checks_fixtures(capsys):
+    exit_code = cli.main(["validate-all", "--format", "json", "--check-fixtures"])
+
+    report = json.loads(capsys.readouterr().out)
+    assert exit_code == cli.EXIT_OK
+    assert report["invalid"] == 0
+    assert [site["site"] for site in report["sites"]] == ["quotes"]
+
+
 def test_run_site_missing_config_returns_config_error(monkeypatch, tmp_path):
     monkeypatch.delenv("SLACK_WEBHOOK_URL", raising=False)
     exit_code = cli.run_site("missing", demo_mode=True, sites_dir=tmp_path)
 
     assert exit_code == cli.EXIT_CONFIG
+
+
+def test_dedupe_stats_and_compact_report_per_site(tmp_path, capsys):
+    sites_dir = tmp_path / "sites"
+    sites_dir.mkdir()
+    db_path = tmp_path / "dedupe.db"
+    (sites_dir / "example.yaml").write_text(
+        "\n".join([
+            "name: example",
+            "urls: ['https://example.com']",
+            "selectors: {item: '.row', id: '.id'}",
+            "pagination: {type: none}",
+            "dedupe_keys: [id]",
+            "output: {csv_dir: out}",
+            "min_rows: 1",
+            "dedupe_ttl_days: 30",
+            f"dedupe_db_path: {db_path}",
+        ])
+    )
+    DedupeDB(db_path=db_path).mark_deduped("example", ("row-1",))
+
+    assert cli.dedupe_stats(sites_dir) == cli.EXIT_OK
+    output = capsys.readouterr().out
+    assert "example: 1 keys" in output
+    # The per-site figure is a share of the dedupe table, not of the whole file.
+    assert "dedupe keys" in output
+
+    assert cli.dedupe_compact(sites_dir, site="example") == cli.EXIT_OK
+    assert "example: expired 0 keys older than 30 days" in capsys.readouterr().out
+
+
+def test_export_replay_pushes_pending_batches(tmp_path, capsys, monkeypatch):
+    from src.core import sheets as sheets_module
+    from src.core.outbox import ExportOutbox
+    from src.core.sheets import SheetsExporter
+    from src.core.sheets_fake import FakeSheetsClient
+
+    sites_dir = tmp_path / "sites"
+    sites_dir.mkdir()
+    db_path = tmp_path / "dedupe.db"
+    (sites_dir / "example.yaml").write_text(
+        "\n".join([
+            "name: example",
+            "urls: ['https://example.com']",
+            "selectors: {item: '.row', id: '.id'}",
+            "pagination: {type: none}",
+            "dedupe_keys: [id]",
+            "output: {csv_dir: out, sheet_tab: Data, columns: [id]}",
+            "min_rows: 1",
+            f"dedupe_db_path: {db_path}",
+        ])
+    )
+    outbox = ExportOutbox(db_path)
+    outbox.record("example", "run-1", [{"id": "row-1"}, {"id": "row-2"}])
+    client = FakeSheetsClient()
+    monkeypatch.setattr(
+        sheets_module, "SheetsExporter", lambda config, logger: SheetsExporter(config, logger, client=client, sheet_id="s")
+    )
+
+    assert cli.export_replay(sites_dir) == cli.EXIT_OK
+    assert "example: replayed 1/1 batch(es)" in capsys.readouterr().out
+    assert client.worksheet_rows("s", "Data") == [["row-1"], ["row-2"]]
+    assert outbox.count() == 0
+
+
+def test_export_replay_skips_batches_acknowledged_after_listing(tmp_path, capsys, monkeypatch):
+    from src.core import sheets as sheets_module
+    from src.core.outbox import ExportOutbox
+    from src.core.sheets import SheetsExporter
+    from src.core.sheets_fake import FakeSheetsClient
+
+    sites_dir = tmp_path / "sites"
+    sites_dir.mkdir()
+    db_path = tmp_path / "dedupe.db"
+    (sites_dir / "example.yaml").write_text(
+        "\n".join([
+            "name: example",
+            "urls: ['https://example.com']",
+            "selectors: {item: '.row', id: '.id'}",
+            "pagination: {type: none}",
+            "dedupe_keys: [id]",
+            "output: {csv_dir: out, sheet_tab: Data, columns: [id]}",
+            "min_rows: 1",
+            f"dedupe_db_path: {db_path}",
+        ])
+    )
+    outbox = ExportOutbox(db_path)
+    first = outbox.record("example", "run-1", [{"id": "row-1"}])
+    outbox.record("example", "run-2", [{"id": "row-2"}])
+    client = FakeSheetsClient()
+
+    def exporter(config, logger):
+        # Another delivery acknowledges the first batch once the journal has been read.
+        outbox.ack([first])
+        return SheetsExporter(config, logger, client=client, sheet_id="s")
+
+    monkeypatch.setattr(sheets_module, "SheetsExporter", exporter)
+
+    assert cli.export_replay(sites_dir) == cli.EXIT_OK
+    assert "example: replayed 2/2 batch(es)" in capsys.readouterr().out
+    assert client.worksheet_rows("s", "Data") == [["row-2"]]
+
+
+def test_run_site_fails_when_sheets_leaves_batches_pending(tmp_path):
+    from src.core.checkpoint import CrawlCheckpoint
+    from src.core.outbox import ExportOutbox
+    from src.core.sheets_fake import FakeSheetsClient
+
+    sites_dir = tmp_path / "sites"
+    sites_dir.mkdir()
+    page = tmp_path / "list.html"
+    page.write_text("<div class='row'><span class='id'>a</span></div><div class='row'><span class='id'>b</span></div>")
+    db_path = tmp_path / "dedupe.db"
+    (sites_dir / "example.yaml").write_text(
+        "\n".join([
+            "name: example",
+            f"urls: ['{page.as_uri()}']",
+            "selectors: {item: '.row', id: '.id'}",
+            "pagination: {type: none}",
+            "dedupe_keys: [id]",
+            f"output: {{csv_dir: {tmp_path / 'out'}, sheet_tab: Data, columns: [id], "
+            "sheets: {max_retries: 0, requests_per_minute: 60000}}",
+            "min_rows: 1",
+            f"dedupe_db_path: {db_path}",
+        ])
+    )
+    client = FakeSheetsClient()
+    client.fail_next(400, method="append_rows")
+
+    exit_code = cli.run_site(
+        "example", sites_dir=sites_dir, exporter_options={"client": client, "sheet_id": "s"}, alert=False
+    )
+
+    assert exit_code == cli.EXIT_RUNTIME
+    assert ExportOutbox(db_path).count("example") == 1
+    assert CrawlCheckpoint(db_path).load("example") is not None
@@ -0,0 +1,117 @@
+import pickle
+from pathlib import Path
+
+import pytest
+import yaml
+
+from src.core import config as config_module
+from src.core.config import CompiledConfig, ConfigLoader
+from src.core.scraper import Scraper
+
+FIXTURE = Path(__file__).resolve().parents[1] / "docs" / "fixtures" / "quotes.html"
+
+
+class StubLogger:
+    def info(self, *_args, **_kwargs):
+        pass
+
+    def error(self, *_args, **_kwargs):
+        raise AssertionError("Unexpected error log during test")
+
+    def debug(self, *_args, **_kwargs):
+        pass
+
+
+def _write_config(path, **overrides):
+    config = {
+        "name": "quotes",
+        "urls": [FIXTURE.as_uri()],
+        "selectors": {
+            "item": ".quote",
+            "text": ".text",
+            "author": ".author",
+            "link": ".author + a::attr(href)",
+        },
+        "pagination": {"type": "none"},
+        "dedupe_keys": ["text"],
+        "output": {"sheet_tab": "Sheet1"},
+        "min_rows": 1,
+        "allowed_domains": ["Example.com:443"],
+    }
+    config.update(overrides)
+    path.write_text(yaml.safe_dump(config, sort_keys=False), encoding="utf-8")
+    return path
+
+
+def test_load_compiles_defaults_and_plan_in_one_parse(tmp_path, mocker):
+    config_path = _write_config(tmp_path / "quotes.yaml")
+    safe_load = mocker.spy(config_module.yaml, "safe_load")
+
+    config = ConfigLoader(cache_dir=False).load(str(config_path))
+
+    assert safe_load.call_count == 1
+    assert isinstance(config, CompiledConfig)
+    assert config["timeouts"] == {"connect": 10, "read": 20}
+    assert config.plan.timeout == (10, 20)
+    assert config.plan.allowed_hosts == frozenset({"example.com"})
+    assert [field for field, *_ in config.plan.fields] == ["text", "author", "link"]
+    assert config.plan.fields[2][2:] == ("attr", "href")
+
+
+def test_compiled_config_is_read_only_and_replace_returns_copy(tmp_path):
+    config = ConfigLoader(cache_dir=False).load(str(_write_config(tmp_path / "quotes.yaml")))
+
+    with pytest.raises(TypeError):
+        config["min_rows"] = 5
+    with pytest.raises(TypeError):
+        config["output"].setdefault("csv_dir", "out")
+    with pytest.raises(TypeError):
+        config["urls"].append("https://example.com")
+
+    updated = config.replace(min_rows=5, rate_limit={"rps": 4})
+    assert updated["min_rows"] == 5 and config["min_rows"] == 1
+    assert updated.plan.rps == 4.0
+
+    restored = pickle.loads(pickle.dumps(updated))
+    assert restored == updated
+    assert restored.plan.timeout == updated.plan.timeout
+
+
+def test_disk_cache_skips_parsing_until_content_changes(tmp_path, mocker):
+    config_path = _write_config(tmp_path / "quotes.yaml")
+    cache_dir = tmp_path / "cache"
+    first = ConfigLoader(cache_dir=cache_dir).load(str(config_path))
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+    safe_load = mocker.spy(config_module.yaml, "safe_load")
+    second = ConfigLoader(cache_dir=cache_dir).load(str(config_path))
+    assert safe_load.call_count == 0
+    assert second == first
+
+    _write_config(config_path, min_rows=3)
+    third = ConfigLoader(cache_dir=cache_dir).load(str(config_path))
+    assert safe_load.call_count == 1
+    assert third["min_rows"] == 3
+
+
+def test_invalid_configs_raise_value_error(tmp_path):
+    loader = ConfigLoader(cache_dir=tmp_path / "cache")
+
+    with pytest.raises(ValueError, match="min_rows must be a non-negative integer"):
+        loader.load(str(_write_config(tmp_path / "rows.yaml", min_rows=-1)))
+    with pytest.raises(ValueError, match="Invalid CSS selector"):
+        loader.load(str(_write_config(tmp_path / "css.yaml", selectors={"item": ".quote", "text": "p[["})))
+    with pytest.raises(ValueError, match="Config file not found"):
+        loader.load(str(tmp_path / "absent.yaml"))
+    assert not list((tmp_path / "cache").glob("*.json"))
+
+
+def test_scraper_uses_compiled_plan(tmp_path):
+    config = ConfigLoader(cache_dir=False).load(str(_write_config(tmp_path / "quotes.yaml")))
+    config = config.replace(demo_mode=True)
+
+    scraper = Scraper(config, StubLogger())
+    items = scraper.scrape(demo_mode=True)
+
+    assert scraper.plan is config.plan
+    assert items and items[0]["text"] and items[0]["link"]
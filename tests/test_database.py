@@ -0,0 +1,106 @@
+import sqlite3
+import threading
+import time
+
+from src.core.database import CHANGED, NEW, UNCHANGED, DedupeDB, InMemoryDedupeDB
+
+
+def test_dedupe_db_migrates_legacy_table(tmp_path):
+    db_path = tmp_path / "dedupe.db"
+    with sqlite3.connect(str(db_path)) as conn:
+        conn.execute("CREATE TABLE deduped (site TEXT, key_hash TEXT, PRIMARY KEY (site, key_hash))")
+        conn.execute("INSERT INTO deduped VALUES ('legacy', 'abc')")
+
+    db = DedupeDB(db_path=db_path)
+
+    stats = db.stats()
+    assert stats[0]["site"] == "legacy"
+    assert stats[0]["keys"] == 1
+    assert stats[0]["last_seen"] is not None
+
+
+def test_dedupe_db_expires_keys_not_seen_within_ttl(tmp_path):
+    db = DedupeDB(db_path=tmp_path / "dedupe.db")
+    db.mark_deduped("site", ("stale",))
+    db.mark_deduped("site", ("fresh",))
+    db.mark_deduped("other", ("stale",))
+
+    old = int(time.time()) - 10 * 86400
+    with sqlite3.connect(str(db.db_path)) as conn:
+        conn.execute("UPDATE deduped SET last_seen = ?", (old,))
+    # Scraping a key again refreshes its last_seen (claim does the same during runs).
+    db.mark_deduped("site", ("fresh",))
+
+    assert db.expire("site", ttl_days=5) == 1
+    assert not db.is_deduped("site", ("stale",))
+    assert db.is_deduped("site", ("fresh",))
+    assert db.is_deduped("other", ("stale",))
+
+    db.vacuum()
+    assert db.size_bytes() > 0
+
+
+def test_in_memory_dedupe_db_expire_matches_sqlite_behaviour():
+    db = InMemoryDedupeDB()
+    db.mark_deduped("site", ("stale",))
+    db._seen["site"][next(iter(db._seen["site"]))][1] -= 10 * 86400
+    db.mark_deduped("site", ("fresh",))
+
+    assert db.expire("site", ttl_days=5) == 1
+    assert [entry["keys"] for entry in db.stats()] == [1]
+
+
+def test_claim_is_exclusive_across_concurrent_writers(tmp_path):
+    db_path = tmp_path / "dedupe.db"
+    keys = [(f"row-{index}",) for index in range(200)]
+    results = []
+
+    def claim_all():
+        results.append(DedupeDB(db_path=db_path).claim("site", keys))
+
+    threads = [threading.Thread(target=claim_all) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    claimed_per_key = [column.count(NEW) for column in zip(*results, strict=True)]
+    assert claimed_per_key == [1] * len(keys)
+
+
+def test_claim_rolls_back_when_below_min_new(tmp_path):
+    db = DedupeDB(db_path=tmp_path / "dedupe.db")
+
+    assert db.claim("site", [("a",), ("a",)], min_new=2) == [NEW, UNCHANGED]
+    assert not db.is_deduped("site", ("a",))
+
+    assert db.claim("site", [("a",), ("b",)], min_new=2) == [NEW, NEW]
+    assert db.is_deduped("site", ("b",))
+
+
+def test_claim_classifies_changed_rows_by_fingerprint(tmp_path):
+    db = DedupeDB(db_path=tmp_path / "dedupe.db")
+    db.mark_deduped("site", ("legacy",))
+
+    assert db.claim("site", [("a",), ("legacy",)], fingerprints=["v1", "v1"]) == [NEW, UNCHANGED]
+    assert db.claim("site", [("a",), ("legacy",)], fingerprints=["v1", "v1"]) == [
+        UNCHANGED,
+        UNCHANGED,
+    ]
+    assert db.claim("site", [("a",), ("legacy",)], fingerprints=["v2", "v1"]) == [
+        CHANGED,
+        UNCHANGED,
+    ]
+
+
+def test_classify_predicts_claim_without_recording(tmp_path):
+    for db in (DedupeDB(db_path=tmp_path / "dedupe.db"), InMemoryDedupeDB()):
+        db.claim("site", [("a",), ("b",)], fingerprints=["1", "1"])
+        keys = [("a",), ("b",), ("c",), ("c",)]
+        fingerprints = ["1", "2", "1", "2"]
+
+        predicted = db.classify("site", keys, fingerprints=fingerprints)
+
+        assert predicted == [UNCHANGED, CHANGED, NEW, CHANGED]
+        assert db.classify("site", [("c",)]) == [NEW]
+        assert db.claim("site", keys, fingerprints=fingerprints) == predicted
@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+from xml.etree import ElementTree
+
+import yaml
+
+from src.qa import fleet
+from src.qa.fleet import ValidationCache, render_report, validate_configs
+
+FIXTURE = Path(__file__).resolve().parents[1] / "docs" / "fixtures" / "quotes.html"
+
+
+def _write_site(directory, name, **overrides):
+    config = {
+        "name": name,
+        "urls": ["https://quotes.toscrape.com/"],
+        "selectors": {"item": ".quote", "text": ".text", "author": ".author"},
+        "pagination": {"type": "none"},
+        "dedupe_keys": ["text"],
+        "output": {"sheet_tab": "Sheet1"},
+        "min_rows": 1,
+        "demo_fixture": str(FIXTURE),
+    }
+    config.update(overrides)
+    path = directory / f"{name}.yaml"
+    path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    return path
+
+
+def test_selectors_are_compiled_and_checked_against_fixture(tmp_path):
+    paths = [
+        _write_site(tmp_path, "good"),
+        _write_site(tmp_path, "bad_css", selectors={"item": ".quote", "text": "p[["}),
+        _write_site(tmp_path, "stale", selectors={"item": ".quote", "text": ".text", "price": ".price"}),
+        _write_site(tmp_path, "schema", min_rows=-1),
+    ]
+
+    results = validate_configs(paths, check_fixtures=True, jobs=1)
+
+    assert [result["site"] for result in results] == ["good", "bad_css", "stale", "schema"]
+    assert results[0]["errors"] == []
+    assert "Invalid CSS selector" in results[1]["errors"][0]
+    assert results[2]["errors"] == [f"selectors.price matched no item in {FIXTURE}"]
+    assert results[3]["errors"] == ["min_rows must be a non-negative integer"]
+
+
+def test_cache_skips_unchanged_passing_configs(tmp_path, mocker):
+    good = _write_site(tmp_path, "good")
+    bad = _write_site(tmp_path, "bad", min_rows=-1)
+    cache_path = tmp_path / "cache" / "validated.json"
+    validate_configs([good, bad], jobs=1, cache=ValidationCache(cache_path))
+
+    validate_file = mocker.spy(fleet, "validate_site_file")
+    results = validate_configs([good, bad], jobs=1, cache=ValidationCache(cache_path))
+    assert [result["cached"] for result in results] == [True, False]
+    assert validate_file.call_count == 1
+    assert results[1]["errors"]
+
+    _write_site(tmp_path, "good", min_rows=2)
+    results = validate_configs([good, bad], jobs=1, cache=ValidationCache(cache_path))
+    assert results[0]["cached"] is False and results[0]["errors"] == []
+
+
+def test_process_pool_preserves_order_and_reports(tmp_path):
+    paths = [_write_site(tmp_path, f"site{index:02d}") for index in range(fleet.INLINE_LIMIT + 4)]
+    paths.append(_write_site(tmp_path, "zz_invalid", urls=["ftp://example.com"]))
+
+    results = validate_configs(paths, jobs=2)
+
+    assert [result["site"] for result in results] == [path.stem for path in paths]
+    report = json.loads(render_report(results, "json"))
+    assert report["valid"] == len(paths) - 1 and report["invalid"] == 1
+    suite = ElementTree.fromstring(render_report(results, "junit"))
+    assert suite.get("tests") == str(len(paths)) and suite.get("failures") == "1"
+    failure = suite.find("testcase[@name='zz_invalid']/failure")
+    assert "URL must be http(s) or file://" in failure.text
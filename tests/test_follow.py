@@ -0,0 +1,116 @@
+import pytest
+
+from src.core.follow import FollowCache, follow_options
+from src.core.scraper import Scraper
+
+
+class StubLogger:
+    def info(self, *_args, **_kwargs):
+        pass
+
+    def error(self, *_args, **_kwargs):
+        pass
+
+    def debug(self, *_args, **_kwargs):
+        pass
+
+
+def _write_pages(tmp_path):
+    (tmp_path / "authors").mkdir()
+    for slug, born in (("einstein", "March 14, 1879"), ("rowling", "July 31, 1965")):
+        (tmp_path / "authors" / f"{slug}.html").write_text(
+            f"<html><span class='born'>  {born} </span><div class='bio'>Bio of {slug}</div></html>"
+        )
+    rows = [("q1", "einstein"), ("q2", "rowling"), ("q3", "einstein"), ("q4", None)]
+    listing = "".join(
+        f"<div class='quote'><span class='text'>{text}</span>"
+        + (f"<a href='authors/{slug}.html'>about</a>" if slug else "")
+        + "</div>"
+        for text, slug in rows
+    )
+    (tmp_path / "list.html").write_text(f"<html>{listing}</html>")
+
+
+def _config(tmp_path, **follow):
+    return {
+        "name": "quotes",
+        "urls": [(tmp_path / "list.html").as_uri()],
+        "selectors": {"item": ".quote", "text": ".text", "link": "a::attr(href)"},
+        "follow": {"field": "link", "selectors": {"born": ".born", "bio": ".bio"}, **follow},
+        "transforms": {"born": ["strip"]},
+        "pagination": {"type": "none"},
+        "rate_limit": {"rps": 1000, "burst": 1000},
+        "dedupe_keys": ["text"],
+        "output": {"csv_dir": "out"},
+        "min_rows": 1,
+    }
+
+
+def test_follow_options_validate_the_section():
+    options = follow_options({"field": "link", "selectors": {"born": ".born"}})
+    assert options == {"field": "link", "selectors": {"born": ".born"}, "workers": 4, "cache_ttl": 86400}
+    assert follow_options({"field": "link", "selectors": {"born": ".born"}, "cache_ttl": 0})["cache_ttl"] is None
+    for section, message in (
+        ({"selectors": {"born": ".born"}}, "follow.field"),
+        ({"field": "link", "selectors": {"item": ".x"}}, "cannot include 'item'"),
+        ({"field": "link", "selectors": {"born": ".born"}, "workers": 0}, "follow.workers"),
+        ({"field": "link", "selectors": {"born": ".born"}, "cache_ttl": "soon"}, "follow.cache_ttl"),
+        ({"field": "link", "selectors": {"born": ".born"}, "depth": 2}, "unknown keys"),
+    ):
+        with pytest.raises(ValueError, match=message):
+            follow_options(section)
+
+
+def test_detail_pages_are_fetched_once_per_run_and_merged(tmp_path, mocker):
+    _write_pages(tmp_path)
+    scraper = Scraper(_config(tmp_path), StubLogger())
+    fetch = mocker.spy(scraper, "fetch")
+
+    items = scraper.scrape()
+
+    assert [item.to_dict() for item in items] == [
+        {"text": "q1", "link": "authors/einstein.html", "born": "March 14, 1879", "bio": "Bio of einstein"},
+        {"text": "q2", "link": "authors/rowling.html", "born": "July 31, 1965", "bio": "Bio of rowling"},
+        {"text": "q3", "link": "authors/einstein.html", "born": "March 14, 1879", "bio": "Bio of einstein"},
+        {"text": "q4"},
+    ]
+    # One listing page plus two distinct author pages.
+    assert fetch.call_count == 3
+    assert scraper.follower.stats == {"fetched": 2, "cached": 0, "failed": 0}
+
+
+def test_detail_cache_is_reused_across_runs_and_seen_items_are_skipped(tmp_path):
+    _write_pages(tmp_path)
+    cache = FollowCache(tmp_path / "dedupe.db")
+    Scraper(_config(tmp_path), StubLogger(), follow_cache=cache).scrape()
+
+    for page in (tmp_path / "authors").iterdir():
+        page.unlink()
+    scraper = Scraper(
+        _config(tmp_path), StubLogger(), follow_cache=cache, seen_check=lambda items: [item["text"] == "q2" for item in items]
+    )
+    items = scraper.scrape()
+
+    assert items[0]["born"] == "March 14, 1879"
+    assert "born" not in items[1]
+    assert scraper.follower.stats == {"fetched": 0, "cached": 1, "failed": 0}
+
+    expired = Scraper(_config(tmp_path, cache_ttl=0), StubLogger(), follow_cache=cache).scrape()
+    assert "born" not in expired[0]
+
+
+def test_seen_check_runs_once_per_page_for_follow_and_stop_when_seen(tmp_path):
+    _write_pages(tmp_path)
+    config = _config(tmp_path)
+    config["pagination"] = {"type": "next_link", "next_selector": "a.next", "stop_when_seen": True}
+    calls = []
+
+    def seen_check(items):
+        calls.append(len(items))
+        return [item["text"] == "q2" for item in items]
+
+    scraper = Scraper(config, StubLogger(), seen_check=seen_check)
+    items = scraper.scrape()
+
+    assert calls == [4]
+    assert "born" in items[0] and "born" not in items[1]
@@ -0,0 +1,94 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.jsonpath import MISSING, JsonPath
+from src.core.scraper import Scraper
+
+
+class StubLogger:
+    def info(self, *_args, **_kwargs):
+        pass
+
+    def error(self, *_args, **_kwargs):
+        pass
+
+    def debug(self, *_args, **_kwargs):
+        pass
+
+
+def build_json_config(pagination):
+    return {
+        "name": "api",
+        "format": "json",
+        "urls": ["https://api.example.com/products?limit=2"],
+        "selectors": {"item": "data.products", "id": "id", "name": "$.info.name", "tags": "tags[*].label"},
+        "pagination": pagination,
+        "rate_limit": {"rps": 1000, "burst": 1000},
+        "dedupe_keys": ["id"],
+        "output": {"csv_dir": "out"},
+        "min_rows": 1,
+        "allowed_domains": ["example.com"],
+    }
+
+
+def test_json_path_values():
+    doc = {"data": {"items": [{"id": 1, "tags": [{"label": "a"}, {"label": "b"}], "meta": {"x": 1}}]}}
+
+    assert JsonPath("data.items[0].id").first(doc) == 1
+    assert JsonPath("$.data.items[-1].id").first(doc) == 1
+    assert JsonPath("data.items.5.id").first(doc) is MISSING
+    assert JsonPath("data.items").items(doc) == doc["data"]["items"]
+    assert JsonPath("$").items([{"id": 1}]) == [{"id": 1}]
+    assert JsonPath("data.missing").items(doc) == []
+
+    record = doc["data"]["items"][0]
+    assert JsonPath("tags[*].label").value(record) == "a, b"
+    assert JsonPath("meta").value(record) == '{"x":1}'
+    assert JsonPath("absent").value(record) is MISSING
+    with pytest.raises(ValueError):
+        JsonPath("data..items")
+
+
+def test_json_scraper_follows_cursor_from_payload(mocker):
+    scraper = Scraper(
+        build_json_config({"type": "cursor", "cursor_path": "meta.next_cursor", "param": "cursor"}), StubLogger()
+    )
+    pages = {
+        "https://api.example.com/products?limit=2": {
+            "data": {"products": [{"id": 1, "info": {"name": "One"}, "tags": [{"label": "x"}]}, {"id": 2}]},
+            "meta": {"next_cursor": "abc"},
+        },
+        "https://api.example.com/products?limit=2&cursor=abc": {
+            "data": {"products": [{"id": 3, "info": {"name": None}}]},
+            "meta": {"next_cursor": None},
+        },
+    }
+    fetch = mocker.patch.object(
+        scraper, "fetch", side_effect=lambda url: SimpleNamespace(text=json.dumps(pages[url]))
+    )
+
+    items = scraper.scrape()
+
+    assert fetch.call_count == 2
+    assert [dict(item) for item in items] == [
+        {"id": 1, "name": "One", "tags": "x"},
+        {"id": 2},
+        {"id": 3},
+    ]
+
+
+def test_json_scraper_follows_next_url_from_payload(mocker):
+    scraper = Scraper(build_json_config({"type": "next_link", "next_selector": "links.next"}), StubLogger())
+    pages = {
+        "https://api.example.com/products?limit=2": {"data": {"products": [{"id": 1}]}, "links": {"next": "?page=2"}},
+        # A next link pointing back at the current page ends the crawl instead of looping.
+        "https://api.example.com/products?page=2": {
+            "data": {"products": [{"id": 2}]},
+            "links": {"next": "/products?page=2"},
+        },
+    }
+    mocker.patch.object(scraper, "fetch", side_effect=lambda url: SimpleNamespace(text=json.dumps(pages[url])))
+
+    assert [item["id"] for item in scraper.scrape()] == [1, 2]
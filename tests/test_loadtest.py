@@ -0,0 +1,80 @@
+import json
+
+import pytest
+import requests
+
+from src import cli
+from src.qa.loadtest import FixtureServer, SyntheticListing, percentile
+
+FIXTURE = """
+<html><body>
+  <div class="quote"><span class="text">Hello</span><a class="author" href="/author/a">A</a></div>
+  <div class="quote"><span class="text">World</span><a class="author" href="/author/b">B</a></div>
+  <ul><li class="next"><a href="/page/2/">Next</a></li></ul>
+</body></html>
+"""
+
+
+def build_config(pagination):
+    return {
+        "name": "quotes",
+        "selectors": {"item": ".quote", "text": ".text", "link": ".author::attr(href)"},
+        "pagination": pagination,
+    }
+
+
+@pytest.fixture(autouse=True)
+def _isolated_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("WS_CONFIG_CACHE_DIR", str(tmp_path / "config-cache"))
+    monkeypatch.delenv("GOOGLE_SHEETS_ID", raising=False)
+
+
+def test_synthetic_listing_makes_rows_unique_and_chains_next_links():
+    from bs4 import BeautifulSoup
+
+    listing = SyntheticListing(FIXTURE, build_config({"type": "next_link", "next_selector": ".next a"}), pages=2)
+
+    first = BeautifulSoup(listing.render(1), "html.parser")
+    last = BeautifulSoup(listing.render(2), "html.parser")
+    assert [span.get_text() for span in first.select(".text")] == ["Hello [p1]", "World [p1]"]
+    assert first.select_one(".author")["href"] == "/author/a#p1"
+    assert first.select_one(".next a")["href"] == "/list?page=2"
+    assert [span.get_text() for span in last.select(".text")] == ["Hello [p2]", "World [p2]"]
+    assert last.select_one(".next a") is None
+    assert listing.render(3) is None
+
+    with pytest.raises(ValueError, match="next_selector"):
+        SyntheticListing(FIXTURE, build_config({"type": "next_link", "next_selector": ".missing"}), pages=2)
+
+
+def test_fixture_server_injects_throttling_and_serves_robots():
+    listing = SyntheticListing(FIXTURE, build_config({"type": "query_param", "param": "p"}), pages=3)
+    server = FixtureServer(listing, throttle_rate=1.0)
+    base_url = server.start()
+    try:
+        throttled = requests.get(f"{base_url}/list?p=2", timeout=5)
+        robots = requests.get(f"{base_url}/robots.txt", timeout=5)
+        missing = requests.get(f"{base_url}/list?p=9", timeout=5)
+    finally:
+        server.stop()
+
+    assert throttled.status_code == 429
+    assert throttled.headers["Retry-After"] == "1"
+    assert "Disallow: /private/" in robots.text
+    assert missing.status_code == 404
+    assert server.stats == {"requests": 3, "pages": 0, "throttled": 1, "errors": 0, "not_found": 1, "robots": 1}
+    assert percentile([0.3, 0.1, 0.2, 0.4], 0.5) == 0.2
+    assert percentile([], 0.99) is None
+
+
+def test_loadtest_runs_the_pipeline_against_the_fixture_server(capsys):
+    exit_code = cli.main(["loadtest", "quotes", "--pages", "4", "--latency-ms", "0", "--rps", "1000", "--format", "json"])
+
+    report = json.loads(capsys.readouterr().out)
+    assert exit_code == cli.EXIT_OK
+    assert report["pages"] == 4
+    # The bundled quotes fixture has ten quotes per page.
+    assert report["rows"] == 40
+    assert report["server"]["robots"] == 1
+    assert report["fetch_latency"]["p99"] is not None
+    assert report["errors"] == []
@@ -0,0 +1,24 @@
+import pytest
+
+from src.core.locking import SiteLockedError, SiteRunLock
+
+
+def test_site_run_lock_rejects_overlapping_runs(tmp_path):
+    first = SiteRunLock(tmp_path, "quotes")
+    second = SiteRunLock(tmp_path, "quotes")
+
+    with first:
+        with pytest.raises(SiteLockedError, match="quotes"):
+            second.acquire()
+        # Other sites are unaffected.
+        with SiteRunLock(tmp_path, "news"):
+            pass
+
+    with second:
+        assert second.path.exists()
+
+
+def test_site_run_lock_lives_next_to_dedupe_db(tmp_path):
+    lock = SiteRunLock.for_dedupe_db(tmp_path / "state" / "dedupe.db", "quotes")
+
+    assert lock.path == tmp_path / "state" / ".locks" / "quotes.lock"
@@ -0,0 +1,82 @@
+import pytest
+
+from src.core.database import DedupeDB
+from src.core.outbox import ExportOutbox
+from src.core.processor import DataProcessor
+from src.core.sheet_index import SheetIndex
+from src.core.sheets import SheetsExporter
+from src.core.sheets_fake import FakeSheetsClient
+
+
+class StubLogger:
+    def info(self, *_args, **_kwargs):
+        pass
+
+    def error(self, *_args, **_kwargs):
+        pass
+
+    def debug(self, *_args, **_kwargs):
+        pass
+
+
+def build_config(tmp_path, min_rows=1):
+    return {
+        "name": "outbox_test",
+        "dedupe_keys": ["id"],
+        "min_rows": min_rows,
+        "output": {
+            "csv_dir": str(tmp_path),
+            "columns": ["id"],
+            "sheet_tab": "Data",
+            "sheets": {"chunk_rows": 2, "max_retries": 0, "requests_per_minute": 60000},
+        },
+    }
+
+
+def build_processor(tmp_path, config):
+    db_path = tmp_path / "dedupe.db"
+    outbox = ExportOutbox(db_path)
+    processor = DataProcessor(config, StubLogger(), db=DedupeDB(db_path=db_path), run_id="run-1", outbox=outbox)
+    return processor, outbox
+
+
+def build_exporter(tmp_path, config, client):
+    return SheetsExporter(
+        config, StubLogger(), client=client, sheet_id="sheet-1", index=SheetIndex(tmp_path / "dedupe.db")
+    )
+
+
+def test_failed_export_is_journaled_and_replayed_without_duplicates(tmp_path):
+    config = build_config(tmp_path)
+    processor, outbox = build_processor(tmp_path, config)
+    client = FakeSheetsClient()
+    exporter = build_exporter(tmp_path, config, client)
+
+    rows = processor.process([{"id": str(index)} for index in range(5)])
+    batch_id = processor.last_journal_id
+    assert outbox.count("outbox_test") == 1
+
+    # The second of three chunks fails: the first two rows are confirmed.
+    client.fail_next(503, method="append_rows", after=1)
+    assert outbox.deliver(exporter, rows, [(batch_id, 0, len(rows))]) is False
+    (pending,) = outbox.pending("outbox_test")
+    assert pending["rows_done"] == 2
+    assert pending["attempts"] == 1
+    assert "chunk 2/3" in pending["last_error"]
+
+    # Replaying pushes only the remainder and clears the journal.
+    remainder = pending["rows"][pending["rows_done"]:]
+    assert outbox.deliver(exporter, remainder, [(batch_id, pending["rows_done"], len(remainder))])
+    assert outbox.count() == 0
+    assert [row[0] for row in client.worksheet_rows("sheet-1", "Data")] == ["0", "1", "2", "3", "4"]
+
+
+def test_rolled_back_claim_journals_nothing(tmp_path):
+    config = build_config(tmp_path, min_rows=3)
+    processor, outbox = build_processor(tmp_path, config)
+
+    with pytest.raises(ValueError, match="Insufficient data"):
+        processor.process([{"id": "a"}, {"id": "b"}])
+
+    assert processor.last_journal_id is None
+    assert outbox.count() == 0
@@ -0,0 +1,98 @@
+from src.core.parsing import PageParser
+from src.core.scraper import Scraper
+
+
+class StubLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, message, *_args, **_kwargs):
+        self.messages.append(message)
+
+    def error(self, message, *_args, **_kwargs):
+        self.messages.append(message)
+
+    def debug(self, *_args, **_kwargs):
+        pass
+
+
+def _write_listing(tmp_path, name, rows, next_page=None):
+    body = "".join(f"<div class='row'><span class='id'>{row}</span></div>" for row in rows)
+    if next_page:
+        body += f"<a class='next' href='{next_page}'>next</a>"
+    page = tmp_path / name
+    page.write_text(f"<html><body>{body}</body></html>", encoding="utf-8")
+    return page.as_uri()
+
+
+def build_config(urls, parse_workers):
+    return {
+        "name": "example",
+        "urls": urls,
+        "selectors": {"item": ".row", "id": ".id"},
+        "pagination": {"type": "next_link", "next_selector": "a.next"},
+        "parse_workers": parse_workers,
+        "rate_limit": {"rps": 1000, "burst": 1000},
+        "dedupe_keys": ["id"],
+        "output": {"csv_dir": "out"},
+        "min_rows": 1,
+        "allowed_domains": ["example.com"],
+    }
+
+
+def test_page_parser_returns_items_and_next_hint():
+    parser = PageParser(build_config([], 1))
+    html = "<div class='row'><span class='id'>1</span></div><a class='next' href='?page=2'>next</a>"
+
+    items, next_hint = parser.parse(html, "https://example.com/list")
+
+    assert [dict(item) for item in items] == [{"id": "1"}]
+    assert next_hint == "https://example.com/list?page=2"
+
+
+def test_parse_workers_keep_page_and_url_order(tmp_path):
+    urls = []
+    for index in range(6):
+        second = _write_listing(tmp_path, f"list{index}-2.html", [f"{index}-c"])
+        urls.append(_write_listing(tmp_path, f"list{index}.html", [f"{index}-a", f"{index}-b"], next_page=second))
+    urls.insert(3, (tmp_path / "missing.html").as_uri())
+    expected = [f"{index}-{suffix}" for index in range(6) for suffix in "abc"]
+
+    serial = Scraper(build_config(urls, 1), StubLogger())
+    logger = StubLogger()
+    pooled = Scraper(build_config(urls, 3), logger)
+    batches = list(pooled.iter_batches())
+
+    assert [item["id"] for item in serial.scrape()] == expected
+    assert [item["id"] for batch in batches for item in batch] == expected
+    assert len(batches) == 12
+    assert any(message.startswith("Failed to scrape") and "missing.html" in message for message in logger.messages)
+    assert pooled._parse_pool is None
+
+
+def test_warm_parse_pool_is_spawned_once_and_reused_across_runs(tmp_path):
+    from src.core.service import WarmState
+
+    urls = []
+    for index in range(3):
+        second = _write_listing(tmp_path, f"list{index}-2.html", [f"{index}b"])
+        urls.append(_write_listing(tmp_path, f"list{index}.html", [f"{index}a"], next_page=second))
+    config = build_config(urls, 2)
+    warm = WarmState()
+    pool = warm.parse_pool("example", config, 2)
+    submit = pool.submit
+    submitted = []
+    pool.submit = lambda *args: submitted.append(args[2]) or submit(*args)
+    try:
+        assert pool._mp_context.get_start_method() == "spawn"
+        for _ in range(2):
+            scraper = Scraper(config, StubLogger(), parse_pool=warm.parse_pool("example", config, 2))
+            assert [item["id"] for item in scraper.scrape()] == ["0a", "0b", "1a", "1b", "2a", "2b"]
+        # Only the prefetched first pages go to the pool; follow-on pages parse in-process.
+        assert sorted(submitted) == sorted(urls * 2)
+        assert warm.parse_pool("example", config, 2) is pool
+        warm.forget("example")
+        assert warm.parse_pool("example", config, 2) is not pool
+    finally:
+        warm.close()
+        pool.shutdown()
@@ -0,0 +1,91 @@
+import csv
+
+import pytest
+
+from src.core.database import InMemoryDedupeDB
+from src.core.pipeline import ExportPipeline
+from src.core.processor import DataProcessor
+from src.core.sheet_index import SheetIndex
+from src.core.sheets import SheetsExporter
+from src.core.sheets_fake import FakeSheetsClient
+
+
+class StubLogger:
+    def info(self, *_args, **_kwargs):
+        pass
+
+    def error(self, *_args, **_kwargs):
+        pass
+
+    def debug(self, *_args, **_kwargs):
+        pass
+
+
+def build_config(tmp_path, min_rows):
+    return {
+        "name": "pipeline_test",
+        "dedupe_keys": ["id"],
+        "min_rows": min_rows,
+        "output": {
+            "csv_dir": str(tmp_path),
+            "columns": ["id"],
+            "sheet_tab": "Data",
+            "sheets": {"pipeline": True, "queue_batches": 1, "requests_per_minute": 60000},
+        },
+    }
+
+
+def build_pipeline(tmp_path, min_rows, db):
+    config = build_config(tmp_path, min_rows)
+    client = FakeSheetsClient()
+    exporter = SheetsExporter(
+        config, StubLogger(), client=client, sheet_id="sheet-1", index=SheetIndex(tmp_path / "index.db")
+    )
+    processor = DataProcessor(config, StubLogger(), db=db)
+    return ExportPipeline(processor, exporter), client
+
+
+def test_pipeline_holds_first_flush_until_min_rows(tmp_path):
+    db = InMemoryDedupeDB()
+    pipeline, client = build_pipeline(tmp_path, min_rows=3, db=db)
+    claimed_after_batch = []
+
+    def batches():
+        for start in (0, 2, 4):
+            yield [{"id": str(start)}, {"id": str(start + 1)}]
+            claimed_after_batch.append(db.stats()[0]["keys"] if db.stats() else 0)
+
+    exported = pipeline.run(batches())
+
+    # Nothing is claimed until the second batch crosses min_rows=3.
+    assert claimed_after_batch == [0, 4, 6]
+    assert [row["id"] for row in exported] == [str(i) for i in range(6)]
+    assert [row[0] for row in client.worksheet_rows("sheet-1", "Data")] == [str(i) for i in range(6)]
+    with open(tmp_path / "pipeline_test.csv", newline="", encoding="utf-8") as handle:
+        assert [row[0] for row in csv.reader(handle)] == ["id"] + [str(i) for i in range(6)]
+
+
+def test_pipeline_reports_shortfall_without_claiming(tmp_path):
+    db = InMemoryDedupeDB()
+    pipeline, client = build_pipeline(tmp_path, min_rows=5, db=db)
+
+    with pytest.raises(ValueError, match="Insufficient data: 3 < 5"):
+        pipeline.run(iter([[{"id": "a"}, {"id": "b"}], [{"id": "b"}, {"id": "c"}]]))
+
+    assert db.stats() == [{"site": "pipeline_test", "keys": 0, "first_seen": None, "last_seen": None}]
+    assert client.worksheet_rows("sheet-1", "Data") == []
+    assert not (tmp_path / "pipeline_test.csv").exists()
+
+
+def test_pipeline_drains_claimed_rows_when_scraping_fails(tmp_path):
+    pipeline, client = build_pipeline(tmp_path, min_rows=1, db=InMemoryDedupeDB())
+
+    def batches():
+        yield [{"id": "a"}]
+        yield [{"id": "b"}]
+        raise RuntimeError("scrape blew up")
+
+    with pytest.raises(RuntimeError, match="scrape blew up"):
+        pipeline.run(batches())
+
+    assert [row[0] for row in client.worksheet_rows("sheet-1", "Data")] == ["a", "b"]
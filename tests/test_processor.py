@@ -44,3 +44,45 @@ def test_processor_uses_env_dedupe_db_path(tmp_path, monkeypatch):
     another_processor = DataProcessor(config, StubLogger(), demo_mode=False)
     processed_again = another_processor.process([{"id": "row-1"}])
     assert processed_again == []
+
+
+def test_processor_delta_export_emits_new_and_changed_rows(tmp_path):
+    config = build_config(tmp_path)
+    config["delta_export"] = True
+    config["output"]["columns"] = ["id", "price"]
+    processor = DataProcessor(config, StubLogger(), demo_mode=True)
+
+    first = processor.process([{"id": "a", "price": "1"}, {"id": "b", "price": "2"}])
+    assert [row["change_type"] for row in first] == ["new", "new"]
+
+    second = processor.process([
+        {"id": "a", "price": "1"},
+        {"id": "b", "price": "3"},
+        {"id": "c", "price": "4"},
+    ])
+    assert [(row["id"], row["change_type"]) for row in second] == [("b", "changed"), ("c", "new")]
+
+    csv_lines = (tmp_path / "processor_test.csv").read_text().splitlines()
+    assert csv_lines[0] == "id,price,change_type"
+    assert csv_lines[1:] == ["b,3,changed", "c,4,new"]
+
+
+def test_seen_flags_classifies_a_page_in_one_lookup(tmp_path, mocker):
+    config = build_config(tmp_path)
+    config["dedupe_db_path"] = str(tmp_path / "dedupe.db")
+    processor = DataProcessor(config, StubLogger())
+    processor.process([{"id": "a"}])
+    classify = mocker.spy(processor.db, "classify")
+
+    assert processor.seen_flags([{"id": "a"}, {"title": "no key"}, {"id": "b"}]) == [True, False, False]
+    assert classify.call_count == 1
+
+
+def test_seen_flags_with_delta_export_treats_changed_rows_as_unseen(tmp_path):
+    config = build_config(tmp_path)
+    config["delta_export"] = True
+    config["output"]["columns"] = ["id", "price"]
+    processor = DataProcessor(config, StubLogger(), demo_mode=True)
+    processor.process([{"id": "a", "price": "1"}, {"id": "b", "price": "2"}])
+
+    assert processor.seen_flags([{"id": "a", "price": "1"}, {"id": "b", "price": "3"}]) == [True, False]
@@ -0,0 +1,48 @@
+import pickle
+import sys
+
+import pytest
+
+from src.core.records import record_fields, record_type
+
+
+def test_record_behaves_like_dict_with_missing_fields():
+    record_cls = record_type(("text", "author", "items"))
+    record = record_cls(text="hello", items="shadowed method name")
+
+    assert record == {"text": "hello", "items": "shadowed method name"}
+    assert "author" not in record
+    assert record.get("author", "") == ""
+    assert list(record.keys()) == ["text", "items"]
+    with pytest.raises(KeyError):
+        record["author"]
+    with pytest.raises(KeyError):
+        record["unknown"] = "value"
+    assert record.values_for(["author", "text", "unknown"]) == ["", "hello", ""]
+
+
+def test_record_type_is_cached_and_picklable():
+    record_cls = record_type(("a", "b"))
+    assert record_type(("a", "b")) is record_cls
+
+    restored = pickle.loads(pickle.dumps(record_cls(a=None)))
+    assert type(restored) is record_cls
+    assert restored == {"a": None}
+
+
+def test_record_is_smaller_than_dict():
+    record_cls = record_type(("text", "author", "link", "tags"))
+    values = {"text": "t", "author": "a", "link": "l", "tags": "x"}
+
+    assert not hasattr(record_cls(values), "__dict__")
+    assert sys.getsizeof(record_cls(values)) < sys.getsizeof(dict(values))
+
+
+def test_record_fields_include_change_column_for_delta_export():
+    config = {
+        "selectors": {"item": ".row", "id": ".id"},
+        "delta_export": True,
+        "output": {"change_column": "delta"},
+    }
+
+    assert record_fields(config) == ("id", "delta")
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+
+from src.core.schedule import CronExpression, Schedule, parse_interval
+
+
+def test_parse_interval_accepts_seconds_and_units():
+    assert parse_interval(90) == 90
+    assert parse_interval("15m") == 900
+    assert parse_interval("2h") == 7200
+    assert parse_interval("1.5d") == 129600
+    for bad in ("soon", 0, True, "-5m"):
+        with pytest.raises(ValueError):
+            parse_interval(bad)
+
+
+def test_cron_next_after_handles_steps_ranges_and_weekdays():
+    every_quarter = CronExpression("*/15 * * * *")
+    assert every_quarter.next_after(datetime(2024, 3, 1, 10, 7, 30)) == datetime(2024, 3, 1, 10, 15)
+    assert every_quarter.next_after(datetime(2024, 3, 1, 23, 45)) == datetime(2024, 3, 2, 0, 0)
+
+    weekdays_at_nine = CronExpression("0 9 * * 1-5")
+    # 2024-03-01 is a Friday, so the next weekday morning is Monday.
+    assert weekdays_at_nine.next_after(datetime(2024, 3, 1, 9, 0)) == datetime(2024, 3, 4, 9, 0)
+
+    # Day of month and day of week both restricted: either one matches, as in cron.
+    first_or_sunday = CronExpression("30 6 1 * 0")
+    assert first_or_sunday.next_after(datetime(2024, 3, 1, 7, 0)) == datetime(2024, 3, 3, 6, 30)
+
+    leap_day = CronExpression("0 0 29 2 *")
+    assert leap_day.next_after(datetime(2024, 3, 1)) == datetime(2028, 2, 29, 0, 0)
+
+
+def test_schedule_from_config_validates():
+    assert Schedule.from_config({"every": "10m"}).next_run(1000.0) == 1600.0
+    assert Schedule.from_config({"cron": "0 * * * *"}).describe() == "cron 0 * * * *"
+    for spec, message in (
+        ({"every": "5m", "cron": "* * * * *"}, "exactly one"),
+        ({}, "exactly one"),
+        ({"cron": "61 * * * *"}, "minute field out of range"),
+        ({"cron": "* * *"}, "five fields"),
+        ({"cron": "0 0 31 2 *"}, "never fires"),
+        ({"every": "5m", "jitter": 3}, "unknown keys"),
+        ("5m", "must be a mapping"),
+    ):
+        with pytest.raises(ValueError, match=message):
+            Schedule.from_config(spec)
@@ -133,3 +133,44 @@ def test_scrape_raises_when_all_urls_fail(mocker):
 
     with pytest.raises(RuntimeError, match="All URLs failed to scrape"):
         scraper.scrape()
+
+
+def test_bad_url_file_lines_fail_alone(tmp_path, mocker):
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://example.com/a\nexample.com/b\nhttps://example.com/c\n", encoding="utf-8")
+    config = build_base_config()
+    config["urls"] = [{"file": str(url_file)}]
+    errors = []
+    logger = StubLogger()
+    logger.error = errors.append
+    scraper = Scraper(config, logger)
+    scrape_url = mocker.patch.object(scraper, "scrape_url", side_effect=lambda url, **_: [{"title": url}])
+
+    assert scraper.scrape() == [{"title": "https://example.com/a"}, {"title": "https://example.com/c"}]
+    assert scrape_url.call_count == 2
+    assert errors == [f"Failed to scrape example.com/b: {url_file}:2: URL must be http(s) or file://: example.com/b"]
+
+
+def test_stop_when_seen_halts_after_consecutive_seen_pages(mocker):
+    config = build_base_config()
+    config["pagination"].update({"max_pages": 10, "stop_when_seen": 2})
+
+    seen_titles = {"old-1", "old-2", "old-3"}
+    scraper = Scraper(config, StubLogger(), seen_check=lambda items: [item["title"] in seen_titles for item in items])
+    mocker.patch.object(scraper, "rate_limit")
+    mocker.patch.object(scraper, "fetch", return_value=SimpleNamespace(text="<html></html>"))
+    mocker.patch.object(
+        scraper,
+        "extract_items",
+        side_effect=[
+            [{"title": "new-1"}, {"title": "old-1"}],
+            [{"title": "old-2"}],
+            [{"title": "old-3"}],
+            [{"title": "never-fetched"}],
+        ],
+    )
+
+    data = scraper.scrape_url("https://example.com/list")
+
+    assert [item["title"] for item in data] == ["new-1", "old-1", "old-2", "old-3"]
+    assert scraper.fetch.call_count == 3
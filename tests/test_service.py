@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+import urllib.request
+
+import yaml
+
+from src.core.config import ConfigLoader
+from src.core.service import ServeDaemon
+
+
+class StubLogger:
+    def info(self, *_args, **_kwargs):
+        pass
+
+    def error(self, *_args, **_kwargs):
+        raise AssertionError("Unexpected error log during test")
+
+    def debug(self, *_args, **_kwargs):
+        pass
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _write_site(sites_dir, name, schedule, **overrides):
+    config = {
+        "name": name,
+        "urls": ["https://example.com/"],
+        "selectors": {"item": ".row", "id": ".id"},
+        "pagination": {"type": "none"},
+        "dedupe_keys": ["id"],
+        "output": {"sheet_tab": "Sheet1"},
+        "min_rows": 1,
+    }
+    if schedule is not None:
+        config["schedule"] = schedule
+    config.update(overrides)
+    path = sites_dir / f"{name}.yaml"
+    path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    return path
+
+
+def _wait_idle(daemon, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while any(state["running"] for state in daemon.sites.values()):
+        assert time.monotonic() < deadline, "scheduled runs did not finish"
+        time.sleep(0.01)
+
+
+def _daemon(tmp_path, runner, clock):
+    return ServeDaemon(
+        tmp_path / "sites",
+        StubLogger(),
+        runner,
+        workers=2,
+        status_path=tmp_path / "status.json",
+        loader=ConfigLoader(cache_dir=False),
+        clock=clock,
+    )
+
+
+def test_due_sites_run_once_at_a_time_and_overlaps_are_skipped(tmp_path):
+    sites_dir = tmp_path / "sites"
+    sites_dir.mkdir()
+    _write_site(sites_dir, "fast", {"every": "60s"})
+    _write_site(sites_dir, "slow", {"every": "10s"})
+    _write_site(sites_dir, "manual", None)
+    clock = FakeClock()
+    release = threading.Event()
+    calls = []
+
+    def runner(site, config, warm, _logger):
+        calls.append((site, config["name"], warm.session(site)))
+        if site == "slow":
+            release.wait(5)
+        return 0
+
+    daemon = _daemon(tmp_path, runner, clock)
+    daemon.reload()
+    assert sorted(daemon.tick()) == ["fast", "slow"]
+    deadline = time.monotonic() + 5
+    while len(calls) < 2:
+        assert time.monotonic() < deadline, "due sites did not start"
+        time.sleep(0.01)
+
+    clock.now += 15
+    assert daemon.tick() == []
+    assert daemon.sites["slow"]["skipped"] == 1
+
+    release.set()
+    daemon.shutdown()
+    assert sorted(site for site, _, _ in calls) == ["fast", "slow"]
+    status = json.loads((tmp_path / "status.json").read_text())
+    assert status["state"] == "stopped"
+    assert status["sites"]["fast"]["runs"] == 1 and status["sites"]["fast"]["last_exit_code"] == 0
+    assert status["sites"]["manual"]["next_run"] is None
+
+
+def test_reload_picks_up_changed_configs_and_keeps_session_warm(tmp_path):
+    sites_dir = tmp_path / "sites"
+    sites_dir.mkdir()
+    path = _write_site(sites_dir, "example", {"every": "60s"})
+    clock = FakeClock()
+    sessions = []
+    daemon = _daemon(tmp_path, lambda site, config, warm, _logger: sessions.append(warm.session(site)) or 0, clock)
+
+    daemon.reload()
+    daemon.tick()
+    _wait_idle(daemon)
+    clock.now += 60
+    daemon.tick()
+    _wait_idle(daemon)
+    assert len(sessions) == 2 and sessions[0] is sessions[1]
+
+    _write_site(sites_dir, "example", {"every": "30s"}, min_rows=3)
+    os.utime(path, ns=(1, 1))
+    daemon.reload()
+    assert daemon.sites["example"]["config"]["min_rows"] == 3
+    assert daemon.sites["example"]["next_run"] == clock.now + 30
+    assert daemon.warm.session("example") is not sessions[0]
+    daemon.shutdown()
+
+
+def test_http_endpoint_serves_health_and_metrics(tmp_path):
+    sites_dir = tmp_path / "sites"
+    sites_dir.mkdir()
+    _write_site(sites_dir, "example", {"cron": "*/5 * * * *"})
+    daemon = _daemon(tmp_path, lambda *_args: 0, FakeClock())
+    daemon.reload()
+    port = daemon.start_http(0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=5) as response:
+            health = json.load(response)
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            metrics = response.read().decode("utf-8")
+    finally:
+        daemon.shutdown()
+
+    assert health["state"] == "running"
+    assert health["sites"]["example"]["schedule"] == "cron */5 * * * *"
+    assert 'ws_site_next_run_timestamp{site="example"}' in metrics
+
+
+def test_shutdown_cancels_queued_runs_and_waits_for_running_ones(tmp_path):
+    sites_dir = tmp_path / "sites"
+    sites_dir.mkdir()
+    _write_site(sites_dir, "first", {"every": "60s"})
+    _write_site(sites_dir, "second", {"every": "60s"})
+    release = threading.Event()
+    calls = []
+    messages = []
+
+    def runner(site, _config, _warm, _logger):
+        calls.append(site)
+        release.wait(5)
+        return 0
+
+    logger = StubLogger()
+    logger.info = messages.append
+    daemon = ServeDaemon(
+        sites_dir, logger, runner, workers=1, loader=ConfigLoader(cache_dir=False), clock=FakeClock()
+    )
+    daemon.reload()
+    assert daemon.tick() == ["first", "second"]
+    deadline = time.monotonic() + 5
+    while not calls:
+        assert time.monotonic() < deadline, "first run did not start"
+        time.sleep(0.01)
+
+    stopper = threading.Thread(target=daemon.shutdown)
+    stopper.start()
+    deadline = time.monotonic() + 5
+    while daemon.sites["second"]["running"]:
+        assert time.monotonic() < deadline, "queued run was not cancelled"
+        time.sleep(0.01)
+    assert stopper.is_alive()
+    release.set()
+    stopper.join(5)
+
+    assert calls == ["first"]
+    assert daemon.sites["first"]["runs"] == 1 and daemon.sites["second"]["runs"] == 0
+    assert any("cancelled queued runs of second" in message for message in messages)
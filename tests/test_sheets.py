@@ -1,6 +1,8 @@
+import os
+
 import pytest
 
-from src.core.sheets import SheetsExporter
+from src.core.sheets import SheetsExporter, clear_client_cache
 
 
 class StubLogger:
@@ -22,6 +24,7 @@ def clear_env(monkeypatch):
     monkeypatch.delenv('SHEET_ID', raising=False)
     monkeypatch.delenv('SHEETS_CREDENTIALS_PATH', raising=False)
     monkeypatch.delenv('SERVICE_ACCOUNT_JSON', raising=False)
+    clear_client_cache()
     yield
 
 
@@ -76,3 +79,211 @@ def test_exporter_uses_columns_order(monkeypatch, tmp_path, mocker):
     exporter.export([{'alpha': '1', 'beta': '2'}])
 
     worksheet_mock.append_rows.assert_called_once_with([["2", "1"]])
+
+
+def _fake_api_error(status, headers=None):
+    from types import SimpleNamespace
+
+    import gspread
+
+    response = SimpleNamespace(
+        status_code=status,
+        headers=headers or {},
+        text='quota exceeded',
+        json=lambda: {'error': {'code': status, 'message': 'quota exceeded', 'status': 'RESOURCE_EXHAUSTED'}},
+    )
+    return gspread.exceptions.APIError(response)
+
+
+def _configured_exporter(tmp_path, monkeypatch, mocker, sheets_cfg):
+    creds = tmp_path / 'creds.json'
+    creds.write_text('{}')
+    monkeypatch.setenv('GOOGLE_SHEETS_ID', 'sheet-id-123')
+    monkeypatch.setenv('GOOGLE_SHEETS_CREDENTIALS_PATH', str(creds))
+
+    client_mock = mocker.Mock()
+    worksheet_mock = mocker.Mock()
+    client_mock.open_by_key.return_value.worksheet.return_value = worksheet_mock
+    mocker.patch('src.core.sheets.gspread.service_account', return_value=client_mock)
+
+    config = {'output': {'sheet_tab': 'Sheet1', 'columns': ['n'], 'sheets': sheets_cfg}}
+    exporter = SheetsExporter(config, StubLogger())
+    exporter._sleep = mocker.Mock()
+    return exporter, worksheet_mock
+
+
+def test_exporter_chunks_and_retries_quota_errors(tmp_path, monkeypatch, mocker):
+    exporter, worksheet = _configured_exporter(
+        tmp_path, monkeypatch, mocker, {'chunk_rows': 2, 'requests_per_minute': 6000}
+    )
+    worksheet.append_rows.side_effect = [None, _fake_api_error(429, {'Retry-After': '7'}), None, None]
+
+    written = exporter.export([{'n': str(i)} for i in range(5)])
+
+    assert written == 5
+    assert exporter.chunks_written == 3
+    chunks = [call.args[0] for call in worksheet.append_rows.call_args_list]
+    assert chunks == [[['0'], ['1']], [['2'], ['3']], [['2'], ['3']], [['4']]]
+    exporter._sleep.assert_called_once_with(7.0)
+
+
+def test_exporter_reports_resume_point_and_resumes(tmp_path, monkeypatch, mocker):
+    exporter, worksheet = _configured_exporter(
+        tmp_path, monkeypatch, mocker, {'chunk_rows': 2, 'max_retries': 1, 'requests_per_minute': 6000}
+    )
+    rows = [{'n': str(i)} for i in range(5)]
+    worksheet.append_rows.side_effect = [None, _fake_api_error(503)]
+
+    assert exporter.export(rows) == 2
+    assert exporter.chunks_written == 1
+    assert exporter.append_uncertain
+    exporter._sleep.assert_not_called()
+
+    worksheet.append_rows.reset_mock(side_effect=True)
+    assert exporter.export(rows, start_chunk=exporter.chunks_written) == 3
+    chunks = [call.args[0] for call in worksheet.append_rows.call_args_list]
+    assert chunks == [[['2'], ['3']], [['4']]]
+
+
+def test_exporter_caps_retry_after_at_max_backoff(tmp_path, monkeypatch, mocker):
+    exporter, worksheet = _configured_exporter(
+        tmp_path, monkeypatch, mocker, {'requests_per_minute': 6000, 'max_backoff': 30}
+    )
+    worksheet.append_rows.side_effect = [_fake_api_error(429, {'Retry-After': '86400'}), None]
+
+    assert exporter.export([{'n': '1'}]) == 1
+    exporter._sleep.assert_called_once_with(30)
+
+
+def test_exporters_sharing_credentials_share_one_budget_at_the_lowest_rate(tmp_path, monkeypatch, mocker):
+    fast, _ = _configured_exporter(tmp_path, monkeypatch, mocker, {'requests_per_minute': 6000})
+    slow = SheetsExporter(
+        {'output': {'sheet_tab': 'Sheet1', 'sheets': {'requests_per_minute': 60}}}, StubLogger()
+    )
+    again = SheetsExporter(
+        {'output': {'sheet_tab': 'Sheet1', 'sheets': {'requests_per_minute': 600}}}, StubLogger()
+    )
+
+    assert fast._budget is slow._budget is again._budget
+    assert fast._budget.rate == 1.0
+
+
+def test_exporter_does_not_retry_client_errors(tmp_path, monkeypatch, mocker):
+    exporter, worksheet = _configured_exporter(tmp_path, monkeypatch, mocker, {'requests_per_minute': 6000})
+    worksheet.append_rows.side_effect = _fake_api_error(400)
+
+    assert exporter.export([{'n': '1'}]) == 0
+    assert worksheet.append_rows.call_count == 1
+    exporter._sleep.assert_not_called()
+
+
+def test_exporter_only_retries_appends_that_cannot_have_landed(tmp_path, monkeypatch, mocker):
+    import requests
+    from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+    exporter, worksheet = _configured_exporter(tmp_path, monkeypatch, mocker, {'requests_per_minute': 6000})
+    refused = requests.ConnectionError(MaxRetryError(None, '/', NewConnectionError(None, 'refused')))
+    worksheet.append_rows.side_effect = [refused, None]
+    assert exporter.export([{'n': '1'}]) == 1
+
+    for error in (requests.ReadTimeout('read timed out'), requests.ConnectionError('reset')):
+        worksheet.append_rows.reset_mock(side_effect=True)
+        worksheet.append_rows.side_effect = [error, None]
+        assert exporter.export([{'n': '1'}]) == 0
+        assert worksheet.append_rows.call_count == 1
+        assert exporter.append_uncertain
+    assert exporter._sleep.call_count == 1
+
+
+def test_exporter_writes_missing_values_as_empty_cells(tmp_path, monkeypatch, mocker):
+    exporter, worksheet = _configured_exporter(tmp_path, monkeypatch, mocker, {'requests_per_minute': 6000})
+    exporter.config['output']['columns'] = ['n', 'm']
+
+    exporter.export([{'n': None, 'm': 0}, {'n': '1'}])
+
+    worksheet.append_rows.assert_called_once_with([['', '0'], ['1', '']])
+
+
+def test_exporter_upserts_changed_cells_and_appends_new_rows(tmp_path, monkeypatch, mocker):
+    from src.core.sheet_index import SheetIndex
+
+    creds = tmp_path / 'creds.json'
+    creds.write_text('{}')
+    monkeypatch.setenv('GOOGLE_SHEETS_ID', 'sheet-id-123')
+    monkeypatch.setenv('GOOGLE_SHEETS_CREDENTIALS_PATH', str(creds))
+
+    client_mock = mocker.Mock()
+    worksheet = mocker.Mock()
+    client_mock.open_by_key.return_value.worksheet.return_value = worksheet
+    mocker.patch('src.core.sheets.gspread.service_account', return_value=client_mock)
+    # Sheet has a header row and two existing rows keyed by id.
+    worksheet.batch_get.return_value = [[['id'], ['a'], ['b']]]
+    worksheet.append_rows.return_value = {'updates': {'updatedRange': "'Sheet1'!A4:B4"}}
+
+    config = {
+        'dedupe_keys': ['id'],
+        'delta_export': True,
+        'output': {
+            'sheet_tab': 'Sheet1',
+            'columns': ['id', 'price'],
+            'sheet_mode': 'upsert',
+            'sheets': {'requests_per_minute': 6000},
+        },
+    }
+    index = SheetIndex(tmp_path / 'dedupe.db')
+    exporter = SheetsExporter(config, StubLogger(), index=index)
+
+    rows = [
+        {'id': 'b', 'price': '2', 'change_type': 'changed'},
+        {'id': 'c', 'price': '3', 'change_type': 'new'},
+    ]
+    assert exporter.export(rows) == 2
+    assert exporter.complete
+
+    worksheet.batch_get.assert_called_once_with(['A:A'])
+    # Bootstrapped rows have no known values, so the whole row is rewritten once.
+    worksheet.batch_update.assert_called_once_with([
+        {'range': 'A3', 'values': [['b']]},
+        {'range': 'B3', 'values': [['2']]},
+        {'range': 'C3', 'values': [['changed']]},
+    ])
+    worksheet.append_rows.assert_called_once_with([['c', '3', 'new']])
+
+    worksheet.reset_mock()
+    rows = [
+        {'id': 'c', 'price': '4', 'change_type': 'changed'},
+        {'id': 'b', 'price': '2', 'change_type': 'changed'},
+    ]
+    assert exporter.export(rows) == 1
+
+    worksheet.batch_get.assert_not_called()
+    worksheet.append_rows.assert_not_called()
+    worksheet.batch_update.assert_called_once_with([
+        {'range': 'B4', 'values': [['4']]},
+        {'range': 'C4', 'values': [['changed']]},
+    ])
+
+
+def test_exporters_share_cached_client_and_worksheet(tmp_path, monkeypatch, mocker):
+    creds = tmp_path / 'creds.json'
+    creds.write_text('{}')
+    monkeypatch.setenv('GOOGLE_SHEETS_ID', 'sheet-id-123')
+    monkeypatch.setenv('GOOGLE_SHEETS_CREDENTIALS_PATH', str(creds))
+
+    client_mock = mocker.Mock()
+    worksheet_mock = client_mock.open_by_key.return_value.worksheet.return_value
+    service_account = mocker.patch('src.core.sheets.gspread.service_account', return_value=client_mock)
+    config = {'output': {'sheet_tab': 'Sheet1', 'columns': ['n'], 'sheets': {'requests_per_minute': 6000}}}
+
+    for value in ('1', '2'):
+        SheetsExporter(config, StubLogger()).export([{'n': value}])
+
+    service_account.assert_called_once()
+    client_mock.open_by_key.assert_called_once_with('sheet-id-123')
+    assert worksheet_mock.append_rows.call_count == 2
+
+    # Rotating the key file yields a fresh client.
+    creds.write_text('{"rotated": true}')
+    os.utime(creds, (creds.stat().st_mtime + 10, creds.stat().st_mtime + 10))
+    SheetsExporter(config, StubLogger())
+    assert service_account.call_count == 2
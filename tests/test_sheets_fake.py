@@ -0,0 +1,109 @@
+import pytest
+
+from src.core.sheet_index import SheetIndex
+from src.core.sheets import SheetsExporter
+from src.core.sheets_fake import FakeSheetsClient
+
+
+class StubLogger:
+    def __init__(self):
+        self.infos = []
+        self.errors = []
+
+    def info(self, message):
+        self.infos.append(message)
+
+    def error(self, message):
+        self.errors.append(message)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture(autouse=True)
+def clear_env(monkeypatch):
+    for name in ('GOOGLE_SHEETS_ID', 'SHEET_ID', 'GOOGLE_SHEETS_CREDENTIALS_PATH'):
+        monkeypatch.delenv(name, raising=False)
+
+
+def _exporter(client, sheets_cfg, tmp_path, **output):
+    config = {
+        'dedupe_keys': ['id'],
+        'output': {'sheet_tab': 'Data', 'columns': ['id', 'price'], 'sheets': sheets_cfg, **output},
+    }
+    exporter = SheetsExporter(
+        config, StubLogger(), client=client, sheet_id='sheet-1', index=SheetIndex(tmp_path / 'dedupe.db')
+    )
+    return exporter
+
+
+def _rows(count, price='1'):
+    return [{'id': str(index), 'price': price} for index in range(count)]
+
+
+def _sheet_rows(client):
+    return client.worksheet_rows('sheet-1', 'Data')
+
+
+def test_export_waits_out_quota_and_lands_every_chunk(tmp_path):
+    clock = FakeClock()
+    client = FakeSheetsClient(quota_per_minute=4, clock=clock, sleep=clock.sleep)
+    exporter = _exporter(client, {'chunk_rows': 2, 'requests_per_minute': 60000}, tmp_path)
+    exporter._sleep = clock.sleep
+
+    assert exporter.export(_rows(9)) == 9
+    assert exporter.complete
+
+    assert [row[0] for row in _sheet_rows(client)] == [str(i) for i in range(9)]
+    # open_by_key + worksheet + two appends fill the first minute; the rest waited.
+    assert client.request_count('append_rows') > 5
+    assert clock.now >= 60
+
+
+def test_export_resumes_from_last_written_chunk(tmp_path):
+    client = FakeSheetsClient()
+    exporter = _exporter(client, {'chunk_rows': 3, 'max_retries': 1, 'requests_per_minute': 60000}, tmp_path)
+    exporter._sleep = lambda _seconds: None
+    rows = _rows(8)
+
+    # The first chunk lands; the second gets a 503, which appends never retry.
+    client.fail_next(503, method='append_rows', after=1)
+    assert exporter.export(rows) == 3
+    assert not exporter.complete
+    assert exporter.chunks_written == 1
+
+    assert exporter.export(rows, start_chunk=exporter.chunks_written) == 5
+    assert exporter.complete
+    assert [row[0] for row in _sheet_rows(client)] == [str(i) for i in range(8)]
+
+
+def test_upsert_against_fake_touches_only_changed_cells(tmp_path):
+    client = FakeSheetsClient()
+    _sheet_rows(client).extend([['id', 'price', 'change_type'], ['0', '1', 'new']])
+    exporter = _exporter(
+        client, {'requests_per_minute': 60000}, tmp_path, sheet_mode='upsert'
+    )
+    exporter.config['delta_export'] = True
+
+    rows = [{'id': '0', 'price': '5', 'change_type': 'changed'}, {'id': '1', 'price': '1', 'change_type': 'new'}]
+    assert exporter.export(rows) == 2
+    assert _sheet_rows(client) == [
+        ['id', 'price', 'change_type'],
+        ['0', '5', 'changed'],
+        ['1', '1', 'new'],
+    ]
+
+    client.requests.clear()
+    rows = [{'id': '1', 'price': '2', 'change_type': 'changed'}]
+    assert exporter.export(rows) == 1
+    assert client.request_count('batch_get') == 0
+    assert client.request_count('append_rows') == 0
+    assert _sheet_rows(client)[2] == ['1', '2', 'changed']
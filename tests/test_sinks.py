@@ -0,0 +1,187 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+from src.core.sinks import CsvSink, JsonlSink, build_sink
+
+
+class StubLogger:
+    def info(self, *_args, **_kwargs):
+        pass
+
+    def error(self, *_args, **_kwargs):
+        pass
+
+
+def build_config(tmp_path, **output):
+    return {
+        "name": "sink_test",
+        "output": {"csv_dir": str(tmp_path), "columns": ["id", "title"], **output},
+    }
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as handle:
+        return list(csv.reader(handle))
+
+
+def test_csv_sink_publishes_file_only_on_close(tmp_path):
+    sink = CsvSink(build_config(tmp_path), StubLogger(), run_id="run1")
+    sink.write([{"id": "1", "title": "first", "extra": "ignored"}])
+
+    assert not (tmp_path / "sink_test.csv").exists()
+
+    sink.close()
+    assert read_rows(tmp_path / "sink_test.csv") == [["id", "title"], ["1", "first"]]
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_csv_sink_append_mode_writes_header_once(tmp_path):
+    config = build_config(tmp_path, csv_mode="append")
+    for run_id, row_id in (("run1", "1"), ("run2", "2")):
+        with CsvSink(config, StubLogger(), run_id=run_id) as sink:
+            sink.write([{"id": row_id, "title": f"row {row_id}"}])
+
+    assert read_rows(tmp_path / "sink_test.csv") == [
+        ["id", "title"],
+        ["1", "row 1"],
+        ["2", "row 2"],
+    ]
+
+
+def test_csv_sink_append_rejects_mismatched_header(tmp_path):
+    (tmp_path / "sink_test.csv").write_text("other,header\n")
+    sink = CsvSink(build_config(tmp_path, csv_mode="append"), StubLogger(), run_id="run1")
+
+    with pytest.raises(ValueError, match="does not match"):
+        sink.write([{"id": "1", "title": "x"}])
+
+
+def test_csv_sink_rotates_per_run(tmp_path):
+    with CsvSink(build_config(tmp_path, csv_rotate="run"), StubLogger(), run_id="abc") as sink:
+        sink.write([{"id": "1", "title": "x"}])
+
+    assert sink.paths == [tmp_path / "sink_test-abc.csv"]
+
+
+def test_csv_sink_rotates_by_size(tmp_path):
+    config = build_config(tmp_path, csv_mode="append", csv_rotate="size", csv_max_bytes=30)
+    with CsvSink(config, StubLogger(), run_id="abc") as sink:
+        for index in range(3):
+            sink.write([{"id": str(index), "title": "a fairly long title"}])
+
+    rotated = sorted(tmp_path.glob("sink_test-abc-*.csv"))
+    assert [path.name for path in rotated] == [
+        "sink_test-abc-001.csv",
+        "sink_test-abc-002.csv",
+        "sink_test-abc-003.csv",
+    ]
+    assert read_rows(rotated[0]) == [["id", "title"], ["0", "a fairly long title"]]
+    assert read_rows(tmp_path / "sink_test.csv") == [["id", "title"]]
+
+
+def test_csv_sink_abort_keeps_previous_file(tmp_path):
+    (tmp_path / "sink_test.csv").write_text("id,title\nold,row\n")
+
+    with pytest.raises(RuntimeError):
+        with CsvSink(build_config(tmp_path), StubLogger(), run_id="run1") as sink:
+            sink.write([{"id": "new", "title": "row"}])
+            raise RuntimeError("boom")
+
+    assert read_rows(tmp_path / "sink_test.csv") == [["id", "title"], ["old", "row"]]
+
+
+def test_build_sink_writes_gzip_jsonl_and_appends_members(tmp_path):
+    config = build_config(tmp_path, format="jsonl", compression="gzip", csv_mode="append")
+    for run_id, row_id in (("run1", "1"), ("run2", "2")):
+        with build_sink(config, StubLogger(), run_id=run_id) as sink:
+            assert isinstance(sink, JsonlSink)
+            sink.write([{"id": row_id, "title": None, "extra": "ignored"}])
+
+    with gzip.open(tmp_path / "sink_test.jsonl.gz", "rt", encoding="utf-8") as handle:
+        rows = [json.loads(line) for line in handle]
+    assert rows == [{"id": "1", "title": None}, {"id": "2", "title": None}]
+
+
+def test_build_sink_writes_zstd_csv(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    with build_sink(build_config(tmp_path, compression="zstd"), StubLogger()) as sink:
+        sink.write([{"id": "1", "title": "x"}])
+
+    with zstandard.open(tmp_path / "sink_test.csv.zst", "rt", encoding="utf-8") as handle:
+        assert handle.read().splitlines() == ["id,title", "1,x"]
+
+
+def test_build_sink_writes_parquet_row_groups(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    config = build_config(tmp_path, format="parquet", batch_rows=2)
+    with build_sink(config, StubLogger()) as sink:
+        sink.write([{"id": str(index), "title": None} for index in range(5)])
+
+    parquet_file = pq.ParquetFile(tmp_path / "sink_test.parquet")
+    assert parquet_file.metadata.num_row_groups == 3
+    assert parquet_file.read().column("id").to_pylist() == ["0", "1", "2", "3", "4"]
+
+
+def test_build_sink_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="output.format"):
+        build_sink(build_config(tmp_path, format="xml"), StubLogger())
+
+
+def test_csv_sink_append_stages_only_new_rows(tmp_path):
+    target = tmp_path / "sink_test.csv"
+    target.write_text("id,title\n" + "".join(f"{index},old row\n" for index in range(1000)))
+    history = target.stat().st_size
+
+    sink = CsvSink(build_config(tmp_path, csv_mode="append"), StubLogger(), run_id="run1")
+    sink.write([{"id": "new", "title": "row"}])
+    sink._handle.flush()
+    (staged,) = tmp_path.glob(".*.tmp")
+    assert staged.stat().st_size == len("new,row\r\n")
+    assert target.stat().st_size == history
+    sink.close()
+
+    rows = read_rows(target)
+    assert rows[0] == ["id", "title"] and rows[-1] == ["new", "row"] and len(rows) == 1002
+
+
+def test_size_rotation_counts_compressed_bytes_on_disk(tmp_path):
+    # 3000 repeated characters compress to a few dozen bytes, well under the limit.
+    config = build_config(tmp_path, csv_mode="append", csv_rotate="size", csv_max_bytes=200, compression="gzip")
+    for run_id in ("run1", "run2"):
+        with build_sink(config, StubLogger(), run_id=run_id) as sink:
+            sink.write([{"id": run_id, "title": "é" * 3000}])
+    live = tmp_path / "sink_test.csv.gz"
+    assert not list(tmp_path.glob("sink_test-*"))
+    with gzip.open(live, "rt", encoding="utf-8") as handle:
+        assert [line[:9] for line in handle.read().splitlines()] == ["id,title", "run1,éééé", "run2,éééé"]
+
+    # The existing live file is measured with a stat: once it reaches the limit it is rotated out.
+    config["output"]["csv_max_bytes"] = live.stat().st_size
+    with build_sink(config, StubLogger(), run_id="run3") as sink:
+        sink.write([{"id": "run3", "title": "x"}])
+    assert [path.name for path in tmp_path.glob("sink_test-*")] == ["sink_test-run3-001.csv.gz"]
+    with gzip.open(live, "rt", encoding="utf-8") as handle:
+        assert handle.read().splitlines() == ["id,title", "run3,x"]
+
+
+def test_parquet_schema_does_not_depend_on_the_first_batch(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    config = build_config(tmp_path, format="parquet", batch_rows=2, columns=["price", "weight"])
+    config["transforms"] = {"weight": ["float"]}
+    rows = [
+        {"price": 10, "weight": 1.0},
+        {"price": None, "weight": None},
+        {"price": 10.5, "weight": 2.5},
+        {"price": "n/a", "weight": 3.0},
+    ]
+    with build_sink(config, StubLogger()) as sink:
+        sink.write(rows)
+
+    table = pq.ParquetFile(tmp_path / "sink_test.parquet").read()
+    assert str(table.schema.field("price").type) == "string"
+    assert str(table.schema.field("weight").type) == "double"
+    assert table.column("price").to_pylist() == ["10", None, "10.5", "n/a"]
+    assert table.column("weight").to_pylist() == [1.0, None, 2.5, 3.0]
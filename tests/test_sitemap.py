@@ -0,0 +1,134 @@
+import gzip
+import io
+
+from src import cli
+from src.core.scraper import Scraper
+from src.core.sitemap import (
+    SitemapDiscovery,
+    SitemapLastmods,
+    iter_sitemap_entries,
+    open_sitemap_stream,
+)
+
+NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+class StubLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, message, *_args, **_kwargs):
+        self.messages.append(message)
+
+    def error(self, message, *_args, **_kwargs):
+        self.messages.append(message)
+
+    def debug(self, *_args, **_kwargs):
+        pass
+
+
+def _urlset(entries):
+    body = "".join(
+        f"<url><loc>{loc}</loc>{f'<lastmod>{lastmod}</lastmod>' if lastmod else ''}</url>" for loc, lastmod in entries
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{NS}">{body}</urlset>'.encode("utf-8")
+
+
+def _index(entries):
+    body = "".join(f"<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod></sitemap>" for loc, lastmod in entries)
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="{NS}">{body}</sitemapindex>'.encode("utf-8")
+
+
+def _write_site(tmp_path, page_lastmods, products_lastmod="2024-03-01"):
+    pages = tmp_path / "pages"
+    pages.mkdir(exist_ok=True)
+    entries = []
+    for name, lastmod in page_lastmods.items():
+        page = pages / f"{name}.html"
+        if not page.exists():
+            page.write_text(f"<html><div class='row'><span class='id'>{name}</span></div></html>")
+        entries.append((page.as_uri(), lastmod))
+    entries.append(("https://other.org/off-site", "2024-03-01"))
+    (tmp_path / "products.xml.gz").write_bytes(gzip.compress(_urlset(entries)))
+    (tmp_path / "sitemap.xml").write_bytes(_index([((tmp_path / "products.xml.gz").as_uri(), products_lastmod)]))
+    return {
+        "name": "example",
+        "urls": [(tmp_path / "sitemap.xml").as_uri()],
+        "discovery": "sitemap",
+        "selectors": {"item": ".row", "id": ".id"},
+        "pagination": {"type": "none"},
+        "rate_limit": {"rps": 1000, "burst": 1000},
+        "dedupe_keys": ["id"],
+        "output": {"csv_dir": str(tmp_path / "out")},
+        "min_rows": 1,
+        "allowed_domains": ["example.com"],
+        "dedupe_db_path": str(tmp_path / "dedupe.db"),
+    }
+
+
+def test_iter_sitemap_entries_streams_indexes_and_gzip():
+    index = open_sitemap_stream(io.BytesIO(_index([("https://example.com/a.xml.gz", "2024-01-01")])))
+    assert list(iter_sitemap_entries(index)) == [("sitemap", "https://example.com/a.xml.gz", "2024-01-01")]
+
+    urlset = gzip.compress(_urlset([("https://example.com/1", "2024-01-02"), ("https://example.com/2", None)]))
+    assert list(iter_sitemap_entries(open_sitemap_stream(io.BytesIO(urlset)))) == [
+        ("url", "https://example.com/1", "2024-01-02"),
+        ("url", "https://example.com/2", None),
+    ]
+
+
+def test_sitemap_responses_are_closed_before_pages_are_yielded(tmp_path, mocker):
+    config = _write_site(tmp_path, {"a": "2024-03-01", "b": None})
+    scraper = Scraper(config, StubLogger())
+    opened = []
+    real_open = scraper.open_stream
+
+    def open_stream(url):
+        opened.append(real_open(url))
+        return opened[-1]
+
+    mocker.patch.object(scraper, "open_stream", side_effect=open_stream)
+    pages = SitemapDiscovery(scraper, "example").iter_urls(config["urls"])
+
+    assert next(pages).endswith("/a.html")
+    assert len(opened) == 2 and all(stream.closed for stream in opened)
+    assert next(pages).endswith("/b.html")
+
+
+def test_sitemap_discovery_skips_pages_unchanged_since_last_crawl(tmp_path):
+    config = _write_site(tmp_path, {"a": "2024-03-01", "b": "2024-03-01", "c": None})
+    lastmods = SitemapLastmods(tmp_path / "dedupe.db")
+
+    first = Scraper(config, StubLogger(), lastmods=lastmods)
+    assert sorted(item["id"] for item in first.scrape()) == ["a", "b", "c"]
+    assert first.discovery.stats["filtered"] == 1
+    first.commit_discovery()
+
+    # Nothing changed: the child sitemap's lastmod matches, so it is not even opened.
+    second = Scraper(config, StubLogger(), lastmods=lastmods)
+    assert second.scrape() == []
+    assert second.discovery.stats["sitemaps_unchanged"] == 1
+    assert second.discovery_up_to_date()
+
+    # One page changed, and pages without a lastmod are always fetched.
+    _write_site(tmp_path, {"a": "2024-03-01", "b": "2024-03-05", "c": None}, products_lastmod="2024-03-05")
+    (tmp_path / "pages" / "c.html").unlink()
+    third = Scraper(config, StubLogger(), lastmods=lastmods)
+    assert [item["id"] for item in third.scrape()] == ["b"]
+    third.commit_discovery()
+    # The failed page kept its sitemap from being recorded, so the next run walks it again.
+    assert lastmods.lookup("example", [(tmp_path / "pages" / "b.html").as_uri(), (tmp_path / "products.xml.gz").as_uri()]) == {
+        (tmp_path / "pages" / "b.html").as_uri(): "2024-03-05",
+        (tmp_path / "products.xml.gz").as_uri(): "2024-03-01",
+    }
+
+
+def test_run_with_no_changed_pages_succeeds_without_exporting(tmp_path, monkeypatch):
+    monkeypatch.delenv("SLACK_WEBHOOK_URL", raising=False)
+    monkeypatch.delenv("GOOGLE_SHEETS_ID", raising=False)
+    config = _write_site(tmp_path, {"a": "2024-03-01"})
+
+    assert cli.run_site("example", config=config, logger=StubLogger()) == cli.EXIT_OK
+    logger = StubLogger()
+    assert cli.run_site("example", config=config, logger=logger) == cli.EXIT_OK
+    assert "Nothing changed since the last crawl; skipping export" in logger.messages
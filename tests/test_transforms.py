@@ -0,0 +1,88 @@
+import pytest
+
+from src.core import transforms as transforms_module
+from src.core.records import record_type
+from src.core.transforms import TransformPipeline
+
+
+def test_pipeline_normalises_batch_in_place():
+    pipeline = TransformPipeline({
+        "price": ["strip", {"regex": r"([\d,.]+)"}, {"replace": [",", ""]}, "float"],
+        "title": ["collapse_whitespace", "lower"],
+        "published": [{"date": "%B %d, %Y"}],
+        "stock": ["int", {"default": 0}],
+    })
+    record_cls = record_type(("price", "title", "published", "stock"))
+    items = [
+        record_cls(price=" $1,234.50 ", title="  Hello \n  World ", published="March 14, 1879"),
+        {"price": "n/a", "stock": "12.0", "published": "not a date"},
+    ]
+
+    pipeline.apply(items)
+
+    assert items[0] == {
+        "price": 1234.5,
+        "title": "hello world",
+        "published": "1879-03-14",
+    }
+    assert items[1] == {"price": None, "stock": 12, "published": None}
+
+
+def test_numpy_path_matches_per_value_path(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(transforms_module, "NUMPY_MIN_BATCH", 2)
+    pipeline = TransformPipeline({"qty": ["strip", "int"]})
+
+    clean = [{"qty": f" {index} "} for index in range(5)]
+    mixed = [{"qty": "1"}, {"qty": "1.5"}, {"qty": ""}]
+    pipeline.apply(clean)
+    pipeline.apply(mixed)
+
+    assert [item["qty"] for item in clean] == [0, 1, 2, 3, 4]
+    assert all(type(item["qty"]) is int for item in clean)
+    assert [item["qty"] for item in mixed] == [1, None, None]
+
+
+@pytest.mark.parametrize(
+    "spec, message",
+    [
+        ({"price": ["nope"]}, "unknown transform"),
+        ({"price": [{"regex": "("}]}, "transforms.price.regex"),
+        ({"price": []}, "non-empty list"),
+    ],
+)
+def test_pipeline_rejects_invalid_specs(spec, message):
+    with pytest.raises(ValueError, match=message):
+        TransformPipeline(spec)
+
+
+@pytest.mark.parametrize("cast", ["int", "float"])
+def test_numpy_path_agrees_with_single_rows_on_non_string_values(cast):
+    pytest.importorskip("numpy")
+    values = [1.5, True, 2, 3.0, False, 2**53 + 1]
+    size = transforms_module.NUMPY_MIN_BATCH
+    pipeline = TransformPipeline({"qty": [cast]})
+
+    singles = []
+    for value in values:
+        item = {"qty": value}
+        pipeline.apply([item])
+        singles.append(item["qty"])
+    for value, expected in zip(values, singles, strict=True):
+        batch = [{"qty": value} for _ in range(size)]
+        pipeline.apply(batch)
+        assert [item["qty"] for item in batch] == [expected] * size
+        assert {type(item["qty"]) for item in batch} == {type(expected)}
+    batch = [{"qty": value} for value in values * size]
+    pipeline.apply(batch)
+    assert [item["qty"] for item in batch] == singles * size
+
+
+@pytest.mark.parametrize("size", [1, transforms_module.NUMPY_MIN_BATCH])
+def test_int_cast_keeps_ids_above_two_to_the_53_exact(size):
+    pipeline = TransformPipeline({"id": ["int"]})
+    items = [{"id": value} for value in ("9007199254740993", 9007199254740993)] * size
+
+    pipeline.apply(items)
+
+    assert {item["id"] for item in items} == {9007199254740993}
@@ -0,0 +1,59 @@
+import pytest
+
+from src.core.config import CompiledConfig
+from src.core.urls import InvalidUrl, UrlSources, compile_url_source
+
+
+def test_range_templates_expand_lazily_with_padding_and_steps():
+    assert list(compile_url_source("https://x.test/item/{1..3}")) == [
+        "https://x.test/item/1",
+        "https://x.test/item/2",
+        "https://x.test/item/3",
+    ]
+    assert list(compile_url_source("https://x.test/{08..10}/p{0..20..10}"))[:4] == [
+        "https://x.test/08/p0",
+        "https://x.test/08/p10",
+        "https://x.test/08/p20",
+        "https://x.test/09/p0",
+    ]
+    assert list(compile_url_source("https://x.test/{3..1}")) == ["https://x.test/3", "https://x.test/2", "https://x.test/1"]
+    assert list(compile_url_source("https://x.test/plain")) == ["https://x.test/plain"]
+
+    huge = iter(compile_url_source("https://x.test/item/{1..1000000000}"))
+    assert next(huge) == "https://x.test/item/1"
+
+
+def test_param_templates_and_url_files(tmp_path):
+    source = compile_url_source(
+        {"template": "https://x.test/{category}?page={page}", "params": {"category": ["books", "music"], "page": "{1..2}"}}
+    )
+    assert list(source) == [
+        "https://x.test/books?page=1",
+        "https://x.test/books?page=2",
+        "https://x.test/music?page=1",
+        "https://x.test/music?page=2",
+    ]
+
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("# category pages\nhttps://x.test/a\n\n  https://x.test/b  \nnot-a-url\n", encoding="utf-8")
+    urls = iter(UrlSources([{"file": str(url_file)}, "https://x.test/c"]))
+    assert list(urls) == ["https://x.test/a", "https://x.test/b", "not-a-url", "https://x.test/c"]
+    invalid = list(UrlSources([{"file": str(url_file)}]))[2]
+    assert isinstance(invalid, InvalidUrl)
+    assert "urls.txt:5: URL must be http(s) or file://" in invalid.reason
+
+    with pytest.raises(ValueError, match="must be strings"):
+        compile_url_source({"file": "a.txt", "template": "x"})
+    with pytest.raises(ValueError, match="param 'page' must be a non-empty list"):
+        compile_url_source({"template": "https://x.test/{page}", "params": {"page": []}})
+
+
+def test_compiled_config_keeps_url_sources_unexpanded(tmp_path):
+    pages = tmp_path / "pages"
+    pages.mkdir()
+    for page in (1, 2):
+        (pages / f"page{page}.html").write_text("<html></html>")
+    config = CompiledConfig({"urls": [f"{pages.as_uri()}/page{{1..2}}.html"], "selectors": {"item": ".row", "id": ".id"}})
+
+    assert config["urls"] == [f"{pages.as_uri()}/page{{1..2}}.html"]
+    assert list(config.plan.urls) == [(pages / "page1.html").as_uri(), (pages / "page2.html").as_uri()]
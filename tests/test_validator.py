@@ -92,3 +92,125 @@ def test_validator_rejects_invalid_min_rows_and_dedupe_keys(tmp_path):
 
     assert any("dedupe_keys must be a non-empty list" in error for error in errors)
     assert any("min_rows must be a non-negative integer" in error for error in errors)
+
+
+def test_validator_checks_url_templates_without_expanding_them(tmp_path):
+    config_path = tmp_path / "templates.yaml"
+    config_path.write_text(yaml.dump({
+        "name": "example",
+        "urls": [
+            "https://example.com/item/{1..50000000}",
+            {"template": "https://shop.example.com/{category}?page={page}", "params": {"category": ["a"], "page": "{1..9}"}},
+            {"file": "sites/example-urls.txt"},
+            "https://{1..3}.example.com/",
+            "https://other.org/item/{1..5}",
+            {"template": "ftp://example.com/{id}", "params": {"id": [1]}},
+            {"template": "https://example.com/{id}", "params": {"sku": [1]}},
+        ],
+        "selectors": {"item": ".row", "id": ".row-id"},
+        "pagination": {"type": "none"},
+        "dedupe_keys": ["id"],
+        "output": {"csv_dir": "out"},
+        "min_rows": 1,
+        "allowed_domains": ["example.com"],
+    }))
+
+    errors = SchemaValidator().validate(str(config_path))
+
+    assert errors == [
+        "URL template host must be fixed, not generated: https://{1..3}.example.com/",
+        "URL template host is not in allowed_domains: https://other.org/item/{1..5}",
+        "URL must be http(s) or file://: ftp://example.com/{id}",
+        "urls template placeholders have no params: id",
+    ]
+
+
+def test_validator_checks_discovery_settings():
+    config = {
+        "name": "example",
+        "urls": ["https://example.com/sitemap.xml"],
+        "selectors": {"item": ".row", "id": ".row-id"},
+        "pagination": {"type": "none"},
+        "dedupe_keys": ["id"],
+        "output": {"csv_dir": "out"},
+        "min_rows": 1,
+    }
+    validator = SchemaValidator()
+
+    assert validator.validate_config({**config, "discovery": "sitemap"}) == []
+    assert validator.validate_config({**config, "discovery": {"type": "sitemap", "incremental": False}}) == []
+    assert validator.validate_config({**config, "discovery": "crawl"}) == [
+        "discovery must be 'sitemap' or a mapping with type: sitemap"
+    ]
+    assert validator.validate_config({**config, "discovery": {"type": "sitemap", "incremental": "yes"}}) == [
+        "discovery.incremental must be a boolean"
+    ]
+
+
+def test_validator_accepts_follow_fields_in_transforms_and_columns():
+    config = {
+        "name": "quotes",
+        "urls": ["https://quotes.toscrape.com/"],
+        "selectors": {"item": ".quote", "text": ".text", "link": "a::attr(href)"},
+        "follow": {"field": "link", "selectors": {"born": ".author-born-date"}},
+        "transforms": {"born": ["strip"]},
+        "pagination": {"type": "none"},
+        "dedupe_keys": ["text"],
+        "output": {"csv_dir": "out", "columns": ["text", "born"]},
+        "min_rows": 1,
+    }
+    validator = SchemaValidator()
+
+    assert validator.validate_config(config) == []
+    assert validator.validate_config({**config, "follow": {"field": "author", "selectors": {"text": ".x"}}}) == [
+        "follow.field must reference a selector field",
+        "follow.selectors must not reuse a selector field name",
+        "transforms must reference selector field names",
+        "output.columns must reference selector field names",
+    ]
+
+
+def test_validator_checks_json_format_paths_and_cursor_pagination():
+    config = {
+        "name": "api",
+        "format": "json",
+        "urls": ["https://api.example.com/products"],
+        "selectors": {"item": "data.products", "id": "id"},
+        "pagination": {"type": "cursor", "cursor_path": "meta.next", "param": "cursor"},
+        "dedupe_keys": ["id"],
+        "output": {"csv_dir": "out"},
+        "min_rows": 1,
+    }
+    validator = SchemaValidator()
+
+    assert validator.validate_config(config) == []
+    assert validator.validate_config({**config, "format": "xml"}) == [
+        "format must be html or json",
+        "pagination cursor requires format: json",
+    ]
+    assert validator.validate_config(
+        {**config, "selectors": {"item": "data..products", "id": "id"}, "pagination": {"type": "cursor"}}
+    ) == [
+        "selectors.item: Invalid JSON path 'data..products': empty segment",
+        "pagination cursor requires a non-empty param",
+        "pagination cursor requires a non-empty cursor_path",
+    ]
+
+
+def test_validator_checks_parse_workers():
+    config = {
+        "name": "example",
+        "urls": ["https://example.com/list"],
+        "selectors": {"item": ".row", "id": ".id"},
+        "pagination": {"type": "none"},
+        "dedupe_keys": ["id"],
+        "output": {"csv_dir": "out"},
+        "min_rows": 1,
+    }
+    validator = SchemaValidator()
+
+    assert validator.validate_config({**config, "parse_workers": 8}) == []
+    for bad in (0, True, "4"):
+        assert validator.validate_config({**config, "parse_workers": bad}) == [
+            "parse_workers must be an integer >= 1 when provided"
+        ]